@@ -0,0 +1,229 @@
+"""
+Vectorized evaluation of many isolation positions at once with NumPy.
+
+The mobility heuristics in sample_players.py and game_agent.py score one
+board at a time by generating the legal moves of each player. This module
+packs a batch of leaf positions into arrays (one row of blocked cells per
+position plus the cell index of each player) and computes the mobility of
+both players for every position in a single vectorized pass over a padded
+knight-move neighbor table.
+
+`batch_minimax` is a fixed-depth minimax search that expands the whole tree
+first, collecting its leaves into one `LeafBatch`, evaluates all the leaves
+in bulk, and then backs the scores up the tree. It returns exactly the same
+result as `CustomPlayer.minimax` with the corresponding scalar heuristic.
+(Alpha-beta search decides which nodes to expand from the scores of earlier
+leaves, so its leaves cannot be collected ahead of time in the same way.)
+
+This module requires NumPy.
+"""
+
+import numpy as np
+
+from isolation.bitboard import knight_tables
+
+# The heuristics of sample_players.py and game_agent.py, as pairs of
+# (own move weight, opponent move weight) tuples: the weights used once half
+# the cells of the board are blocked, and those used before (None if the
+# heuristic does not change during the game)
+OPEN_MOVE = ((1., 0.), None)
+IMPROVED = ((1., 1.), None)
+CUSTOM = ((1., 2.), (0., 1.))
+
+
+class LeafBatch:
+    """
+    A list of positions of one board size to be evaluated together, each
+    stored as its packed state (see `isolation.Board.packed_state`) along
+    with the side of the player the position is evaluated for.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the boards in the batch.
+
+    height : int
+        The number of rows of the boards in the batch.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.blocked = []
+        self.active_locs = []
+        self.inactive_locs = []
+        self.player_active = []
+
+    def __len__(self):
+        return len(self.blocked)
+
+    def add(self, game, player):
+        """Append the position on `game`, evaluated from the perspective of
+        `player`, and return its index in the batch."""
+        blocked, active_loc, inactive_loc = game.packed_state()
+        self.blocked.append(blocked)
+        self.active_locs.append(active_loc)
+        self.inactive_locs.append(inactive_loc)
+        self.player_active.append(player == game.active_player)
+        return len(self.blocked) - 1
+
+    def arrays(self):
+        """
+        Return the batch as NumPy arrays: a (positions x cells) boolean array
+        of blocked cells, the cell indices of the active and inactive players
+        and a boolean array that is True where the evaluated player is the
+        active player.
+        """
+        num_cells = self.width * self.height
+        num_bytes = (num_cells + 7) // 8
+        raw = b"".join(mask.to_bytes(num_bytes, "little") for mask in self.blocked)
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(self.blocked), num_bytes)
+        blocked = np.unpackbits(packed, axis=1, bitorder="little")[:, :num_cells]
+        return (blocked.astype(bool),
+                np.array(self.active_locs, dtype=np.intp),
+                np.array(self.inactive_locs, dtype=np.intp),
+                np.array(self.player_active, dtype=bool))
+
+
+class BatchEvaluator:
+    """
+    Compute mobility scores for a `LeafBatch` of positions on boards of one
+    size.
+
+    Parameters
+    ----------
+    width : int (optional)
+        The number of columns of the boards evaluated.
+
+    height : int (optional)
+        The number of rows of the boards evaluated.
+    """
+
+    def __init__(self, width=7, height=7):
+        self.width = width
+        self.height = height
+        num_cells = width * height
+        tables = knight_tables(width, height)
+        # pad every row to 8 neighbors with the index of an extra, always
+        # blocked column; the extra last row is used for players that have
+        # not moved (location -1)
+        self.neighbors = np.full((num_cells + 1, 8), num_cells, dtype=np.intp)
+        for loc, moves in enumerate(tables.neighbors):
+            for idx, (_, (r, c)) in enumerate(moves):
+                self.neighbors[loc, idx] = r * width + c
+
+    def mobility(self, batch):
+        """
+        Return the number of legal moves of the active and of the inactive
+        player in every position of `batch`, the number of blank cells and
+        whether the evaluated player is the active player.
+        """
+        blocked, active_locs, inactive_locs, player_active = batch.arrays()
+        num_positions, num_cells = blocked.shape
+        open_cells = np.zeros((num_positions, num_cells + 1), dtype=bool)
+        open_cells[:, :num_cells] = ~blocked
+        rows = np.arange(num_positions)[:, None]
+        blanks = open_cells.sum(axis=1)
+        active_moves = open_cells[rows, self.neighbors[active_locs]].sum(axis=1)
+        inactive_moves = open_cells[rows, self.neighbors[inactive_locs]].sum(axis=1)
+        active_moves = np.where(active_locs < 0, blanks, active_moves)
+        inactive_moves = np.where(inactive_locs < 0, blanks, inactive_moves)
+        return active_moves, inactive_moves, blanks, player_active
+
+    def evaluate(self, batch, heuristic=CUSTOM):
+        """
+        Score every position of `batch` for its evaluated player.
+
+        Parameters
+        ----------
+        batch : `LeafBatch`
+            The positions to evaluate.
+
+        heuristic : ((float, float), (float, float) or None) (optional)
+            The weights of the evaluated player's and the opponent's number of
+            legal moves, e.g., `IMPROVED` to compute `improved_score`; see
+            `CUSTOM`.
+
+        Returns
+        -------
+        numpy.ndarray
+            own_weight * own moves - opp_weight * opponent moves for every
+            position, or +/-inf for positions the evaluated player has won or
+            lost, as returned by the scalar heuristics.
+        """
+        weights, opening_weights = heuristic
+        active_moves, inactive_moves, blanks, player_active = self.mobility(batch)
+        own_moves = np.where(player_active, active_moves, inactive_moves)
+        opp_moves = np.where(player_active, inactive_moves, active_moves)
+        own_weight, opp_weight = weights
+        scores = own_weight * own_moves - opp_weight * opp_moves
+        if opening_weights is not None:
+            # every move blocks one cell, so the move count is the number of
+            # blocked cells
+            num_cells = self.width * self.height
+            opening = (num_cells - blanks) / float(num_cells) < 0.5
+            own_weight, opp_weight = opening_weights
+            scores = np.where(opening, own_weight * own_moves - opp_weight * opp_moves, scores)
+        # the game is over when the active player cannot move
+        terminal = np.where(player_active, -np.inf, np.inf)
+        return np.where(active_moves == 0, terminal, scores)
+
+
+def batch_minimax(game, depth, player, evaluator, heuristic=CUSTOM):
+    """
+    Search the game tree below `game` to a fixed depth with minimax, scoring
+    all the leaves of the tree in a single call to `evaluator`.
+
+    Parameters
+    ----------
+    game : isolation.Board
+        The root position; moves are applied and undone in place, so the
+        board is unchanged when the search returns.
+
+    depth : int
+        The number of plies to search.
+
+    player : object
+        The maximizing player.
+
+    evaluator : `BatchEvaluator`
+        The evaluator for the board size of `game`.
+
+    heuristic : ((float, float), (float, float) or None) (optional)
+        The heuristic weights passed to `BatchEvaluator.evaluate`.
+
+    Returns
+    -------
+    (float, tuple(int, int))
+        The minimax score of the root and the best move; the move is an empty
+        tuple when the root has no legal moves, as with `CustomPlayer.minimax`.
+    """
+    batch = LeafBatch(game.width, game.height)
+    tree = _expand(game, depth, player, batch)
+    scores = evaluator.evaluate(batch, heuristic).tolist()
+    return _backup(tree, scores, True)
+
+
+def _expand(game, depth, player, batch):
+    """Return the index of `game` in `batch` for a leaf, or the list of
+    (move, subtree) pairs of its children."""
+    legal_moves = game.get_legal_moves()
+    if depth == 0 or not legal_moves:
+        return batch.add(game, player)
+    children = []
+    for move in legal_moves:
+        game.apply_move(move)
+        children.append((move, _expand(game, depth - 1, player, batch)))
+        game.undo_move()
+    return children
+
+
+def _backup(tree, scores, maximizing_player):
+    """Return the (score, move) minimax result of `tree`."""
+    if not isinstance(tree, list):
+        return scores[tree], ()
+    results = [(_backup(subtree, scores, not maximizing_player)[0], move)
+               for move, subtree in tree]
+    if maximizing_player:
+        return max(results)
+    return min(results)
@@ -0,0 +1,603 @@
+"""
+Measure the speed of the isolation board implementations and of the search
+functions of `CustomPlayer`. Each benchmark is a subcommand, e.g.:
+
+    python benchmark.py search --depth 5
+
+The `search` benchmark runs fixed-depth alpha-beta search from a set of
+random 7x7 positions with each board implementation, expanding nodes either
+by copying the board (`forecast_move`) or by applying and undoing moves in
+place, and reports the number of nodes searched per second.
+
+The `movegen` benchmark measures the number of calls per second of legal
+move generation and mobility counting for each board implementation, along
+with the original move generator of `Board` (which rebuilt the list of knight
+directions and checked the bounds of every target cell on each call) as a
+baseline.
+
+The `batch` benchmark (requires NumPy) compares scoring leaf positions one
+at a time with the heuristics of sample_players.py and game_agent.py to
+scoring all of them in one vectorized pass with `batch_eval`, and fixed-depth
+minimax search with scalar evaluation to `batch_eval.batch_minimax`.
+
+The `scaling` benchmark measures how the board implementations scale with
+the size of the board, from 7x7 to 25x25: the number of board copies and of
+legal move counts per second, and the speed and depth reached by iterative
+deepening `CustomPlayer` searches with a fixed node budget from random
+positions of each size.
+
+The `suite` benchmark tracks search speed over time. It runs fixed-depth
+minimax and alpha-beta search, and iterative deepening (with the
+transposition table and move ordering) with alpha-beta, principal variation
+search and MTD(f) ("iterative", "pvs" and "mtdf"), from the fixed mid-game
+and end-game positions of benchmark_positions.json on several board sizes,
+and reports the nodes searched per second, the time taken to complete each
+depth of iterative deepening and the peak memory allocated during the search.
+The results can be saved as JSON and compared against an earlier run to catch
+regressions:
+
+    python benchmark.py suite --output before.json
+    python benchmark.py suite --compare before.json
+
+The corpus itself is regenerated (which invalidates saved results) with
+`python benchmark.py corpus`.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+from isolation import Board
+from isolation import BitBoard
+from game_agent import CustomPlayer
+from game_agent import custom_score
+from sample_players import improved_score
+from sample_players import open_move_score
+
+BOARD_TYPES = [("Board", Board), ("BitBoard", BitBoard)]
+
+SEARCH_MODES = [("copy", False), ("in-place", True)]
+
+# search method of CustomPlayer used by each iterative deepening search of
+# the suite benchmark
+ITERATIVE_METHODS = {"iterative": "alphabeta", "pvs": "pvs", "mtdf": "mtdf"}
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "benchmark_positions.json")
+
+# fraction of the cells of the board blocked in the positions of each phase
+CORPUS_PHASES = [("midgame", 0.3), ("endgame", 0.5)]
+
+CORPUS_SIZES = [(5, 5), (7, 7), (9, 9)]
+
+
+def random_moves(num_plies, seed, width=7, height=7):
+    """Return a list of `num_plies` random legal moves from the start of a
+    game on a board of the given size (fewer if the game ends early)."""
+    rng = random.Random(seed)
+    board = BitBoard(1, 2, width, height)
+    moves = []
+    while len(moves) < num_plies:
+        legal_moves = board.get_legal_moves()
+        if not legal_moves:
+            break
+        moves.append(rng.choice(legal_moves))
+        board.apply_move(moves[-1])
+    return moves
+
+
+def legacy_get_moves(board, move):
+    """Generate the knight moves from `move` the way `Board.__get_moves__`
+    did before it used precomputed tables."""
+    if move == Board.NOT_MOVED:
+        return board.get_blank_spaces()
+
+    r, c = move
+
+    directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2),  (1, 2), (2, -1),  (2, 1)]
+
+    valid_moves = [(r+dr,c+dc) for dr, dc in directions if board.move_is_legal((r+dr, c+dc))]
+
+    return valid_moves
+
+
+def make_position(board_cls, player_1, player_2, moves, width=7, height=7):
+    """Create a board of type `board_cls` and apply `moves` to it."""
+    board = board_cls(player_1, player_2, width, height)
+    for move in moves:
+        board.apply_move(move)
+    return board
+
+
+def bench_search(depth, num_positions, num_plies, seed):
+    """Time fixed-depth alpha-beta search for every combination of board
+    type and node expansion mode, and return a list of result rows."""
+    openings = [random_moves(num_plies, seed + i) for i in range(num_positions)]
+    rows = []
+    for board_name, board_cls in BOARD_TYPES:
+        for mode_name, in_place in SEARCH_MODES:
+            agent = CustomPlayer(depth, custom_score, iterative=False,
+                                 method='alphabeta', in_place=in_place)
+            agent.time_left = lambda: float("inf")
+            nodes = 0
+            elapsed = 0.
+            for moves in openings:
+                board = make_position(board_cls, agent, "opponent", moves)
+                if board.active_player != agent:
+                    board = make_position(board_cls, "opponent", agent, moves)
+                agent.nodes = 0
+                start = timeit.default_timer()
+                agent.alphabeta(board, depth)
+                elapsed += timeit.default_timer() - start
+                nodes += agent.nodes
+            rows.append((board_name, mode_name, nodes, elapsed, nodes / elapsed))
+    return rows
+
+
+def print_search(rows):
+    print("{:<10}{:<10}{:>10}{:>10}{:>14}".format("Board", "Mode", "Nodes", "Seconds", "Nodes/s"))
+    for board_name, mode_name, nodes, elapsed, rate in rows:
+        print("{:<10}{:<10}{:>10d}{:>10.3f}{:>14.0f}".format(board_name, mode_name,
+                                                             nodes, elapsed, rate))
+
+
+def bench_movegen(num_positions, num_plies, seed, repeat):
+    """Time legal move generation and mobility counting on random positions
+    and return a list of (name, calls, seconds, calls per second) rows."""
+    openings = [random_moves(num_plies, seed + i) for i in range(num_positions)]
+    boards = {name: [make_position(board_cls, 1, 2, moves) for moves in openings]
+              for name, board_cls in BOARD_TYPES}
+    players = (1, 2)
+    functions = [
+        ("Board legacy moves", boards["Board"],
+         lambda board, player: legacy_get_moves(board, board.get_player_location(player))),
+        ("Board legacy count", boards["Board"],
+         lambda board, player: len(legacy_get_moves(board, board.get_player_location(player)))),
+    ]
+    for name, _ in BOARD_TYPES:
+        functions.append(("{} moves".format(name), boards[name],
+                          lambda board, player: board.get_legal_moves(player)))
+        functions.append(("{} count".format(name), boards[name],
+                          lambda board, player: board.count_legal_moves(player)))
+    rows = []
+    for name, positions, fn in functions:
+        calls = repeat * len(positions) * len(players)
+        start = timeit.default_timer()
+        for _ in range(repeat):
+            for board in positions:
+                for player in players:
+                    fn(board, player)
+        elapsed = timeit.default_timer() - start
+        rows.append((name, calls, elapsed, calls / elapsed))
+    return rows
+
+
+def print_movegen(rows):
+    print("{:<22}{:>10}{:>10}{:>14}".format("Function", "Calls", "Seconds", "Calls/s"))
+    for name, calls, elapsed, rate in rows:
+        print("{:<22}{:>10d}{:>10.3f}{:>14.0f}".format(name, calls, elapsed, rate))
+
+
+def bench_batch(depth, num_positions, num_plies, seed):
+    """Time scalar and vectorized evaluation of the leaves of depth-limited
+    game trees, and scalar and batched minimax search, and return a list of
+    result rows."""
+    import batch_eval
+
+    heuristics = [("open_move", open_move_score, batch_eval.OPEN_MOVE),
+                  ("improved", improved_score, batch_eval.IMPROVED),
+                  ("custom", custom_score, batch_eval.CUSTOM)]
+    evaluator = batch_eval.BatchEvaluator()
+    openings = [random_moves(num_plies, seed + i) for i in range(num_positions)]
+    rows = []
+
+    leaves = []
+    for moves in openings:
+        board = make_position(BitBoard, "player", "opponent", moves)
+        frontier = [board]
+        for _ in range(depth):
+            frontier = [child.forecast_move(move) for child in frontier
+                        for move in child.get_legal_moves()] or frontier
+        leaves.extend(frontier)
+    for name, score_fn, heuristic in heuristics:
+        start = timeit.default_timer()
+        scalar = [score_fn(leaf, "player") for leaf in leaves]
+        scalar_time = timeit.default_timer() - start
+
+        start = timeit.default_timer()
+        batch = batch_eval.LeafBatch(7, 7)
+        for leaf in leaves:
+            batch.add(leaf, "player")
+        vector = evaluator.evaluate(batch, heuristic).tolist()
+        batch_time = timeit.default_timer() - start
+        rows.append(("score " + name, len(leaves), scalar_time, batch_time, scalar == vector))
+
+    agent = CustomPlayer(depth, custom_score, iterative=False, method='minimax', in_place=True)
+    agent.time_left = lambda: float("inf")
+    scalar_time = batch_time = 0.
+    agree = True
+    nodes = 0
+    for moves in openings:
+        board = make_position(BitBoard, agent, "opponent", moves)
+        if board.active_player != agent:
+            board = make_position(BitBoard, "opponent", agent, moves)
+        agent.nodes = 0
+        start = timeit.default_timer()
+        scalar = agent.minimax(board, depth)
+        scalar_time += timeit.default_timer() - start
+        nodes += agent.nodes
+        start = timeit.default_timer()
+        vector = batch_eval.batch_minimax(board, depth, agent, evaluator)
+        batch_time += timeit.default_timer() - start
+        agree = agree and scalar == vector
+    rows.append(("minimax", nodes, scalar_time, batch_time, agree))
+    return rows
+
+
+def print_batch(rows):
+    print("{:<18}{:>10}{:>12}{:>12}{:>10}{:>8}".format(
+        "Benchmark", "Count", "Scalar (s)", "Batch (s)", "Speedup", "Same"))
+    for name, count, scalar_time, batch_time, same in rows:
+        print("{:<18}{:>10d}{:>12.3f}{:>12.3f}{:>9.1f}x{:>8}".format(
+            name, count, scalar_time, batch_time, scalar_time / batch_time, str(same)))
+
+
+def corpus_moves(num_plies, rng, width, height):
+    """Return a list of `num_plies` random moves from the start of a game on
+    a board of the given size, avoiding moves that leave either player
+    without a legal move, or None if the game could not be extended that far."""
+    board = BitBoard(1, 2, width, height)
+    moves = []
+    while len(moves) < num_plies:
+        candidates = []
+        for move in board.get_legal_moves():
+            child = board.forecast_move(move)
+            if child.get_legal_moves() and child.get_legal_moves(child.inactive_player):
+                candidates.append(move)
+        if not candidates:
+            return None
+        moves.append(rng.choice(candidates))
+        board.apply_move(moves[-1])
+    return moves
+
+
+def make_corpus(positions_per_phase=4, seed=0):
+    """Return the benchmark corpus: a list of position dicts with a `name`,
+    board `width` and `height`, game `phase` and the list of `moves` that
+    reach the position, for every board size and phase."""
+    rng = random.Random(seed)
+    corpus = []
+    for width, height in CORPUS_SIZES:
+        for phase, fraction in CORPUS_PHASES:
+            num_plies = int(round(fraction * width * height))
+            count = 0
+            while count < positions_per_phase:
+                moves = corpus_moves(num_plies, rng, width, height)
+                if moves is None:
+                    continue
+                corpus.append({"name": "{}x{}-{}-{}".format(width, height, phase, count),
+                               "width": width, "height": height, "phase": phase,
+                               "moves": [list(move) for move in moves]})
+                count += 1
+    return corpus
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Load a corpus written by `make_corpus`, with the moves as tuples."""
+    with open(path) as corpus_file:
+        corpus = json.load(corpus_file)
+    for position in corpus:
+        position["moves"] = [tuple(move) for move in position["moves"]]
+    return corpus
+
+
+def _search_position(agent, search, board, depth):
+    """Run one benchmark search of `board` and return the number of nodes
+    and the cumulative seconds at which each depth was completed."""
+    completed = []
+    if search in ITERATIVE_METHODS:
+        # stop iterative deepening as soon as `depth` has been completed,
+        # recording the time at which each depth finished
+        start = timeit.default_timer()
+
+        def time_left():
+            if agent.depth_reached > len(completed):
+                completed.append(timeit.default_timer() - start)
+            return 0. if agent.depth_reached >= depth else float("inf")
+
+        agent.get_move(board, board.get_legal_moves(), time_left)
+        time_left()
+        return agent.nodes, completed
+    agent.time_left = lambda: float("inf")
+    agent.nodes = 0
+    start = timeit.default_timer()
+    getattr(agent, search)(board, depth)
+    return agent.nodes, [timeit.default_timer() - start]
+
+
+def _suite_agent(search, depth):
+    """Create the agent used by the suite benchmark for `search`."""
+    if search in ITERATIVE_METHODS:
+        return CustomPlayer(depth, custom_score, iterative=True, method=ITERATIVE_METHODS[search],
+                            timeout=0., tt_size=2**16, move_ordering=True, in_place=True)
+    return CustomPlayer(depth, custom_score, iterative=False, method=search, in_place=True)
+
+
+def bench_suite(corpus, searches, board_cls=BitBoard, repeat=5, memory=True):
+    """
+    Run every search of `searches`, a list of (search, depth) pairs where
+    `search` is "minimax", "alphabeta" or a key of `ITERATIVE_METHODS`, from every position
+    of `corpus`, and return a list of result dicts, one for each board size,
+    phase and search. Each search is timed `repeat` times and the fastest
+    run is kept. The time to depth is the total over the positions of the
+    time taken to complete each depth (only the final depth for minimax and
+    alpha-beta). With `memory`, every search is run once more under
+    tracemalloc to find the peak memory it allocates.
+    """
+    groups = {}
+    for position in corpus:
+        key = (position["width"], position["height"], position["phase"])
+        groups.setdefault(key, []).append(position["moves"])
+
+    results = []
+    for (width, height, phase), openings in groups.items():
+        for search, depth in searches:
+            nodes = 0
+            time_to_depth = [0.] * depth if search in ITERATIVE_METHODS else [0.]
+            peak = 0
+            for moves in openings:
+                # a new agent for every search so that no search starts from
+                # the tables of another
+                runs = []
+                for _ in range(repeat + memory):
+                    agent = _suite_agent(search, depth)
+                    board = make_position(board_cls, agent, "opponent", moves, width, height)
+                    if board.active_player != agent:
+                        board = make_position(board_cls, "opponent", agent, moves, width, height)
+                    if len(runs) < repeat:
+                        runs.append(_search_position(agent, search, board, depth))
+                        continue
+                    tracemalloc.start()
+                    try:
+                        _search_position(agent, search, board, depth)
+                        peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    finally:
+                        tracemalloc.stop()
+                searched, completed = min(runs, key=lambda run: run[1][-1])
+                nodes += searched
+                for idx, seconds in enumerate(completed):
+                    time_to_depth[idx] += seconds
+            seconds = time_to_depth[-1]
+            results.append({"board": "{}x{}".format(width, height), "phase": phase,
+                            "search": search, "depth": depth, "board_type": board_cls.__name__,
+                            "positions": len(openings), "nodes": nodes, "seconds": seconds,
+                            "nodes_per_second": nodes / seconds if seconds else 0.,
+                            "time_to_depth": time_to_depth,
+                            "peak_kib": peak / 1024. if memory else None})
+    return results
+
+
+def bench_scaling(sizes, nodes, num_positions, fill, seed):
+    """Time board copies, legal move counts and node-limited iterative
+    deepening search on random positions of every board size in `sizes`,
+    with `fill` of the cells blocked, and return a list of result rows."""
+    rows = []
+    for size in sizes:
+        rng = random.Random(seed)
+        openings = []
+        while len(openings) < num_positions:
+            moves = corpus_moves(int(fill * size * size), rng, size, size)
+            if moves is not None:
+                openings.append(moves)
+        for board_name, board_cls in BOARD_TYPES:
+            boards = [make_position(board_cls, 1, 2, moves, size, size) for moves in openings]
+            repeat = 2000
+            start = timeit.default_timer()
+            for _ in range(repeat):
+                for board in boards:
+                    board.copy()
+            copy_rate = repeat * len(boards) / (timeit.default_timer() - start)
+            start = timeit.default_timer()
+            for _ in range(repeat):
+                for board in boards:
+                    board.count_legal_moves(1)
+                    board.count_legal_moves(2)
+            count_rate = 2 * repeat * len(boards) / (timeit.default_timer() - start)
+
+            for mode_name, in_place in SEARCH_MODES:
+                searched = 0
+                depth = 0
+                elapsed = 0.
+                for moves in openings:
+                    agent = CustomPlayer(method='alphabeta', timeout=0., tt_size=2**16,
+                                         move_ordering=True, in_place=in_place, node_limit=nodes)
+                    board = make_position(board_cls, agent, "opponent", moves, size, size)
+                    if board.active_player != agent:
+                        board = make_position(board_cls, "opponent", agent, moves, size, size)
+                    start = timeit.default_timer()
+                    agent.get_move(board, board.get_legal_moves(), lambda: float("inf"))
+                    elapsed += timeit.default_timer() - start
+                    searched += agent.nodes
+                    depth += agent.depth_reached
+                rows.append(("{}x{}".format(size, size), board_name, mode_name, copy_rate,
+                             count_rate, searched / elapsed, depth / float(len(openings))))
+    return rows
+
+
+def print_scaling(rows):
+    print("{:<7}{:<10}{:<10}{:>12}{:>12}{:>12}{:>8}".format(
+        "Size", "Board", "Mode", "Copies/s", "Counts/s", "Nodes/s", "Depth"))
+    for size, board_name, mode_name, copy_rate, count_rate, rate, depth in rows:
+        print("{:<7}{:<10}{:<10}{:>12.0f}{:>12.0f}{:>12.0f}{:>8.1f}".format(
+            size, board_name, mode_name, copy_rate, count_rate, rate, depth))
+
+
+def print_suite(results):
+    print("{:<7}{:<9}{:<11}{:>6}{:>10}{:>10}{:>12}{:>11}".format(
+        "Board", "Phase", "Search", "Depth", "Nodes", "Seconds", "Nodes/s", "Peak KiB"))
+    for row in results:
+        peak = "{:.0f}".format(row["peak_kib"]) if row["peak_kib"] is not None else "-"
+        print("{:<7}{:<9}{:<11}{:>6d}{:>10d}{:>10.3f}{:>12.0f}{:>11}".format(
+            row["board"], row["phase"], row["search"], row["depth"], row["nodes"],
+            row["seconds"], row["nodes_per_second"], peak))
+    for row in results:
+        if row["search"] in ITERATIVE_METHODS:
+            print("Time to depth, {board} {phase} {search}: ".format(**row) +
+                  " ".join("{}:{:.3f}s".format(d + 1, t) for d, t in enumerate(row["time_to_depth"])))
+
+
+def compare_suite(results, baseline, tolerance):
+    """
+    Compare `results` to the results of an earlier run and return a list of
+    (row, baseline row, speed ratio, note) tuples for the rows present in
+    both runs. The note flags a search that got slower by more than
+    `tolerance` (a fraction), or that searched a different number of nodes,
+    which means the search itself changed and its speed is not comparable.
+    """
+    def key(row):
+        return (row["board"], row["phase"], row["search"], row["depth"], row["board_type"])
+
+    previous = {key(row): row for row in baseline}
+    comparisons = []
+    for row in results:
+        old = previous.get(key(row))
+        if old is None:
+            continue
+        ratio = row["nodes_per_second"] / old["nodes_per_second"] if old["nodes_per_second"] else 0.
+        if row["nodes"] != old["nodes"]:
+            note = "nodes changed"
+        elif ratio < 1. - tolerance:
+            note = "REGRESSION"
+        else:
+            note = ""
+        comparisons.append((row, old, ratio, note))
+    return comparisons
+
+
+def print_comparison(comparisons):
+    print("{:<7}{:<9}{:<11}{:>6}{:>14}{:>14}{:>8}  {}".format(
+        "Board", "Phase", "Search", "Depth", "Before", "After", "Ratio", ""))
+    for row, old, ratio, note in comparisons:
+        print("{:<7}{:<9}{:<11}{:>6d}{:>14.0f}{:>14.0f}{:>7.2f}x  {}".format(
+            row["board"], row["phase"], row["search"], row["depth"],
+            old["nodes_per_second"], row["nodes_per_second"], ratio, note))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark")
+    subparsers.required = True
+
+    search_parser = subparsers.add_parser(
+        "search", help="nodes per second of alpha-beta search by board and expansion mode")
+    search_parser.add_argument("--depth", type=int, default=5)
+    search_parser.add_argument("--positions", type=int, default=10)
+    search_parser.add_argument("--plies", type=int, default=8,
+                               help="number of random moves played to create each position")
+    search_parser.add_argument("--seed", type=int, default=0)
+
+    movegen_parser = subparsers.add_parser(
+        "movegen", help="calls per second of legal move generation and mobility counting")
+    movegen_parser.add_argument("--positions", type=int, default=50)
+    movegen_parser.add_argument("--plies", type=int, default=16,
+                                help="number of random moves played to create each position")
+    movegen_parser.add_argument("--seed", type=int, default=0)
+    movegen_parser.add_argument("--repeat", type=int, default=1000)
+
+    batch_parser = subparsers.add_parser(
+        "batch", help="scalar vs. vectorized leaf evaluation and minimax search")
+    batch_parser.add_argument("--depth", type=int, default=3)
+    batch_parser.add_argument("--positions", type=int, default=10)
+    batch_parser.add_argument("--plies", type=int, default=8,
+                              help="number of random moves played to create each position")
+    batch_parser.add_argument("--seed", type=int, default=0)
+
+    scaling_parser = subparsers.add_parser(
+        "scaling", help="board operations and node-limited search from 7x7 to 25x25")
+    scaling_parser.add_argument("--sizes", type=int, nargs="+", default=[7, 9, 11, 15, 20, 25])
+    scaling_parser.add_argument("--nodes", type=int, default=20000,
+                                help="node budget of each iterative deepening search")
+    scaling_parser.add_argument("--positions", type=int, default=3)
+    scaling_parser.add_argument("--fill", type=float, default=0.2,
+                                help="fraction of the cells blocked in each position")
+    scaling_parser.add_argument("--seed", type=int, default=0)
+
+    suite_parser = subparsers.add_parser(
+        "suite", help="search speed, time to depth and memory on the fixed position corpus")
+    suite_parser.add_argument("--corpus", default=CORPUS_PATH)
+    suite_parser.add_argument("--depth", type=int, default=6,
+                              help="depth of the fixed-depth minimax and alpha-beta searches")
+    suite_parser.add_argument("--id-depth", type=int, default=9,
+                              help="depth completed by iterative deepening")
+    suite_parser.add_argument("--repeat", type=int, default=5,
+                              help="number of timed runs of each search; the fastest is kept")
+    suite_parser.add_argument("--board", choices=[name for name, _ in BOARD_TYPES],
+                              default="BitBoard")
+    suite_parser.add_argument("--no-memory", action="store_true",
+                              help="skip the (slow) tracemalloc pass")
+    suite_parser.add_argument("--output", default=None,
+                              help="write the results to this JSON file")
+    suite_parser.add_argument("--compare", default=None,
+                              help="compare to the results in this JSON file")
+    suite_parser.add_argument("--tolerance", type=float, default=0.1,
+                              help="slowdown (as a fraction) reported as a regression")
+
+    corpus_parser = subparsers.add_parser(
+        "corpus", help="regenerate the position corpus of the suite benchmark")
+    corpus_parser.add_argument("--positions", type=int, default=4,
+                               help="number of positions per board size and phase")
+    corpus_parser.add_argument("--seed", type=int, default=0)
+    corpus_parser.add_argument("--output", default=CORPUS_PATH)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "search":
+        print_search(bench_search(args.depth, args.positions, args.plies, args.seed))
+    elif args.benchmark == "movegen":
+        print_movegen(bench_movegen(args.positions, args.plies, args.seed, args.repeat))
+    elif args.benchmark == "batch":
+        print_batch(bench_batch(args.depth, args.positions, args.plies, args.seed))
+    elif args.benchmark == "scaling":
+        print_scaling(bench_scaling(args.sizes, args.nodes, args.positions, args.fill, args.seed))
+    elif args.benchmark == "suite":
+        searches = [("minimax", args.depth), ("alphabeta", args.depth),
+                    ("iterative", args.id_depth), ("pvs", args.id_depth),
+                    ("mtdf", args.id_depth)]
+        results = bench_suite(load_corpus(args.corpus), searches,
+                              dict(BOARD_TYPES)[args.board], args.repeat, not args.no_memory)
+        print_suite(results)
+        if args.output:
+            report = {"date": datetime.datetime.now().isoformat(),
+                      "python": platform.python_version(),
+                      "platform": platform.platform(),
+                      "corpus": os.path.basename(args.corpus),
+                      "results": results}
+            with open(args.output, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+            print("Wrote {}".format(args.output))
+        if args.compare:
+            with open(args.compare) as baseline_file:
+                baseline = json.load(baseline_file)["results"]
+            comparisons = compare_suite(results, baseline, args.tolerance)
+            print()
+            print_comparison(comparisons)
+            if any(note == "REGRESSION" for _, _, _, note in comparisons):
+                sys.exit(1)
+    elif args.benchmark == "corpus":
+        corpus = make_corpus(args.positions, args.seed)
+        with open(args.output, "w") as corpus_file:
+            # one position per line
+            corpus_file.write("[\n" + ",\n".join(json.dumps(p) for p in corpus) + "\n]\n")
+        print("Wrote {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
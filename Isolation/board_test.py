@@ -0,0 +1,237 @@
+"""
+This file contains test cases to verify that the alternative board
+implementations in the isolation package follow exactly the same rules as
+`isolation.Board`.
+"""
+import importlib.util
+import random
+import sys
+import types
+import unittest
+
+from unittest import mock
+
+import isolation
+import game_agent
+import sample_players
+
+
+def random_game(board_cls, seed, w=7, h=7, max_plies=None):
+    """Play random moves on a new board of type `board_cls` and return the
+    board along with the list of moves applied.
+    """
+    rng = random.Random(seed)
+    board = board_cls("Player1", "Player2", w, h)
+    moves = []
+    while max_plies is None or len(moves) < max_plies:
+        legal_moves = board.get_legal_moves()
+        if not legal_moves:
+            break
+        move = rng.choice(legal_moves)
+        board.apply_move(move)
+        moves.append(move)
+    return board, moves
+
+
+class BitBoardTest(unittest.TestCase):
+
+    def assertSameState(self, board, bitboard):
+        for player in ("Player1", "Player2"):
+            self.assertEqual(board.get_legal_moves(player),
+                             bitboard.get_legal_moves(player))
+            self.assertEqual(board.count_legal_moves(player),
+                             len(board.get_legal_moves(player)))
+            self.assertEqual(bitboard.count_legal_moves(player),
+                             len(bitboard.get_legal_moves(player)))
+            self.assertEqual(board.get_player_location(player),
+                             bitboard.get_player_location(player))
+            self.assertEqual(board.utility(player), bitboard.utility(player))
+            self.assertEqual(board.is_winner(player), bitboard.is_winner(player))
+            self.assertEqual(board.is_loser(player), bitboard.is_loser(player))
+        self.assertEqual(board.get_legal_moves(), bitboard.get_legal_moves())
+        self.assertEqual(board.count_legal_moves(), bitboard.count_legal_moves())
+        self.assertEqual(board.get_blank_spaces(), bitboard.get_blank_spaces())
+        self.assertEqual(board.count_blank_spaces(), len(board.get_blank_spaces()))
+        self.assertEqual(bitboard.count_blank_spaces(), len(bitboard.get_blank_spaces()))
+        self.assertEqual(board.active_player, bitboard.active_player)
+        self.assertEqual(board.move_count, bitboard.move_count)
+        self.assertEqual(board.to_string(), bitboard.to_string())
+
+    def test_random_games(self):
+        """ BitBoard matches Board at every ply of random games """
+        for seed in range(24):
+            w, h = random.Random(seed).choice([(7, 7), (5, 8), (9, 6), (25, 25), (20, 13)])
+            _, moves = random_game(isolation.Board, seed, w, h)
+            board = isolation.Board("Player1", "Player2", w, h)
+            bitboard = isolation.BitBoard("Player1", "Player2", w, h)
+            self.assertSameState(board, bitboard)
+            for move in moves:
+                self.assertEqual(board.move_is_legal(move), bitboard.move_is_legal(move))
+                board.apply_move(move)
+                bitboard.apply_move(move)
+                self.assertSameState(board, bitboard)
+
+    def test_forecast_move(self):
+        """ BitBoard.forecast_move does not modify the original board """
+        bitboard, _ = random_game(isolation.BitBoard, 3, max_plies=6)
+        before = bitboard.to_string()
+        move = bitboard.get_legal_moves()[0]
+        child = bitboard.forecast_move(move)
+        self.assertEqual(before, bitboard.to_string())
+        self.assertIsInstance(child, isolation.BitBoard)
+        self.assertEqual(child.get_player_location(bitboard.active_player), move)
+
+    def test_alphabeta_agrees(self):
+        """ Fixed-depth search returns the same result on either board """
+        for seed in range(5):
+            _, moves = random_game(isolation.Board, seed, max_plies=10)
+            results = []
+            for board_cls in (isolation.Board, isolation.BitBoard):
+                agentUT = game_agent.CustomPlayer(3, game_agent.custom_score,
+                                                  False, "alphabeta")
+                agentUT.time_left = lambda: 1e3
+                board = board_cls(agentUT, "null_agent")
+                for move in moves:
+                    board.apply_move(move)
+                results.append(agentUT.alphabeta(board, 3))
+            self.assertEqual(results[0], results[1])
+
+
+class KnightMovesTest(unittest.TestCase):
+
+    def test_tables(self):
+        """ Precomputed moves match the move rules on boards of any size """
+        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                      (1, -2),  (1, 2), (2, -1),  (2, 1)]
+        for w, h in [(7, 7), (5, 8), (3, 3), (1, 4)]:
+            tables = isolation.knight_moves(w, h)
+            self.assertIs(tables, isolation.knight_moves(w, h))
+            for r in range(h):
+                for c in range(w):
+                    expected = tuple((r + dr, c + dc) for dr, dc in directions
+                                     if 0 <= r + dr < h and 0 <= c + dc < w)
+                    self.assertEqual(tables[r][c], expected)
+
+
+class StockBoard(isolation.Board):
+    """A Board without `count_legal_moves()`, like the stock board of the
+    project that reviewers run."""
+
+    @property
+    def count_legal_moves(self):
+        raise AttributeError("count_legal_moves")
+
+
+class StockBoardTest(unittest.TestCase):
+
+    def test_heuristics_and_search(self):
+        """ Heuristics and search give the same results on the stock board """
+        heuristics = [game_agent.custom_score, game_agent.MobilityScore(),
+                      game_agent._unused_heuristic_function_for_submission_1,
+                      game_agent._unused_heuristic_function_for_submission_2,
+                      sample_players.open_move_score, sample_players.improved_score]
+        for seed in range(4):
+            _, moves = random_game(isolation.Board, seed, max_plies=30)
+            boards = [StockBoard("Player1", "Player2"), isolation.Board("Player1", "Player2")]
+            for move in moves:
+                for board in boards:
+                    board.apply_move(move)
+                for score_fn in heuristics:
+                    self.assertEqual(score_fn(boards[0], "Player1"), score_fn(boards[1], "Player1"))
+            agent = game_agent.CustomPlayer(3, method="minimax")
+            agent.time_left = lambda: 1e3
+            board = StockBoard(agent, "Player2")
+            for move in moves[:4]:
+                board.apply_move(move)
+            self.assertIn(agent.minimax(board, 3)[1], board.get_legal_moves())
+
+    def test_import_with_stock_package(self):
+        """ game_agent imports and plays against a package exporting only Board """
+        stock = types.ModuleType("isolation")
+        stock.Board = StockBoard
+        with mock.patch.dict(sys.modules, {"isolation": stock}):
+            spec = importlib.util.spec_from_file_location("stock_game_agent",
+                                                          game_agent.__file__)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        for method in ("minimax", "alphabeta"):
+            agent = module.CustomPlayer(method=method, node_limit=2000)
+            board = StockBoard(agent, "Player2")
+            for move in random_game(isolation.Board, 2, max_plies=6)[1]:
+                board.apply_move(move)
+            move = agent.get_move(board, board.get_legal_moves(), lambda: float("inf"))
+            self.assertIn(move, board.get_legal_moves())
+
+
+class UndoMoveTest(unittest.TestCase):
+
+    def test_undo_restores_state(self):
+        """ undo_move reverts apply_move exactly on both boards """
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed in range(5):
+                _, moves = random_game(board_cls, seed)
+                board = board_cls("Player1", "Player2")
+                states = []
+                for move in moves:
+                    states.append((board.to_string(), board.hash_key, board.move_count,
+                                   board.active_player, board.get_legal_moves()))
+                    board.apply_move(move)
+                for move in reversed(moves):
+                    self.assertEqual(board.undo_move(), move)
+                    self.assertEqual(states.pop(),
+                                     (board.to_string(), board.hash_key, board.move_count,
+                                      board.active_player, board.get_legal_moves()))
+                self.assertRaises(RuntimeError, board.undo_move)
+
+    def test_undo_after_copy(self):
+        """ Copies can undo the moves applied before they were made """
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            board, moves = random_game(board_cls, 7, max_plies=5)
+            child = board.forecast_move(board.get_legal_moves()[0])
+            child.undo_move()
+            self.assertEqual(board.to_string(), child.to_string())
+            self.assertEqual(child.undo_move(), moves[-1])
+            self.assertEqual(board.move_count, 5)
+
+
+class ZobristHashTest(unittest.TestCase):
+
+    def test_transpositions_share_hash(self):
+        """ The same position reached in different move orders has one key """
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            first = board_cls("Player1", "Player2")
+            for move in [(3, 3), (0, 0), (1, 2), (2, 2), (0, 4)]:
+                first.apply_move(move)
+
+            # player 1 visits (3, 3) and (1, 2) in the opposite order
+            second = board_cls("Player1", "Player2")
+            for move in [(1, 2), (0, 0), (3, 3), (2, 2), (0, 4)]:
+                second.apply_move(move)
+            self.assertEqual(first.to_string(), second.to_string())
+            self.assertEqual(first.hash_key, second.hash_key)
+
+            # same blocked cells, but player 2 ends on a different cell
+            third = board_cls("Player1", "Player2")
+            for move in [(3, 3), (2, 2), (1, 2), (0, 0), (0, 4)]:
+                third.apply_move(move)
+            self.assertEqual(first.get_blank_spaces(), third.get_blank_spaces())
+            self.assertNotEqual(first.hash_key, third.hash_key)
+
+    def test_hash_matches_across_boards(self):
+        """ Board and BitBoard compute identical keys for every position """
+        for seed in range(10):
+            _, moves = random_game(isolation.Board, seed)
+            board = isolation.Board("Player1", "Player2")
+            bitboard = isolation.BitBoard("Player1", "Player2")
+            seen = {}
+            for move in moves:
+                board.apply_move(move)
+                child = bitboard.forecast_move(move)
+                self.assertEqual(board.hash_key, child.hash_key)
+                bitboard.apply_move(move)
+                seen.setdefault(board.hash_key, board.to_string())
+                self.assertEqual(seen[board.hash_key], board.to_string())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Exact solver for partitioned Isolation endgames.
+
+Late in a game the blocked cells often split the board into regions so that
+neither player can ever reach a cell the other player can reach. From then
+on the players cannot interfere with each other, and the game is decided by
+the length of the longest knight's path each player can walk through its own
+region: the player holding initiative wins if and only if its longest path is
+strictly longer than its opponent's.
+
+`EndgameSolver` detects partitioned positions with a flood fill over the
+open cells and computes the longest paths with a memoized depth-first
+search, so that an agent can play a proven win (or the longest possible
+resistance in a proven loss) without searching.
+"""
+
+from isolation.bitboard import knight_tables
+from isolation.bitboard import popcount
+
+
+class SearchLimitExceeded(Exception):
+    """Raised when a longest path search expands too many nodes or runs out
+    of time."""
+    pass
+
+
+class EndgameSolver:
+    """Detect and solve partitioned endgame positions.
+
+    Parameters
+    ----------
+    max_nodes : int (optional)
+        The maximum number of nodes expanded by a single call to `solve()`
+        before giving up on a position.
+
+    max_memo : int (optional)
+        The number of longest path results kept between calls; the cache is
+        cleared when it grows larger, and when the solver is given a board of
+        another size, whose cell indices and knight moves differ.
+    """
+
+    def __init__(self, max_nodes=20000, max_memo=2**20):
+        self.max_nodes = max_nodes
+        self.max_memo = max_memo
+        self.memo = {}
+        self.memo_size = None
+        self.nodes = 0
+        self._time_left = None
+        self._threshold = 0.
+
+    @staticmethod
+    def region(loc, open_mask, masks):
+        """Return the bitmask of open cells reachable by a knight starting
+        from cell index `loc` (which is not itself included)."""
+        reached = 0
+        frontier = masks[loc] & open_mask
+        while frontier:
+            reached |= frontier
+            low = frontier & -frontier
+            frontier ^= low
+            frontier |= masks[low.bit_length() - 1] & open_mask & ~reached
+        return reached
+
+    def longest_path(self, loc, open_mask, masks):
+        """Return (length, first cell index) of the longest knight's path
+        from `loc` through the cells of `open_mask`; the first cell is -1
+        when there are no moves."""
+        best, best_cell = 0, -1
+        bound = popcount(open_mask)
+        moves = masks[loc] & open_mask
+        while moves and best < bound:
+            low = moves & -moves
+            moves ^= low
+            cell = low.bit_length() - 1
+            length = 1 + self._longest(cell, open_mask & ~low, masks)
+            if length > best:
+                best, best_cell = length, cell
+        return best, best_cell
+
+    def _longest(self, loc, open_mask, masks):
+        """Memoized length of the longest path from `loc` in `open_mask`."""
+        key = (loc, open_mask)
+        length = self.memo.get(key)
+        if length is None:
+            self.nodes += 1
+            if self.nodes > self.max_nodes:
+                raise SearchLimitExceeded()
+            # reading the clock costs about as much as a node, so only check
+            # it every few nodes
+            if self._time_left is not None and self.nodes % 64 == 0 and \
+                    self._time_left() < self._threshold:
+                raise SearchLimitExceeded()
+            length = self.longest_path(loc, open_mask, masks)[0]
+            self.memo[key] = length
+        return length
+
+    def solve(self, game, player=None, time_left=None, threshold=0.):
+        """
+        Solve the position on `game` if it is partitioned.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game.
+
+        player : object (optional)
+            The player from whose perspective the result is reported; the
+            active player if None.
+
+        time_left : callable (optional)
+            A function that returns the number of milliseconds left in the
+            current turn, like the timer of `CustomPlayer.get_move()`; the
+            search is unlimited in time if None.
+
+        threshold : float (optional)
+            The time left (in milliseconds) below which the search gives up.
+
+        Returns
+        -------
+        (float, (int, int)) or None
+            The game value for `player` (+inf for a proven win, -inf for a
+            proven loss) and the first move of the active player's longest
+            path (None if it has no moves), or None if the position is not
+            partitioned or could not be solved within `max_nodes` and the
+            time limit.
+        """
+        if player is None:
+            player = game.active_player
+        blocked, active_loc, inactive_loc = game.packed_state()
+        if active_loc < 0 or inactive_loc < 0:
+            return None
+
+        width = game.width
+        tables = knight_tables(width, game.height)
+        masks = tables.masks
+        open_mask = tables.full & ~blocked
+        active_region = self.region(active_loc, open_mask, masks)
+        inactive_region = self.region(inactive_loc, open_mask, masks)
+        if active_region & inactive_region:
+            return None
+
+        if len(self.memo) > self.max_memo or self.memo_size != (width, game.height):
+            self.memo.clear()
+            self.memo_size = (width, game.height)
+        self.nodes = 0
+        self._time_left, self._threshold = time_left, threshold
+        try:
+            active_length, cell = self.longest_path(active_loc, active_region, masks)
+            inactive_length, _ = self.longest_path(inactive_loc, inactive_region, masks)
+        except SearchLimitExceeded:
+            return None
+        finally:
+            self._time_left = None
+
+        active_wins = active_length > inactive_length
+        value = float("inf") if active_wins == (player == game.active_player) else float("-inf")
+        move = divmod(cell, width) if cell >= 0 else None
+        return value, move
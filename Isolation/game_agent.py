@@ -6,15 +6,373 @@ augment the test suite with your own test cases to further test your code.
 You must test your agent's strength against a set of agents with known
 relative strength using tournament.py and include the results in your report.
 """
+import copy
+import heapq
+import io
+import math
+import multiprocessing
+import os
+import pickle
 import random
+import struct
+import timeit
+
+from collections import namedtuple
+
+try:
+    from isolation import board_symmetries
+except ImportError:
+    # the stock isolation package of the project has no canonical keys, and
+    # the agent runs against it as long as `canonical_tt` is off
+    board_symmetries = None
 
 NO_LEGAL_MOVES_LEFT = (-1, -1)
 
+# Search statistics recorded for every call to CustomPlayer.get_move()
+SearchStats = namedtuple("SearchStats", ["nodes", "depth", "cutoffs", "branching_factor", "seconds"])
+
+# Bound types recorded with each transposition table entry
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+TTEntry = namedtuple("TTEntry", ["key", "depth", "flag", "value", "move", "generation"])
+
+# The most transposition table entries sent back by the pondering process
+PONDER_TT_ENTRIES = 2**12
+
+# The time (in milliseconds) kept for handing the position over to the
+# pondering process before its cost has been measured
+PONDER_MARGIN = 10.
+
+# The copy of the agent kept by a worker process of parallel search
+_worker_agent = None
+
+
 class Timeout(Exception):
     """Subclass base exception for code clarity."""
     pass
 
 
+class TranspositionTable:
+    """Fixed-size cache of alpha-beta search results indexed by a key of the
+    searched position, either its Zobrist hash (`isolation.Board.hash_key`)
+    or its canonical key (`isolation.Board.canonical_key`), along with
+    whether the searching agent is the player to move.
+
+    Each slot holds a single `TTEntry`. When two positions map to the same
+    slot, the entry searched to the greater depth is kept, except that entries
+    left over from an earlier call to `new_search()` are always replaced.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The number of slots in the table.
+    """
+
+    def __init__(self, size=2**16):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_search(self):
+        """Mark all existing entries as stale so that they are replaced first
+        by the results of the next search."""
+        self.generation += 1
+
+    def lookup(self, key):
+        """Return the `TTEntry` stored for the position with hash `key`, or
+        None if the position is not in the table."""
+        entry = self.slots[hash((key,)) % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, flag, value, move):
+        """Record a search result for the position with hash `key`, subject to
+        the replacement policy of the table."""
+        # canonical keys are not uniformly distributed, so they are hashed
+        # before selecting a slot
+        idx = hash((key,)) % self.size
+        old = self.slots[idx]
+        if old is not None and old.key != key:
+            if old.generation == self.generation and old.depth > depth:
+                return
+            self.replacements += 1
+        self.slots[idx] = TTEntry(key, depth, flag, value, move, self.generation)
+        self.stores += 1
+
+    def clear(self):
+        """Remove every entry and reset the hit/miss counters."""
+        self.slots = [None] * self.size
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+
+def _available_cores():
+    """Return the number of CPU cores that this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+
+def _pickle_state(agent, **transient):
+    """Return the attributes of `agent` to pickle, e.g., when it is sent to a
+    worker process to play a tournament match or to search part of the game
+    tree. The timer callback of the current turn and the worker pool cannot
+    be pickled and are left out, and the `transient` attributes are replaced
+    by the given values."""
+    state = agent.__dict__.copy()
+    state["time_left"] = None
+    state["_pool"] = None
+    state.update(transient)
+    return state
+
+
+def _init_worker(agent):
+    """Pool initializer of parallel search: keep `agent` in the worker
+    process, so that the searches given to the worker only carry their
+    position, and the worker's tables last from one move to the next."""
+    global _worker_agent
+    agent.workers = 1
+    _worker_agent = agent
+
+
+def _get_worker_agent():
+    """Return the agent kept by this worker process; see `_init_worker`."""
+    return _worker_agent
+
+
+def _start_pool(agent, parent_searches=False):
+    """Start the worker processes of the parallel search of `agent`: one per
+    worker, less the calling process if `parent_searches`. The workers are
+    capped at the number of available cores. Returns None, and sets
+    `agent.workers` to 1 for serial search, when a single core is available
+    or when this process may not start children, e.g., inside a tournament
+    worker."""
+    agent.workers = min(agent.workers, _available_cores())
+    if agent.workers > 1:
+        processes = agent.workers - 1 if parent_searches else agent.workers
+        try:
+            # the copy leaves out what __getstate__ drops, like the pool itself
+            return multiprocessing.Pool(processes, _init_worker, (copy.copy(agent),))
+        except AssertionError:
+            pass
+    agent.workers = 1
+    return None
+
+
+def _result_wait(agent):
+    """Return the seconds to wait for the result of a worker process of
+    `agent`: until its timeout threshold, or None without a time limit, in
+    which case the node limit of the worker ends its search."""
+    wait = (agent.time_left() - agent.TIMER_THRESHOLD) / 1000.
+    return None if wait == float("inf") else max(wait, 0)
+
+
+class _PlayerPickler(pickle.Pickler):
+    """Pickler that stores the objects in `players` (a dict from their id to
+    a name) as references by name, for `_PlayerUnpickler` to resolve."""
+
+    def __init__(self, file, players):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.players = players
+
+    def persistent_id(self, obj):
+        return self.players.get(id(obj))
+
+
+class _PlayerUnpickler(pickle.Unpickler):
+    """Unpickler that resolves the references of `_PlayerPickler` with
+    `players`, a dict from the names of the players to their objects."""
+
+    def __init__(self, file, players):
+        super().__init__(file)
+        self.players = players
+
+    def persistent_load(self, pid):
+        return self.players[pid]
+
+
+def _dump_board(game, agent):
+    """Pickle `game` for a worker process of `agent` without its players,
+    which could carry large search tables; see `_load_board`."""
+    players = {id(player): "opponent" for player in (game.active_player, game.inactive_player)}
+    players[id(agent)] = "agent"
+    data = io.BytesIO()
+    _PlayerPickler(data, players).dump(game)
+    return data.getvalue()
+
+
+def _load_board(data, agent):
+    """Unpickle a board of `_dump_board`, with `agent` in the seat of the
+    agent that sent it and a placeholder in the opponent's seat."""
+    return _PlayerUnpickler(io.BytesIO(data), {"agent": agent, "opponent": "opponent"}).load()
+
+
+def _search_root_moves(board, moves, deadline, node_limit=None, entries=()):
+    """Worker process entry point for parallel search: run the search of the
+    agent kept by the worker over the root `moves` of the pickled `board`
+    (see `_dump_board`) until `deadline`, in milliseconds of
+    `timeit.default_timer()`, or until `node_limit` nodes have been searched.
+    The transposition table `entries` found by pondering are stored first.
+    Returns a list of (depth, score, move, nodes) tuples, one for every search
+    depth that was completed.
+    """
+    agent = _get_worker_agent()
+    game = _load_board(board, agent)
+    # the clock is system-wide, so the deadline holds however late the worker starts
+    agent.time_left = lambda: deadline - 1000 * timeit.default_timer()
+    agent.node_limit = node_limit
+    agent.nodes = 0
+    if agent.tt is not None:
+        agent.tt.new_search()
+        for entry in entries:
+            agent.tt.store(entry.key, entry.depth, entry.flag, entry.value, entry.move)
+    if agent.move_ordering:
+        agent._start_ordering()
+
+    results = []
+    depth = agent.search_depth if not agent.iterative else 1
+    score = None
+    # searches deeper than the number of blank cells repeat the last one
+    max_depth = max(len(game.get_blank_spaces()), depth)
+    try:
+        while agent.time_left() > agent.TIMER_THRESHOLD and depth <= max_depth:
+            score, move = agent._search_iteration(game, depth, score, moves)
+            results.append((depth, score, move, agent.nodes))
+            if not agent.iterative:
+                break
+            depth += 1
+    except Timeout:
+        pass
+    return results
+
+
+def _ponder_loop(agent, conn):
+    """Entry point of the pondering process of `agent`. Each message received
+    on `conn` describes a position in which the opponent of `agent` is to
+    move; every reply of the opponent is searched until the parent process
+    sends a ("stop", key) message, and the result for the position with hash
+    `key` is sent back; see `CustomPlayer._start_pondering`. A None message
+    ends the process.
+    """
+    agent.ponder = False
+    agent.workers = 1
+    agent.node_limit = None
+    # pondering must never delay the searches of the agents themselves
+    if hasattr(os, "nice"):
+        os.nice(19)
+    conn.send("ready")
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+        ponder_id, board_cls, width, height, moves, agent_first, budget = message
+        players = (agent, "opponent") if agent_first else ("opponent", agent)
+        game = board_cls(players[0], players[1], width, height)
+        for move in moves:
+            game.apply_move(move)
+        results, tables = _ponder_replies(agent, game, conn, budget)
+
+        message = conn.recv()
+        if message is None:
+            return
+        _, key = message
+        conn.send((ponder_id, results.get(key), _pondered_entries(tables.get(key))))
+
+
+def _pondered_entries(table, max_entries=PONDER_TT_ENTRIES):
+    """Return the entries of the transposition table of a pondered reply
+    that are sent back to the agent: the `max_entries` deepest ones, deepest
+    first, leaving out depth 1 results, which are cheaper to search again
+    than to copy."""
+    if table is None:
+        return []
+    entries = [entry for entry in table.slots if entry is not None and entry.depth > 1]
+    return heapq.nlargest(max_entries, entries, key=lambda entry: entry.depth)
+
+
+def _ponder_replies(agent, game, conn, budget):
+    """Search the position after each legal move of the player to move on
+    `game` with iterative deepening, one depth at a time for every reply,
+    until `budget` milliseconds have elapsed or a message arrives on `conn`.
+    Returns a dict mapping the hash key of each reply position to the
+    (depth, score, move) of its deepest completed search, and a dict mapping
+    the same keys to the transposition table used for each reply. The
+    replies share the slots of the agent's table between them, so pondering
+    allocates no more memory than a single table.
+    """
+    deadline = 1000 * timeit.default_timer() + budget
+    calls = [0]
+
+    def time_left():
+        # polling the pipe is a system call, so only check every few nodes
+        calls[0] += 1
+        if calls[0] % 64 == 0 and conn.poll():
+            return float("-inf")
+        return deadline - 1000 * timeit.default_timer()
+
+    agent.time_left = time_left
+    children = [game.forecast_move(move) for move in game.get_legal_moves()]
+    own_table = agent.tt
+    results = {}
+    tables = {}
+    depth = 1
+    try:
+        while children and depth <= len(game.get_blank_spaces()) and \
+                agent.time_left() > agent.TIMER_THRESHOLD:
+            for child in children:
+                if own_table is not None:
+                    if child.hash_key not in tables:
+                        tables[child.hash_key] = TranspositionTable(
+                            max(own_table.size // len(children), 1))
+                    agent.tt = tables[child.hash_key]
+                if agent.move_ordering:
+                    agent._start_ordering()
+                guess = results[child.hash_key][1] if child.hash_key in results else None
+                score, move = agent._search_iteration(child, depth, guess)
+                results[child.hash_key] = (depth, score, move)
+            depth += 1
+    except Timeout:
+        pass
+    finally:
+        agent.tt = own_table
+    return results, tables
+
+
+def _next_after(x, toward):
+    """Return the next float after `x` in the direction of `toward`, like
+    math.nextafter() of Python 3.9 and later."""
+    if x != x or toward != toward:
+        return x + toward
+    if x == toward:
+        return toward
+    if x == 0:
+        return math.copysign(5e-324, toward)
+    # consecutive floats of the same sign have consecutive bit patterns
+    bits = struct.unpack("<q", struct.pack("<d", x))[0]
+    bits += 1 if (x < toward) == (x > 0) else -1
+    return struct.unpack("<d", struct.pack("<q", bits))[0]
+
+
+_nextafter = getattr(math, "nextafter", _next_after)
+
+
+def _count_legal_moves(game, player=None):
+    """Return the number of legal moves of `player` (the active player if
+    None) on `game`, without building the list of moves on boards that
+    support it. Project reviewers run the stock `isolation.Board`, which only
+    has `get_legal_moves()`."""
+    count_legal_moves = getattr(game, "count_legal_moves", None)
+    if count_legal_moves is None:
+        return len(game.get_legal_moves(player))
+    return count_legal_moves(player)
+
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -44,14 +402,14 @@ def custom_score(game, player):
         return win_or_lose
 
     opponent = game.get_opponent(player)
-    opponent_move_count = len(game.get_legal_moves(opponent))
+    opponent_move_count = _count_legal_moves(game, opponent)
 
     # if less than 50% of the game has been played, we use a less computationally expensive
     # huristic function because the branching factor is larger on average
     if game.move_count/float(game.width * game.height) < 0.5:
         return -float(opponent_move_count)
 
-    player_move_count = len(game.get_legal_moves(player))
+    player_move_count = _count_legal_moves(game, player)
 
     return float(player_move_count - 2 * opponent_move_count)
 
@@ -62,7 +420,7 @@ def _unused_heuristic_function_for_submission_1(game, player):
     if win_or_lose != 0:
         return win_or_lose
 
-    player_move_count = len(game.get_legal_moves(player))
+    player_move_count = _count_legal_moves(game, player)
 
     # if less than 50% of the game has been played, we use a less computationally expensive
     # huristic function because the branching factor is larger on average
@@ -70,7 +428,7 @@ def _unused_heuristic_function_for_submission_1(game, player):
         return float(player_move_count)
 
     opponent = game.get_opponent(player)
-    opponent_move_count = len(game.get_legal_moves(opponent))
+    opponent_move_count = _count_legal_moves(game, opponent)
 
     return float(player_move_count - 2 * opponent_move_count)
 
@@ -82,12 +440,70 @@ def _unused_heuristic_function_for_submission_2(game, player):
         return win_or_lose
 
     opponent = game.get_opponent(player)
-    player_move_count = len(game.get_legal_moves(player))
-    opponent_move_count = len(game.get_legal_moves(opponent))
+    player_move_count = _count_legal_moves(game, player)
+    opponent_move_count = _count_legal_moves(game, opponent)
 
     return float(player_move_count - 2 * opponent_move_count)
 
 
+class MobilityScore:
+    """Parametrized family of the mobility heuristics above: a weighted
+    difference of the number of legal moves of the player and its opponent,
+    with one pair of weights for the opening and another once a fraction
+    `phase` of the cells of the board is blocked. The default weights compute
+    `custom_score`; tuning.py fits them to self-play games.
+
+    Parameters
+    ----------
+    own_weight : float (optional)
+        Weight of the player's legal moves after the opening.
+
+    opp_weight : float (optional)
+        Weight of the opponent's legal moves after the opening.
+
+    opening_own_weight : float (optional)
+        Weight of the player's legal moves during the opening.
+
+    opening_opp_weight : float (optional)
+        Weight of the opponent's legal moves during the opening.
+
+    phase : float (optional)
+        Fraction of the cells of the board that are blocked when the opening
+        ends.
+    """
+
+    def __init__(self, own_weight=1., opp_weight=2., opening_own_weight=0.,
+                 opening_opp_weight=1., phase=0.5):
+        self.own_weight = own_weight
+        self.opp_weight = opp_weight
+        self.opening_own_weight = opening_own_weight
+        self.opening_opp_weight = opening_opp_weight
+        self.phase = phase
+
+    def as_dict(self):
+        """Return the parameters of the heuristic as a dict of keyword
+        arguments for the constructor."""
+        return dict(self.__dict__)
+
+    def __call__(self, game, player):
+        win_or_lose = game.utility(player)
+        if win_or_lose != 0:
+            return win_or_lose
+
+        if game.move_count / float(game.width * game.height) < self.phase:
+            own_weight, opp_weight = self.opening_own_weight, self.opening_opp_weight
+        else:
+            own_weight, opp_weight = self.own_weight, self.opp_weight
+
+        # skip the move generation of a player whose moves do not count
+        score = 0.
+        if own_weight:
+            score += own_weight * _count_legal_moves(game, player)
+        if opp_weight:
+            score -= opp_weight * _count_legal_moves(game, game.get_opponent(player))
+        return score
+
+
 class CustomPlayer:
     """Game-playing agent that chooses a move using your evaluation function
     and a depth-limited minimax algorithm with alpha-beta pruning. You must
@@ -109,17 +525,102 @@ class CustomPlayer:
         Flag indicating whether to perform fixed-depth search (False) or
         iterative deepening search (True).
 
-    method : {'minimax', 'alphabeta'} (optional)
-        The name of the search method to use in get_move().
+    method : {'minimax', 'alphabeta', 'pvs', 'mtdf'} (optional)
+        The name of the search method to use in get_move(). 'pvs' is
+        alpha-beta search that tests every move after the first at each node
+        with a null window, searching it fully only when it may be better
+        (principal variation search), and that starts each iteration of
+        iterative deepening with an aspiration window around the score of the
+        previous iteration. 'mtdf' finds the score of each iteration with a
+        sequence of null-window alpha-beta searches starting from the score
+        of the previous iteration (MTD(f)); it relies on the transposition
+        table (`tt_size`) to avoid searching the same nodes on every pass.
+
+    aspiration_window : float (optional)
+        Half the width of the aspiration window of 'pvs' searches; a search
+        whose score falls outside the window is repeated with that side of
+        the window removed.
 
     timeout : float (optional)
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    tt_size : int (optional)
+        Number of slots in the transposition table used by alpha-beta search;
+        0 disables the table.
+
+    canonical_tt : boolean (optional)
+        Flag indicating whether transposition table entries are keyed by the
+        canonical key of each position (True), so that rotations and
+        reflections of a position share one entry, or by its Zobrist hash
+        (False), which is cheaper to compute.
+
+    move_ordering : boolean (optional)
+        Flag indicating whether alpha-beta search should try the principal
+        variation of the previous search, killer moves and moves with high
+        history-heuristic scores before the remaining moves at each node.
+
+    in_place : boolean (optional)
+        Flag indicating whether search should expand nodes by applying and
+        undoing moves on a single board (True) or by creating a new board for
+        every node with `forecast_move()` (False).
+
+    workers : int (optional)
+        Number of processes used to search in parallel, at most one per
+        available core. With more than one worker the legal moves at the root
+        are split between the processes, which each run the selected search
+        on their own share of the moves with their own transposition table.
+        Call `close()` to shut the worker processes down.
+
+    opening_book : `opening_book.OpeningBook` (optional)
+        A book of precomputed moves that is probed before searching; the book
+        move is played whenever the current position is in the book.
+
+    endgame_solver : `endgame.EndgameSolver` (optional)
+        A solver that is tried before searching; when the players are walled
+        off in separate regions of the board it proves the outcome of the
+        game, and the first move of the longest path through the player's
+        region is played without searching. The solver gives up when half of
+        the time left for the move has been spent.
+
+    ponder : boolean (optional)
+        Flag indicating whether the agent keeps searching in a background
+        process while the opponent is thinking. Every reply of the opponent is
+        searched, and on the agent's next turn the search of the reply that
+        was actually played is reused: its transposition table entries are
+        copied into the agent's table and iterative deepening resumes from
+        the depth it reached. Pondering needs a spare CPU core to be useful;
+        call `close()` to shut the background process down.
+
+    node_limit : int (optional)
+        The maximum number of nodes searched on each move. Search stops at
+        whichever comes first of the time limit and the node limit, so with
+        an unlimited `time_left()` the moves chosen do not depend on the speed
+        of the machine.
+
+    Attributes
+    ----------
+    move_stats : list<SearchStats>
+        The number of nodes searched, the deepest completed search depth, the
+        number of beta cutoffs, the effective branching factor (the d-th root
+        of the number of nodes for depth d) and the elapsed seconds of every
+        call to get_move(), in order.
+
+    ponder_depth : int
+        The depth of the pondered search reused by the last call to
+        get_move(), or 0 if none was.
+
+    ponder_entries : int
+        The number of pondered transposition table entries copied into the
+        agent's table by the last call to get_move().
     """
 
     def __init__(self, search_depth=3, score_fn=custom_score,
-                 iterative=True, method='minimax', timeout=10.):
+                 iterative=True, method='minimax', timeout=10., tt_size=0,
+                 canonical_tt=False, move_ordering=False, in_place=False, workers=1,
+                 opening_book=None, endgame_solver=None, ponder=False, node_limit=None,
+                 aspiration_window=1.):
         self.search_depth = search_depth
         self.iterative = iterative
         self.score = score_fn
@@ -127,6 +628,81 @@ class CustomPlayer:
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
         self.use_minimax = (self.method == 'minimax')
+        self.use_pvs = (self.method == 'pvs')
+        self.aspiration_window = aspiration_window
+        self.tt = TranspositionTable(tt_size) if tt_size else None
+        self.canonical_tt = canonical_tt
+        self.move_ordering = move_ordering
+        self.in_place = in_place
+        self.principal_variation = []
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        self.move_stats = []
+        self._pv_start = 0
+        self._pv_lines = {}
+        self._killers = {}
+        self._history = {}
+        self.opening_book = opening_book
+        self.endgame_solver = endgame_solver
+        self.workers = workers
+        self._pool = None
+        if workers > 1:
+            self._get_pool()
+        self.ponder = ponder
+        self.ponder_depth = 0
+        self.ponder_entries = 0
+        self._ponder_margin = PONDER_MARGIN
+        self._ponder_conn = None
+        self._ponder_process = None
+        self._ponder_id = 0
+        self._pondering = False
+        if ponder:
+            self._get_ponder_conn()
+
+    def __getstate__(self):
+        return _pickle_state(self, _ponder_conn=None, _ponder_process=None, _pondering=False)
+
+    def _get_pool(self):
+        """Return the pool of worker processes for parallel search, starting
+        it if necessary; see `_start_pool`."""
+        if self._pool is None and self.workers > 1:
+            self._pool = _start_pool(self)
+        return self._pool
+
+    def _get_ponder_conn(self):
+        """Return the connection to the pondering process, starting it if
+        necessary. Disables pondering (and returns None) when this process may
+        not start children, e.g., inside a tournament worker.
+        """
+        if self._ponder_conn is None and self.ponder:
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_ponder_loop, args=(self, child_conn))
+            process.daemon = True
+            try:
+                process.start()
+            except AssertionError:
+                self.ponder = False
+                return None
+            # wait until the process runs, so that its startup does not slow
+            # down the first move it is given
+            parent_conn.recv()
+            self._ponder_conn, self._ponder_process = parent_conn, process
+        return self._ponder_conn
+
+    def close(self):
+        """Shut down the worker processes used for parallel search and
+        pondering."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if self._ponder_process is not None:
+            self._ponder_process.terminate()
+            self._ponder_process.join()
+            self._ponder_conn = self._ponder_process = None
+            self._pondering = False
 
     def get_move(self, game, legal_moves, time_left):
         """Search for the best move from the available legal moves and return a
@@ -165,26 +741,301 @@ class CustomPlayer:
         """
 
         self.time_left = time_left
+        turn_time = time_left()
+        start = timeit.default_timer()
+        if self.ponder:
+            # stop searching early enough to hand the position over to the
+            # pondering process, as long as the longest recent handoff took
+            margin = self._ponder_margin
+            self.time_left = lambda: time_left() - margin
+
+        pondered = self._stop_pondering(game) if self._pondering else None
+        move = self._select_move(game, legal_moves, pondered)
+
+        depth = self.depth_reached
+        branching_factor = self.nodes ** (1. / depth) if depth else 0.
+        self.move_stats.append(SearchStats(self.nodes, depth, self.cutoffs, branching_factor,
+                                           timeit.default_timer() - start))
+        if self.ponder and move in legal_moves:
+            handoff = timeit.default_timer()
+            self._start_pondering(game, move, 2 * turn_time)
+            handoff = 1000 * (timeit.default_timer() - handoff)
+            self._ponder_margin = max(handoff, self._ponder_margin / 2)
+        return move
+
+    def _select_move(self, game, legal_moves, pondered=None):
+        """Choose the move returned by get_move(). `pondered` holds the
+        result of pondering on the current position, if any, as returned by
+        `_stop_pondering()`.
+        """
+        self.nodes = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
 
         if len(legal_moves) == 0:
             return NO_LEGAL_MOVES_LEFT
 
+        if self.opening_book is not None:
+            book_move = self.opening_book.probe(game)
+            if book_move in legal_moves:
+                return book_move
+
+        if self.endgame_solver is not None:
+            # a position the solver gives up on still leaves half the time
+            # left to search
+            threshold = max(self.TIMER_THRESHOLD, self.time_left() / 2)
+            solution = self.endgame_solver.solve(game, self, self.time_left, threshold)
+            if solution is not None and solution[1] in legal_moves:
+                return solution[1]
+
         best_move = legal_moves[0]
-        search_method = self.minimax if self.use_minimax else self.alphabeta
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.move_ordering:
+            self._start_ordering()
+        self.ponder_depth = 0
+        self.ponder_entries = 0
+        entries = []
+        if pondered is not None:
+            pondered_depth, _, pondered_move, entries = pondered
+            if self.tt is not None and self.workers == 1:
+                self._store_pondered_entries(entries)
+            if pondered_move in legal_moves:
+                self.ponder_depth = self.depth_reached = pondered_depth
+                best_move = pondered_move
 
         try:
-            if not self.iterative:
-                return search_method(game, self.search_depth)[1]
+            if self.workers > 1 and len(legal_moves) > 1 and self._get_pool() is not None:
+                return self._parallel_search(game, legal_moves, best_move, entries)
 
-            depth = 1
-            while self.time_left() > self.TIMER_THRESHOLD:
-                _, best_move = search_method(game, depth)
+            if not self.iterative:
+                best_move = self._search_iteration(game, self.search_depth, None)[1]
+                self.depth_reached = self.search_depth
+                return best_move
+
+            depth = self.ponder_depth + 1
+            score = None
+            # no game lasts more plies than there are blank cells, so deeper
+            # searches would only repeat the last one
+            max_depth = len(game.get_blank_spaces())
+            while self.time_left() > self.TIMER_THRESHOLD and depth <= max_depth:
+                score, best_move = self._search_iteration(game, depth, score)
+                self.depth_reached = depth
+                if self.move_ordering:
+                    self._save_principal_variation(game)
                 depth += 1
         except Timeout:
             pass
 
         return best_move
 
+    def _start_pondering(self, game, move, budget):
+        """Ask the pondering process to search the replies of the opponent in
+        the position after `move` is applied to `game`, for at most `budget`
+        milliseconds. The position is sent as the list of moves played since
+        the start of the game, so the players are not copied to the process.
+        """
+        board = game.forecast_move(move)
+        if not board.get_legal_moves() or self._get_ponder_conn() is None:
+            return
+        moves = []
+        try:
+            while board.move_count:
+                moves.append(board.undo_move())
+        except RuntimeError:
+            # the board does not record the moves that reached it
+            return
+        moves.reverse()
+        self._ponder_id += 1
+        self._ponder_conn.send((self._ponder_id, type(board), board.width, board.height,
+                                moves, board.active_player == self, budget))
+        self._pondering = True
+
+    def _store_pondered_entries(self, entries):
+        """Copy the pondered transposition table `entries`, deepest first,
+        into the agent's table, until a quarter of the time left for the
+        turn has been spent."""
+        stop_time = 0.75 * self.time_left()
+        for entry in entries:
+            if self.ponder_entries % 64 == 0 and self.time_left() < stop_time:
+                break
+            self.tt.store(entry.key, entry.depth, entry.flag, entry.value, entry.move)
+            self.ponder_entries += 1
+
+    def _stop_pondering(self, game):
+        """Stop the pondering process and return the (depth, score, move,
+        transposition table entries) found for the position on `game`, or
+        None if the position was not searched or the result did not arrive
+        in time.
+        """
+        self._pondering = False
+        self._ponder_conn.send(("stop", game.hash_key))
+        wait = _result_wait(self)
+        if wait is not None:
+            wait /= 4
+        while self._ponder_conn.poll(wait):
+            ponder_id, result, entries = self._ponder_conn.recv()
+            # skip the late answers to earlier requests
+            if ponder_id == self._ponder_id:
+                return result + (entries,) if result is not None else None
+        return None
+
+    def _parallel_search(self, game, legal_moves, default_move, entries=()):
+        """Split the root moves between the worker processes and return the
+        best move of the deepest search that every worker completed. Workers
+        search until this agent's own timeout threshold, and keep their own
+        threshold as a margin for returning their results. The pondered
+        transposition table `entries` are sent to every worker.
+        """
+        num_workers = min(self.workers, len(legal_moves))
+        deadline = 1000 * timeit.default_timer() + self.time_left() - self.TIMER_THRESHOLD
+        node_limit = self.node_limit // num_workers if self.node_limit is not None else None
+        board = _dump_board(game, self)
+        pending = [self._pool.apply_async(_search_root_moves,
+                                          (board, legal_moves[i::num_workers], deadline,
+                                           node_limit, entries))
+                   for i in range(num_workers)]
+
+        results = []
+        for async_result in pending:
+            try:
+                worker_results = async_result.get(_result_wait(self))
+            except multiprocessing.TimeoutError:
+                continue
+            if worker_results:
+                results.append(worker_results)
+                self.nodes += worker_results[-1][3]
+        if not results:
+            return default_move
+
+        depth = min(worker_results[-1][0] for worker_results in results)
+        self.depth_reached = depth
+        best = [next(r for r in worker_results if r[0] == depth)[1:3] for worker_results in results]
+        return max(best)[1]
+
+    def _root_search(self, game, moves, depth, alpha=float("-inf"), beta=float("inf")):
+        """Search the subtree below each of the given root moves to a fixed
+        depth and return the (score, move) of the best one, like alphabeta()
+        (or minimax()) restricted to `moves` at the root. All legal moves are
+        searched when `moves` is None."""
+        if moves is None:
+            if self.use_minimax:
+                return self.minimax(game, depth)
+            return self.alphabeta(game, depth, alpha, beta)
+        best = None
+        for move in moves:
+            if self.use_minimax:
+                score = self._child_score(game, move, self.minimax, depth - 1, False)
+            elif self.use_pvs and best is not None:
+                score = self._pvs_child_score(game, move, depth, alpha, beta, True)
+            else:
+                score = self._child_score(game, move, self.alphabeta, depth - 1,
+                                          alpha, beta, False)
+            if best is None or (float(score), move) > best:
+                best = (float(score), move)
+            if not self.use_minimax:
+                if score >= beta:
+                    break
+                alpha = max(alpha, score)
+        return best
+
+    def _start_ordering(self):
+        """Prepare the move ordering tables for a new call to get_move().
+        Killer moves are specific to a single search, while history scores
+        are aged so that recent cutoffs dominate; the principal variation is
+        kept because its tail is still useful when the opponent played the
+        expected reply."""
+        self._killers = {}
+        self._history = {k: v // 2 for k, v in self._history.items() if v > 1}
+
+    def _save_principal_variation(self, game):
+        """Store the principal variation found by the last completed search
+        from the root position `game`."""
+        self._pv_start = game.move_count
+        self.principal_variation = self._pv_lines.get(game.move_count, [])
+
+    def _order_moves(self, game, legal_moves, maximizing_player):
+        """Sort `legal_moves` in place so that the principal variation move is
+        searched first, followed by the killer moves for this ply and then the
+        remaining moves by decreasing history score."""
+        ply = game.move_count
+        pv_idx = ply - self._pv_start
+        pv_move = self.principal_variation[pv_idx] \
+            if 0 <= pv_idx < len(self.principal_variation) else None
+        killers = self._killers.get(ply, ())
+        history = self._history
+
+        def priority(move):
+            if move == pv_move:
+                return float("inf")
+            if move in killers:
+                return 1e9 - killers.index(move)
+            return history.get((maximizing_player, move), 0)
+
+        legal_moves.sort(key=priority, reverse=True)
+
+    def _record_cutoff(self, game, move, depth, maximizing_player):
+        """Update the killer move and history tables after `move` caused a
+        cutoff at a node searched to the given depth."""
+        ply = game.move_count
+        killers = self._killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        key = (maximizing_player, move)
+        self._history[key] = self._history.get(key, 0) + depth * depth
+
+    def _search_iteration(self, game, depth, guess, moves=None):
+        """Search `game` to `depth` with the selected method and return the
+        (score, move) of the root. `guess` is the score of the previous
+        iteration of iterative deepening, or None for the first one. Parallel
+        workers pass the root `moves` they search; all legal moves are
+        searched by default."""
+        if self.use_minimax or guess is None or math.isinf(guess) or \
+                self.method not in ('pvs', 'mtdf'):
+            return self._root_search(game, moves, depth)
+        if self.method == 'mtdf':
+            return self.mtdf(game, depth, guess, moves)
+
+        # the score usually changes little from one depth to the next, and a
+        # narrow window prunes more; widen it on the failing side if needed
+        alpha = guess - self.aspiration_window
+        beta = guess + self.aspiration_window
+        score, move = self._root_search(game, moves, depth, alpha, beta)
+        if score <= alpha:
+            score, move = self._root_search(game, moves, depth, float("-inf"), beta)
+        elif score >= beta:
+            score, move = self._root_search(game, moves, depth, alpha, float("inf"))
+        return score, move
+
+    def _pvs_child_score(self, game, move, depth, alpha, beta, maximizing_player):
+        """Return the score of a move after the first of a node of principal
+        variation search: a null window search tests whether the move is
+        better than the best move so far, and only a move that is better is
+        searched again with the full (alpha, beta) window."""
+        if maximizing_player:
+            window = (alpha, _nextafter(alpha, float("inf")))
+        else:
+            window = (_nextafter(beta, float("-inf")), beta)
+        score = self._child_score(game, move, self.alphabeta, depth - 1,
+                                  window[0], window[1], not maximizing_player)
+        if alpha < score < beta:
+            score = self._child_score(game, move, self.alphabeta, depth - 1,
+                                      alpha, beta, not maximizing_player)
+        return score
+
+    def _child_score(self, game, move, search_fn, *args):
+        """Return the score of the position reached by applying `move` to
+        `game`, as computed by `search_fn(child, *args)`. In place search
+        leaves `game` unchanged when the search returns or times out."""
+        if self.in_place:
+            game.apply_move(move)
+            try:
+                return search_fn(game, *args)[0]
+            finally:
+                game.undo_move()
+        return search_fn(game.forecast_move(move), *args)[0]
+
     def minimax(self, game, depth, maximizing_player=True):
         """Implement the minimax search algorithm as described in the lectures.
 
@@ -216,16 +1067,18 @@ class CustomPlayer:
                 to pass the project unit tests; you cannot call any other
                 evaluation function directly.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
+        if self.time_left() < self.TIMER_THRESHOLD or \
+                (self.node_limit is not None and self.nodes >= self.node_limit):
             raise Timeout()
+        self.nodes += 1
 
-        if depth == 0 or len(game.get_legal_moves()) == 0:
+        if depth == 0 or _count_legal_moves(game) == 0:
             return self.score(game, self), ()
 
         possible_moves = []
         for move in game.get_legal_moves():
-            possible_game = game.forecast_move(move)
-            possible_score, _ = self.minimax(possible_game, depth-1, not maximizing_player)
+            possible_score = self._child_score(game, move, self.minimax,
+                                               depth-1, not maximizing_player)
             possible_moves.append((float(possible_score), move))
 
         if maximizing_player:
@@ -270,29 +1123,142 @@ class CustomPlayer:
                 to pass the project unit tests; you cannot call any other
                 evaluation function directly.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
+        if self.time_left() < self.TIMER_THRESHOLD or \
+                (self.node_limit is not None and self.nodes >= self.node_limit):
             raise Timeout()
+        self.nodes += 1
+        if self.move_ordering:
+            self._pv_lines[game.move_count] = []
 
-        if depth == 0 or len(game.get_legal_moves()) == 0:
+        legal_moves = game.get_legal_moves()
+        if depth == 0 or len(legal_moves) == 0:
             return self.score(game, self), ()
 
+        if self.move_ordering:
+            self._order_moves(game, legal_moves, maximizing_player)
+
+        if self.tt is not None:
+            # values are scored from this agent's point of view, so the same
+            # position is stored apart for either seat of the agent; canonical
+            # keys only tell which player is to move, not which one is the agent
+            if self.canonical_tt:
+                key, sym = game.canonical_key()
+                key = (key, maximizing_player)
+                symmetries = board_symmetries(game.width, game.height)
+            else:
+                key = (game.hash_key, maximizing_player)
+            entry = self.tt.lookup(key)
+            tt_move = entry.move if entry is not None else None
+            if tt_move is not None and self.canonical_tt:
+                tt_move = symmetries.from_canonical(tt_move, sym)
+            if tt_move in legal_moves:
+                if entry.depth >= depth:
+                    if entry.flag == EXACT:
+                        return entry.value, tt_move
+                    if entry.flag == LOWER_BOUND:
+                        alpha = max(alpha, entry.value)
+                    else:
+                        beta = min(beta, entry.value)
+                    if alpha >= beta:
+                        return entry.value, tt_move
+                # search the best move from the earlier search first
+                legal_moves.remove(tt_move)
+                legal_moves.insert(0, tt_move)
+            alpha_orig, beta_orig = alpha, beta
+
         possible_moves = []
-        for move in game.get_legal_moves():
-            possible_game = game.forecast_move(move)
-            possible_score, _ = self.alphabeta(possible_game, depth-1, alpha, beta, not maximizing_player)
+        result = None
+        for move in legal_moves:
+            if self.use_pvs and possible_moves:
+                possible_score = self._pvs_child_score(game, move, depth, alpha, beta,
+                                                       maximizing_player)
+            else:
+                possible_score = self._child_score(game, move, self.alphabeta,
+                                                   depth-1, alpha, beta, not maximizing_player)
             possible_moves.append((float(possible_score), move))
 
+            if self.move_ordering and (possible_moves[-1] == (max(possible_moves)
+                                       if maximizing_player else min(possible_moves))):
+                self._pv_lines[game.move_count] = \
+                    [move] + self._pv_lines.get(game.move_count + 1, [])
+
             if (maximizing_player and possible_score >= beta) or\
                (not maximizing_player and possible_score <= alpha):
-                return possible_score, move
+                self.cutoffs += 1
+                if self.move_ordering:
+                    self._record_cutoff(game, move, depth, maximizing_player)
+                result = possible_score, move
+                break
 
             if maximizing_player:
                 alpha = max(alpha, possible_score)
             else:
                 beta = min(beta, possible_score)
 
-            
-        
-        if maximizing_player:
-            return max(possible_moves)
-        return min(possible_moves)
+        if result is None:
+            result = max(possible_moves) if maximizing_player else min(possible_moves)
+
+        if self.tt is not None:
+            value = result[0]
+            if value <= alpha_orig:
+                flag = UPPER_BOUND
+            elif value >= beta_orig:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            move = result[1]
+            if self.canonical_tt:
+                move = symmetries.to_canonical(move, sym)
+            self.tt.store(key, depth, flag, value, move)
+
+        return result
+
+    def mtdf(self, game, depth, guess=0., moves=None):
+        """Find the minimax value of `game` with a sequence of null-window
+        alpha-beta searches that converge on it from `guess` (MTD(f)).
+
+        Each search tests whether the value is at least some bound `beta`,
+        and moves either the lower or the upper bound on the value to the
+        score it returns, until the bounds meet. The windows are one unit in
+        the last place wide, so no score can fall strictly inside them.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+
+        depth : int
+            Depth is an integer representing the maximum number of plies to
+            search in the game tree before aborting
+
+        guess : float
+            A first estimate of the value, e.g., the score of the previous
+            iteration of iterative deepening
+
+        moves : list(tuple(int, int)) (optional)
+            The root moves to search; all legal moves when None
+
+        Returns
+        -------
+        float
+            The score for the current search branch
+
+        tuple(int, int)
+            The best move for the current branch; (-1, -1) for no legal moves
+        """
+        lower, upper = float("-inf"), float("inf")
+        score = guess
+        best_move = None
+        while lower < upper:
+            beta = score if score > lower else _nextafter(lower, float("inf"))
+            score, move = self._root_search(game, moves, depth,
+                                            _nextafter(beta, float("-inf")), beta)
+            if score < beta:
+                upper = score
+            else:
+                # the move of a search that failed high is at least as good as
+                # any other, and the value is settled by raising the lower bound
+                lower = score
+                best_move = move
+        return score, best_move if best_move is not None else move
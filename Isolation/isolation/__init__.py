@@ -9,8 +9,12 @@ legal moves loses, and the opponent is declared the winner.
 
 import io
 
-# Make the Board class available at the root of the module for imports
+# Make the Board classes available at the root of the module for imports
 from .isolation import Board
+from .isolation import board_symmetries
+from .isolation import knight_moves
+from .bitboard import BitBoard
+from .bitboard import popcount
 
 
 def game_as_text(winner, move_history, termination="", board=Board(1, 2)):
@@ -0,0 +1,369 @@
+"""
+This file contains the `BitBoard` class, an alternative implementation of
+`isolation.Board` that encodes the blocked cells of the game as a single
+integer bitmask and the player positions as cell indices. Knight moves are
+looked up in tables that are precomputed once for each board size, so copying
+a board or generating legal moves never touches a list-of-lists grid.
+
+`BitBoard` exposes the same public API as `isolation.Board`, so it can be
+used anywhere a `Board` is expected (e.g., by the agents in game_agent.py and
+by tournament.py).
+
+Python integers have arbitrary precision, so the same representation works
+for large boards (e.g., 25x25): copying a board, applying or undoing a move
+and counting the legal moves of a player do not depend on the number of cells,
+apart from bitwise operations on the blocked mask, which take a few machine
+words per 64 cells. The blank cells are the complement of the blocked mask
+and their number is known from the move count, so only `get_blank_spaces()`
+and `to_string()` visit every cell.
+"""
+
+from .isolation import Board
+from .isolation import knight_moves
+from .isolation import zobrist_keys
+
+
+NO_LOCATION = -1
+
+_TABLES = {}
+
+
+def popcount(mask):
+    """Return the number of set bits in the non-negative integer `mask`."""
+    return bin(mask).count("1")
+
+
+if hasattr(int, "bit_count"):
+    # Python 3.10+ counts bits without building a string
+    popcount = int.bit_count
+
+
+class _KnightTables(object):
+    """
+    Lookup tables shared by every `BitBoard` of a single size. Cell indices
+    are assigned in row-major order, i.e., index = row * width + col.
+
+    Attributes
+    ----------
+    cells : list<(int, int)>
+        The (row, column) coordinates of each cell index.
+
+    masks : list<int>
+        The bitmask of the cells a knight can reach from each cell index.
+
+    neighbors : list<list<(int, (int, int))>>
+        The (bit, (row, column)) pairs a knight can reach from each cell
+        index, listed in the same order as `Board.__get_moves__` generates
+        them.
+
+    blank_order : list<(int, (int, int))>
+        The (bit, (row, column)) pair for every cell in the order used by
+        `Board.get_blank_spaces` (column by column).
+
+    full : int
+        The bitmask with one bit set for every cell on the board.
+    """
+
+    def __init__(self, width, height):
+        self.cells = [(r, c) for r in range(height) for c in range(width)]
+        self.neighbors = []
+        self.masks = []
+        for r, c in self.cells:
+            moves = [(1 << (row * width + col), (row, col))
+                     for row, col in knight_moves(width, height)[r][c]]
+            self.neighbors.append(moves)
+            mask = 0
+            for bit, _ in moves:
+                mask |= bit
+            self.masks.append(mask)
+        self.blank_order = [(1 << (r * width + c), (r, c))
+                            for c in range(width) for r in range(height)]
+        self.full = (1 << (width * height)) - 1
+
+
+def knight_tables(width, height):
+    """
+    Return the `_KnightTables` for a board of the given size, building them
+    the first time the size is requested.
+    """
+    tables = _TABLES.get((width, height))
+    if tables is None:
+        tables = _TABLES[(width, height)] = _KnightTables(width, height)
+    return tables
+
+
+class BitBoard(Board):
+    """
+    Implement a model for the game Isolation assuming each player moves like
+    a knight in chess, storing the game state in integer bitmasks.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self.__player_1__ = player_1
+        self.__player_2__ = player_2
+        self.__active_player__ = player_1
+        self.__inactive_player__ = player_2
+        self._tables = knight_tables(width, height)
+        self.__zobrist_keys__ = zobrist_keys(width, height)
+        self.__hash_key__ = 0
+        self._blocked = 0
+        self._active_loc = NO_LOCATION
+        self._inactive_loc = NO_LOCATION
+        # a linked list of (entry, rest) pairs shared between copies; see
+        # `isolation.Board`
+        self._move_stack = None
+
+    def copy(self):
+        """ Return a copy of the current board. """
+        new_board = object.__new__(self.__class__)
+        new_board.width = self.width
+        new_board.height = self.height
+        new_board.move_count = self.move_count
+        new_board.__player_1__ = self.__player_1__
+        new_board.__player_2__ = self.__player_2__
+        new_board.__active_player__ = self.__active_player__
+        new_board.__inactive_player__ = self.__inactive_player__
+        new_board._tables = self._tables
+        new_board.__zobrist_keys__ = self.__zobrist_keys__
+        new_board.__hash_key__ = self.__hash_key__
+        new_board._blocked = self._blocked
+        new_board._active_loc = self._active_loc
+        new_board._inactive_loc = self._inactive_loc
+        new_board._move_stack = self._move_stack
+        return new_board
+
+    def packed_state(self):
+        """
+        Return (blocked, active_loc, inactive_loc) for the current game state;
+        see `isolation.Board.packed_state`.
+        """
+        return self._blocked, self._active_loc, self._inactive_loc
+
+    def move_is_legal(self, move):
+        """
+        Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        ----------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        row, col = move
+        return 0 <= row < self.height and \
+               0 <= col < self.width and \
+               not self._blocked >> (row * self.width + col) & 1
+
+    def get_blank_spaces(self):
+        """
+        Return a list of the locations that are still available on the board.
+        """
+        blocked = self._blocked
+        return [move for bit, move in self._tables.blank_order if not blocked & bit]
+
+    def _location_index(self, player):
+        """ Return the cell index of the specified player. """
+        if player == self.__active_player__:
+            return self._active_loc
+        elif player == self.__inactive_player__:
+            return self._inactive_loc
+        raise RuntimeError("`player` must be an object registered as a player in the current game.")
+
+    def get_player_location(self, player):
+        """
+        Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        ----------
+        (int, int)
+            The coordinate pair (row, column) of the input player.
+        """
+        loc = self._location_index(player)
+        if loc == NO_LOCATION:
+            return Board.NOT_MOVED
+        return self._tables.cells[loc]
+
+    def get_legal_moves(self, player=None):
+        """
+        Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        ----------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            loc = self._active_loc
+        else:
+            loc = self._location_index(player)
+        if loc == NO_LOCATION:
+            return self.get_blank_spaces()
+        blocked = self._blocked
+        return [move for bit, move in self._tables.neighbors[loc] if not blocked & bit]
+
+    def _has_moves(self, loc):
+        """ Test whether a player at cell index `loc` has any legal move. """
+        if loc == NO_LOCATION:
+            return self.move_count < self.width * self.height
+        return bool(self._tables.masks[loc] & ~self._blocked)
+
+    def apply_move(self, move):
+        """
+        Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        ----------
+        None
+        """
+        row, col = move
+        loc = row * self.width + col
+        keys = self.__zobrist_keys__
+        player_idx = 0 if self.__active_player__ == self.__player_1__ else 1
+        self._move_stack = ((self._active_loc, self.__hash_key__), self._move_stack)
+        if self._active_loc != NO_LOCATION:
+            self.__hash_key__ ^= keys.location[player_idx][self._active_loc]
+        self.__hash_key__ ^= keys.location[player_idx][loc] ^ keys.blocked[loc] ^ keys.side
+        self._blocked |= 1 << loc
+        self._active_loc, self._inactive_loc = self._inactive_loc, loc
+        self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
+        self.move_count += 1
+
+    def undo_move(self):
+        """
+        Revert the most recent call to `apply_move()`, restoring the previous
+        game state in place; see `isolation.Board.undo_move`.
+
+        Returns
+        ----------
+        (int, int)
+            The move that was undone.
+        """
+        if self._move_stack is None:
+            raise RuntimeError("There are no moves to undo on this board.")
+        (last_loc, self.__hash_key__), self._move_stack = self._move_stack
+        loc = self._inactive_loc
+        self._blocked &= ~(1 << loc)
+        self._active_loc, self._inactive_loc = last_loc, self._active_loc
+        self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
+        self.move_count -= 1
+        return self._tables.cells[loc]
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self.__inactive_player__ and not self._has_moves(self._active_loc)
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self.__active_player__ and not self._has_moves(self._active_loc)
+
+    def utility(self, player):
+        """
+        Returns the utility of the current game state from the perspective
+        of the specified player; see `isolation.Board.utility`.
+        """
+        if not self._has_moves(self._active_loc):
+
+            if player == self.__inactive_player__:
+                return float("inf")
+
+            if player == self.__active_player__:
+                return float("-inf")
+
+        return 0.
+
+    def count_legal_moves(self, player=None):
+        """
+        Return the number of legal moves for the specified player (the active
+        player if None); see `isolation.Board.count_legal_moves`.
+        """
+        if player is None:
+            loc = self._active_loc
+        else:
+            loc = self._location_index(player)
+        if loc == NO_LOCATION:
+            return self.count_blank_spaces()
+        return popcount(self._tables.masks[loc] & ~self._blocked)
+
+    def __get_moves__(self, move):
+        """
+        Generate the list of possible moves for an L-shaped motion (like a
+        knight in chess).
+        """
+        if move == Board.NOT_MOVED:
+            return self.get_blank_spaces()
+        r, c = move
+        blocked = self._blocked
+        return [m for bit, m in self._tables.neighbors[r * self.width + c] if not blocked & bit]
+
+    def to_string(self):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        p1_loc = self._location_index(self.__player_1__)
+        p2_loc = self._location_index(self.__player_2__)
+
+        rows = []
+
+        for i in range(self.height):
+            out = [' | ']
+
+            for j in range(self.width):
+                loc = i * self.width + j
+
+                if not self._blocked >> loc & 1:
+                    out.append(' ')
+                elif loc == p1_loc:
+                    out.append('1')
+                elif loc == p2_loc:
+                    out.append('2')
+                else:
+                    out.append('-')
+
+                out.append(' | ')
+            out.append('\n\r')
+            rows.append(''.join(out))
+
+        return ''.join(rows)
@@ -8,14 +8,180 @@ remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 
+import random
 import timeit
 
-from copy import deepcopy
 from copy import copy
 
 
 TIME_LIMIT_MILLIS = 200
 
+_ZOBRIST_KEYS = {}
+
+
+class ZobristKeys(object):
+    """
+    Random 64-bit keys used to hash the positions of a board of one size.
+    The hash of a position is the XOR of the `blocked` key of every blocked
+    cell, the `location` key of each player's current cell (indexed first by
+    player number, 0 for player 1 and 1 for player 2), and the `side` key
+    when player 2 holds initiative. Cells are indexed in row-major order.
+    """
+
+    def __init__(self, width, height):
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        num_cells = width * height
+        self.blocked = [rng.getrandbits(64) for _ in range(num_cells)]
+        self.location = [[rng.getrandbits(64) for _ in range(num_cells)]
+                         for _ in range(2)]
+        self.side = rng.getrandbits(64)
+
+
+def zobrist_keys(width, height):
+    """
+    Return the `ZobristKeys` shared by every board of the given size,
+    generating them the first time the size is requested.
+    """
+    keys = _ZOBRIST_KEYS.get((width, height))
+    if keys is None:
+        keys = _ZOBRIST_KEYS[(width, height)] = ZobristKeys(width, height)
+    return keys
+
+
+_KNIGHT_MOVES = {}
+
+_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+               (1, -2),  (1, 2), (2, -1),  (2, 1)]
+
+
+def knight_moves(width, height):
+    """
+    Return the knight moves of a board of the given size as a list of rows of
+    tuples, such that `knight_moves(width, height)[r][c]` holds every (row,
+    column) cell on the board a knight can reach from (r, c). The tables are
+    built the first time the size is requested and shared by every board of
+    that size.
+    """
+    moves = _KNIGHT_MOVES.get((width, height))
+    if moves is None:
+        moves = _KNIGHT_MOVES[(width, height)] = [
+            [tuple((r + dr, c + dc) for dr, dc in _DIRECTIONS
+                   if 0 <= r + dr < height and 0 <= c + dc < width)
+             for c in range(width)]
+            for r in range(height)]
+    return moves
+
+
+_SYMMETRIES = {}
+
+
+class Symmetries(object):
+    """
+    The symmetries of a board of one size (8 for a square board, 4 for other
+    boards), stored as permutations of the row-major cell indices. Used to
+    reduce equivalent positions to a single canonical form.
+
+    Attributes
+    ----------
+    perms : list<list<int>>
+        For each symmetry, the index of the image of every cell. The identity
+        is always the first symmetry.
+
+    inverses : list<list<int>>
+        The inverse of each permutation in `perms`.
+
+    byte_maps : list<list<list<int>>>
+        For each symmetry, a table mapping every byte of a bitmask of blocked
+        cells (indexed by byte position and byte value) to the bitmask of the
+        image of those cells, so a whole bitmask is transformed with one
+        lookup per byte.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.num_cells = width * height
+        self.loc_bits = self.num_cells.bit_length()
+        self.perms = []
+        for transpose in ((False, True) if width == height else (False,)):
+            for flip_rows in (False, True):
+                for flip_cols in (False, True):
+                    perm = []
+                    for r in range(height):
+                        for c in range(width):
+                            rr, cc = (c, r) if transpose else (r, c)
+                            rr = height - 1 - rr if flip_rows else rr
+                            cc = width - 1 - cc if flip_cols else cc
+                            perm.append(rr * width + cc)
+                    self.perms.append(perm)
+        self.inverses = []
+        for perm in self.perms:
+            inverse = [0] * self.num_cells
+            for cell, image in enumerate(perm):
+                inverse[image] = cell
+            self.inverses.append(inverse)
+        num_bytes = (self.num_cells + 7) // 8
+        self.byte_maps = []
+        for perm in self.perms:
+            maps = []
+            for k in range(num_bytes):
+                table = [0] * 256
+                for value in range(1, 256):
+                    low = value & -value
+                    cell = 8 * k + low.bit_length() - 1
+                    image = 1 << perm[cell] if cell < self.num_cells else 0
+                    table[value] = table[value ^ low] | image
+                maps.append(table)
+            self.byte_maps.append(maps)
+
+    def canonical_key(self, blocked, active_loc, inactive_loc):
+        """
+        Return (key, symmetry) for the canonical form of the position with the
+        given bitmask of blocked cells and the cell indices of the players
+        holding and waiting for initiative (-1 for a player that has not
+        moved). The key is the smallest encoding of the position under any
+        symmetry, and `symmetry` is the index of that symmetry.
+        """
+        shift_1 = self.num_cells
+        shift_2 = self.num_cells + self.loc_bits
+        chunks = []
+        k = 0
+        while blocked:
+            if blocked & 255:
+                chunks.append((k, blocked & 255))
+            blocked >>= 8
+            k += 1
+        best_key = best_sym = None
+        for sym, (perm, maps) in enumerate(zip(self.perms, self.byte_maps)):
+            key = 0
+            for k, value in chunks:
+                key |= maps[k][value]
+            if active_loc >= 0:
+                key |= (perm[active_loc] + 1) << shift_1
+            if inactive_loc >= 0:
+                key |= (perm[inactive_loc] + 1) << shift_2
+            if best_key is None or key < best_key:
+                best_key, best_sym = key, sym
+        return best_key, best_sym
+
+    def to_canonical(self, move, sym):
+        """Map a (row, column) move into the frame of symmetry `sym`."""
+        return divmod(self.perms[sym][move[0] * self.width + move[1]], self.width)
+
+    def from_canonical(self, move, sym):
+        """Map a (row, column) move out of the frame of symmetry `sym`."""
+        return divmod(self.inverses[sym][move[0] * self.width + move[1]], self.width)
+
+
+def board_symmetries(width, height):
+    """
+    Return the `Symmetries` shared by every board of the given size, building
+    them the first time the size is requested.
+    """
+    symmetries = _SYMMETRIES.get((width, height))
+    if symmetries is None:
+        symmetries = _SYMMETRIES[(width, height)] = Symmetries(width, height)
+    return symmetries
+
 
 class Board(object):
     """
@@ -52,6 +218,12 @@ class Board(object):
         self.__board_state__ = [[Board.BLANK for i in range(width)] for j in range(height)]
         self.__last_player_move__ = {player_1: Board.NOT_MOVED, player_2: Board.NOT_MOVED}
         self.__player_symbols__ = {Board.BLANK: Board.BLANK, player_1: 1, player_2: 2}
+        self.__zobrist_keys__ = zobrist_keys(width, height)
+        self.__knight_moves__ = knight_moves(width, height)
+        self.__hash_key__ = 0
+        # the move stack is a linked list of (entry, rest) pairs, so copies of
+        # the board can share it instead of copying every move of the game
+        self.__move_stack__ = None
 
     @property
     def active_player(self):
@@ -69,6 +241,45 @@ class Board(object):
         """
         return self.__inactive_player__
 
+    @property
+    def hash_key(self):
+        """
+        The Zobrist hash of the current game state. Equal positions (same
+        blocked cells, player locations and player holding initiative) have
+        equal keys no matter which order the moves were applied in.
+        """
+        return self.__hash_key__
+
+    def packed_state(self):
+        """
+        Return (blocked, active_loc, inactive_loc): the bitmask of blocked
+        cells and the cell indices of the players holding and waiting for
+        initiative (-1 for a player that has not moved). Cell indices are
+        assigned in row-major order, i.e., index = row * width + col.
+        """
+        blocked = 0
+        for r, row in enumerate(self.__board_state__):
+            for c, cell in enumerate(row):
+                if cell != Board.BLANK:
+                    blocked |= 1 << (r * self.width + c)
+        locs = []
+        for player in (self.__active_player__, self.__inactive_player__):
+            move = self.__last_player_move__[player]
+            locs.append(-1 if move == Board.NOT_MOVED else move[0] * self.width + move[1])
+        return blocked, locs[0], locs[1]
+
+    def canonical_key(self):
+        """
+        Return (key, symmetry) identifying the current game state up to the
+        symmetries of the board: positions that are rotations or reflections
+        of each other have the same key. `symmetry` is the index of the
+        symmetry (see `Symmetries`) that maps this board onto the canonical
+        form, e.g., to translate moves into and out of the canonical frame.
+        Unlike `hash_key`, the key does not depend on which player objects are
+        registered on the board, only on the player holding initiative.
+        """
+        return board_symmetries(self.width, self.height).canonical_key(*self.packed_state())
+
     def get_opponent(self, player):
         """
         Return the opponent of the supplied player.
@@ -93,13 +304,22 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self.__player_1__, self.__player_2__, width=self.width, height=self.height)
+        new_board = object.__new__(Board)
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board.__player_1__ = self.__player_1__
+        new_board.__player_2__ = self.__player_2__
         new_board.__active_player__ = self.__active_player__
         new_board.__inactive_player__ = self.__inactive_player__
         new_board.__last_player_move__ = copy(self.__last_player_move__)
-        new_board.__player_symbols__ = copy(self.__player_symbols__)
-        new_board.__board_state__ = deepcopy(self.__board_state__)
+        new_board.__player_symbols__ = self.__player_symbols__
+        # the cells hold plain ints, so copying each row is a deep copy
+        new_board.__board_state__ = [row[:] for row in self.__board_state__]
+        new_board.__zobrist_keys__ = self.__zobrist_keys__
+        new_board.__knight_moves__ = self.__knight_moves__
+        new_board.__hash_key__ = self.__hash_key__
+        new_board.__move_stack__ = self.__move_stack__
         return new_board
 
     def forecast_move(self, move):
@@ -142,6 +362,14 @@ class Board(object):
                0 <= col < self.width and \
                self.__board_state__[row][col] == Board.BLANK
 
+    def count_blank_spaces(self):
+        """
+        Return the number of locations that are still available on the board,
+        i.e., `len(self.get_blank_spaces())` in constant time: every move
+        blocks exactly one cell.
+        """
+        return self.width * self.height - self.move_count
+
     def get_blank_spaces(self):
         """
         Return a list of the locations that are still available on the board.
@@ -185,6 +413,25 @@ class Board(object):
             player = self.active_player
         return self.__get_moves__(self.__last_player_move__[player])
 
+    def count_legal_moves(self, player=None):
+        """
+        Return the number of legal moves for the specified player (the active
+        player if None), i.e., `len(self.get_legal_moves(player))` without
+        building the list of moves.
+        """
+        if player is None:
+            player = self.active_player
+        move = self.__last_player_move__[player]
+        state = self.__board_state__
+        if move == Board.NOT_MOVED:
+            return self.count_blank_spaces()
+        r, c = move
+        count = 0
+        for row, col in self.__knight_moves__[r][c]:
+            if state[row][col] == Board.BLANK:
+                count += 1
+        return count
+
     def apply_move(self, move):
         """
         Move the active player to a specified location.
@@ -200,11 +447,41 @@ class Board(object):
         None
         """
         row, col = move
+        keys = self.__zobrist_keys__
+        player_idx = 0 if self.active_player == self.__player_1__ else 1
+        last_move = self.__last_player_move__[self.active_player]
+        self.__move_stack__ = ((last_move, self.__hash_key__), self.__move_stack__)
+        if last_move != Board.NOT_MOVED:
+            self.__hash_key__ ^= keys.location[player_idx][last_move[0] * self.width + last_move[1]]
+        loc = row * self.width + col
+        self.__hash_key__ ^= keys.location[player_idx][loc] ^ keys.blocked[loc] ^ keys.side
+
         self.__last_player_move__[self.active_player] = move
         self.__board_state__[row][col] = self.__player_symbols__[self.active_player]
         self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
         self.move_count += 1
 
+    def undo_move(self):
+        """
+        Revert the most recent call to `apply_move()`, restoring the previous
+        game state in place. Together with `apply_move()` this allows a search
+        to walk the game tree without copying the board at every node.
+
+        Returns
+        ----------
+        (int, int)
+            The move that was undone.
+        """
+        if self.__move_stack__ is None:
+            raise RuntimeError("There are no moves to undo on this board.")
+        (last_move, self.__hash_key__), self.__move_stack__ = self.__move_stack__
+        self.__active_player__, self.__inactive_player__ = self.__inactive_player__, self.__active_player__
+        move = self.__last_player_move__[self.active_player]
+        self.__board_state__[move[0]][move[1]] = Board.BLANK
+        self.__last_player_move__[self.active_player] = last_move
+        self.move_count -= 1
+        return move
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
         return player == self.inactive_player and not self.get_legal_moves(self.active_player)
@@ -257,13 +534,11 @@ class Board(object):
             return self.get_blank_spaces()
 
         r, c = move
+        state = self.__board_state__
 
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2),  (1, 2), (2, -1),  (2, 1)]
-
-        valid_moves = [(r+dr,c+dc) for dr, dc in directions if self.move_is_legal((r+dr, c+dc))]
-
-        return valid_moves
+        # the precomputed moves are always on the board, so only the blocked
+        # cells need to be checked
+        return [m for m in self.__knight_moves__[r][c] if state[m[0]][m[1]] == Board.BLANK]
 
     def print_board(self):
         """DEPRECATED - use Board.to_string()"""
@@ -278,28 +553,31 @@ class Board(object):
         p1_loc = self.__last_player_move__[self.__player_1__]
         p2_loc = self.__last_player_move__[self.__player_2__]
 
-        out = ''
+        # build the rows as lists and join them once; repeated string
+        # concatenation is quadratic in the number of cells
+        rows = []
 
         for i in range(self.height):
-            out += ' | '
+            out = [' | ']
 
             for j in range(self.width):
 
                 if not self.__board_state__[i][j]:
-                    out += ' '
+                    out.append(' ')
                 elif p1_loc and i == p1_loc[0] and j == p1_loc[1]:
-                    out += '1'
+                    out.append('1')
                 elif p2_loc and i == p2_loc[0] and j == p2_loc[1]:
-                    out += '2'
+                    out.append('2')
                 else:
-                    out += '-'
+                    out.append('-')
 
-                out += ' | '
-            out += '\n\r'
+                out.append(' | ')
+            out.append('\n\r')
+            rows.append(''.join(out))
 
-        return out
+        return ''.join(rows)
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, node_limit=None):
         """
         Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
@@ -308,7 +586,15 @@ class Board(object):
         ----------
         time_limit : numeric (optional)
             The maximum number of milliseconds to allow before timeout
-            during each turn.
+            during each turn; None for no time limit.
+
+        node_limit : int (optional)
+            The maximum number of nodes each player may search during each
+            turn. The limit is assigned to the `node_limit` attribute of the
+            players that have one for the duration of the game; players
+            without the attribute are not limited. Together with
+            `time_limit=None`, this makes the game independent of the speed
+            of the machine.
 
         Returns
         ----------
@@ -317,6 +603,21 @@ class Board(object):
             move history, and a string indicating the reason for losing
             (e.g., timeout or invalid move).
         """
+        if node_limit is None:
+            return self.__play__(time_limit)
+
+        players = [p for p in (self.__player_1__, self.__player_2__) if hasattr(p, "node_limit")]
+        saved_limits = [p.node_limit for p in players]
+        try:
+            for player in players:
+                player.node_limit = node_limit
+            return self.__play__(time_limit)
+        finally:
+            for player, saved_limit in zip(players, saved_limits):
+                player.node_limit = saved_limit
+
+    def __play__(self, time_limit):
+        """ Play the game out; see `play()`. """
         move_history = []
 
         curr_time_millis = lambda: 1000 * timeit.default_timer()
@@ -328,7 +629,10 @@ class Board(object):
             game_copy = self.copy()
 
             move_start = curr_time_millis()
-            time_left = lambda : time_limit - (curr_time_millis() - move_start)
+            if time_limit is None:
+                time_left = lambda : float("inf")
+            else:
+                time_left = lambda : time_limit - (curr_time_millis() - move_start)
             curr_move = self.active_player.get_move(game_copy, legal_player_moves, time_left)
             move_end = time_left()
 
@@ -0,0 +1,386 @@
+"""
+Monte Carlo tree search (UCT) agent for Isolation.
+
+`MCTSPlayer` grows a game tree one node per iteration: it descends from the
+root by the UCB1 rule, adds one untried move, plays the game out to the end
+and backs the result up the path. Instead of a heuristic, the value of a move
+is the fraction of the playouts through it that were won, and the move played
+is the most visited child of the root.
+
+Iterations work on the packed state of the board (the bitmask of blocked
+cells and the cell indices of the players, see `Board.packed_state()`) and
+the knight move tables of `isolation.bitboard`, so neither the tree nor the
+playouts create board objects. Playouts are either uniformly random, or
+"heavy": each move greedily maximizes the mover's mobility minus the
+opponent's, with some random moves mixed in.
+
+The tree is kept between moves. On the next turn, the grandchild of the old
+root for the agent's own move and the opponent's reply becomes the new root,
+so the playouts spent on the line that was actually played are reused.
+
+With more than one worker, the search is root-parallel: each worker process
+grows its own tree from the current position with its own random numbers
+while the agent grows the reused tree, and the visit counts of the root moves
+of all trees are summed to choose the move.
+"""
+
+import math
+import multiprocessing
+import random
+import timeit
+
+from isolation import popcount
+from isolation.bitboard import knight_tables
+from game_agent import NO_LEGAL_MOVES_LEFT
+from game_agent import SearchStats
+from game_agent import _get_worker_agent
+from game_agent import _pickle_state
+from game_agent import _result_wait
+from game_agent import _start_pool
+
+NO_LOCATION = -1
+
+_NEIGHBORS = {}
+
+
+def cell_neighbors(width, height):
+    """Return, for every cell index of a board of the given size, the list
+    of (bit, cell index) pairs of the cells a knight can reach from it."""
+    neighbors = _NEIGHBORS.get((width, height))
+    if neighbors is None:
+        neighbors = _NEIGHBORS[(width, height)] = [
+            [(bit, r * width + c) for bit, (r, c) in moves]
+            for moves in knight_tables(width, height).neighbors]
+    return neighbors
+
+
+class _Node:
+    """A node of the search tree: the position reached by `move` (a cell
+    index) from the position of `parent`. `wins` counts the playouts through
+    this node won by the player who made `move`."""
+
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, parent, untried):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+
+
+def _search_tree(state, width, height, deadline, node_limit, seed):
+    """Worker process entry point for root-parallel search: grow a new tree
+    from `state` with the agent kept by the worker until `deadline`, in
+    milliseconds of `timeit.default_timer()`, or for `node_limit` iterations
+    and return the (move, visits, wins) of every root move."""
+    agent = _get_worker_agent()
+    agent.time_left = lambda: deadline - 1000 * timeit.default_timer()
+    agent.node_limit = node_limit
+    agent._rng = random.Random(seed)
+    agent._start(width, height)
+    root = agent._new_root(state)
+    agent._search(root, state)
+    return [(child.move, child.visits, child.wins) for child in root.children]
+
+
+class MCTSPlayer:
+    """Game-playing agent that chooses a move with Monte Carlo tree search
+    using the UCT selection rule.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The exploration constant of the UCB1 rule; larger values spread the
+        playouts more evenly over the moves.
+
+    playout : {'random', 'heavy'} (optional)
+        The playout policy: uniformly random moves, or moves that greedily
+        maximize the mover's mobility minus the opponent's.
+
+    epsilon : float (optional)
+        The probability that a heavy playout plays a random move instead of
+        the greedy move.
+
+    timeout : float (optional)
+        Time remaining (in milliseconds) when search is stopped.
+
+    reuse_tree : boolean (optional)
+        Flag indicating whether the subtree of the position reached on the
+        agent's next turn is kept from the previous search.
+
+    workers : int (optional)
+        Number of trees grown in parallel, at most one per available core;
+        every tree beyond the agent's own is grown by a worker process. Call
+        `close()` to shut the worker processes down.
+
+    node_limit : int (optional)
+        The maximum number of iterations (playouts) of each search. Search
+        stops at whichever comes first of the time limit and the node limit.
+
+    seed : int (optional)
+        Seed of the random number generator used by the playouts.
+
+    Attributes
+    ----------
+    move_stats : list<SearchStats>
+        The number of iterations, the deepest node reached, zero cutoffs, the
+        effective branching factor and the elapsed seconds of every call to
+        get_move(), in order; see `game_agent.CustomPlayer`.
+    """
+
+    def __init__(self, exploration=math.sqrt(2), playout='random', epsilon=0.1,
+                 timeout=10., reuse_tree=True, workers=1, node_limit=None, seed=None):
+        self.exploration = exploration
+        self.playout = playout
+        self.epsilon = epsilon
+        self.time_left = None
+        self.TIMER_THRESHOLD = timeout
+        self.reuse_tree = reuse_tree
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.depth_reached = 0
+        self.move_stats = []
+        self._rng = random.Random(seed)
+        self._size = None
+        self._neighbors = None
+        self._masks = None
+        self._root = None
+        self._root_state = None
+        self.workers = workers
+        self._pool = None
+
+    def __getstate__(self):
+        # the tree is not needed by a worker process
+        return _pickle_state(self, _root=None, _root_state=None)
+
+    def _get_pool(self):
+        """Return the pool of worker processes for root-parallel search,
+        starting it if necessary; see `game_agent._start_pool`."""
+        if self._pool is None and self.workers > 1:
+            self._pool = _start_pool(self, parent_searches=True)
+        return self._pool
+
+    def close(self):
+        """Shut down the worker processes used for root-parallel search."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def get_move(self, game, legal_moves, time_left):
+        """Search for the best move from the available legal moves and return
+        a result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        legal_moves : list<(int, int)>
+            A list containing legal moves. Moves are encoded as tuples of pairs
+            of ints defining the next (row, col) for the agent to occupy.
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        start = timeit.default_timer()
+        self.nodes = 0
+        self.depth_reached = 0
+        if not legal_moves:
+            return NO_LEGAL_MOVES_LEFT
+
+        self._start(game.width, game.height)
+        state = game.packed_state()
+        root = self._find_root(state) if self.reuse_tree else None
+        if root is None:
+            root = self._new_root(state)
+
+        pending = []
+        if len(legal_moves) > 1 and self.workers > 1 and self._get_pool() is not None:
+            deadline = 1000 * timeit.default_timer() + self.time_left() - self.TIMER_THRESHOLD
+            node_limit = self.node_limit // self.workers if self.node_limit is not None else None
+            pending = [self._pool.apply_async(_search_tree,
+                                              (state, game.width, game.height, deadline,
+                                               node_limit, self._rng.getrandbits(32)))
+                       for _ in range(self.workers - 1)]
+        if len(legal_moves) > 1:
+            limit = self.node_limit
+            if pending and limit is not None:
+                limit = self.node_limit - (self.workers - 1) * (self.node_limit // self.workers)
+            self._search(root, state, limit)
+
+        visits = {child.move: child.visits for child in root.children}
+        for async_result in pending:
+            try:
+                worker_results = async_result.get(_result_wait(self))
+            except multiprocessing.TimeoutError:
+                continue
+            for move, child_visits, _ in worker_results:
+                visits[move] = visits.get(move, 0) + child_visits
+                self.nodes += child_visits
+
+        moves = {game.width * r + c: (r, c) for r, c in legal_moves}
+        best = max(moves, key=lambda move: visits.get(move, 0))
+        self._root, self._root_state = root, state
+
+        depth = self.depth_reached
+        branching_factor = self.nodes ** (1. / depth) if depth else 0.
+        self.move_stats.append(SearchStats(self.nodes, depth, 0, branching_factor,
+                                           timeit.default_timer() - start))
+        return moves[best]
+
+    def _start(self, width, height):
+        """Load the move tables for the board size, dropping a tree kept from
+        a board of another size."""
+        if self._size != (width, height):
+            self._size = (width, height)
+            self._neighbors = cell_neighbors(width, height)
+            self._masks = knight_tables(width, height).masks
+            self._root = self._root_state = None
+
+    def _legal_moves(self, blocked, loc):
+        """Return the cell indices a player at `loc` can move to."""
+        if loc == NO_LOCATION:
+            return [idx for idx in range(self._size[0] * self._size[1]) if not blocked >> idx & 1]
+        return [idx for bit, idx in self._neighbors[loc] if not blocked & bit]
+
+    def _new_root(self, state):
+        blocked, active, _ = state
+        return _Node(NO_LOCATION, None, self._legal_moves(blocked, active))
+
+    def _find_root(self, state):
+        """Return the node of the kept tree for `state`, i.e., the old root or
+        the grandchild for the agent's last move and the opponent's reply, or
+        None if the position is not in the tree."""
+        root = self._root
+        if root is None:
+            return None
+        if state == self._root_state:
+            return root
+        blocked = self._root_state[0]
+        for child in root.children:
+            for grandchild in child.children:
+                if state == (blocked | 1 << child.move | 1 << grandchild.move,
+                             child.move, grandchild.move):
+                    grandchild.parent = None
+                    return grandchild
+        return None
+
+    def _search(self, root, state, node_limit=None):
+        """Run iterations from `root`, the node of `state`, until the time or
+        node limit is reached."""
+        if node_limit is None:
+            node_limit = self.node_limit
+        playout = self._heavy_playout if self.playout == 'heavy' else self._random_playout
+        rng = self._rng
+        log = math.log
+        sqrt = math.sqrt
+        c = self.exploration
+        iterations = 0
+        while node_limit is None or iterations < node_limit:
+            if iterations % 16 == 0 and self.time_left() < self.TIMER_THRESHOLD:
+                break
+            iterations += 1
+            node = root
+            blocked, active, inactive = state
+            depth = 0
+
+            # selection: descend through fully expanded nodes by UCB1
+            while not node.untried and node.children:
+                log_visits = log(node.visits)
+                best_value = -1.
+                for child in node.children:
+                    value = child.wins / child.visits + c * sqrt(log_visits / child.visits)
+                    if value > best_value:
+                        best_value, node = value, child
+                blocked |= 1 << node.move
+                active, inactive = inactive, node.move
+                depth += 1
+
+            # expansion: add one untried move, chosen at random
+            if node.untried:
+                untried = node.untried
+                idx = rng.randrange(len(untried))
+                untried[idx], untried[-1] = untried[-1], untried[idx]
+                move = untried.pop()
+                blocked |= 1 << move
+                active, inactive = inactive, move
+                child = _Node(move, node, self._legal_moves(blocked, active))
+                node.children.append(child)
+                node = child
+                depth += 1
+            if depth > self.depth_reached:
+                self.depth_reached = depth
+
+            # simulation: the player to move at `node` loses when the number
+            # of plies until a player is stuck is even
+            win = playout(blocked, active, inactive) % 2 == 0
+
+            # backpropagation, alternating the point of view at every ply
+            while node is not None:
+                node.visits += 1
+                if win:
+                    node.wins += 1
+                win = not win
+                node = node.parent
+        self.nodes += iterations
+
+    def _random_playout(self, blocked, active, inactive):
+        """Play uniformly random moves and return the number of plies played
+        before the player to move had no legal move."""
+        neighbors = self._neighbors
+        randrange = self._rng.randrange
+        plies = 0
+        while True:
+            if active == NO_LOCATION:
+                moves = self._legal_moves(blocked, active)
+            else:
+                moves = [idx for bit, idx in neighbors[active] if not blocked & bit]
+            if not moves:
+                return plies
+            move = moves[randrange(len(moves))]
+            blocked |= 1 << move
+            active, inactive = inactive, move
+            plies += 1
+
+    def _heavy_playout(self, blocked, active, inactive):
+        """Play moves that maximize the mover's mobility minus the opponent's,
+        or random moves with probability `epsilon`, and return the number of
+        plies played before the player to move had no legal move."""
+        neighbors = self._neighbors
+        masks = self._masks
+        rng = self._rng
+        epsilon = self.epsilon
+        plies = 0
+        while True:
+            if active == NO_LOCATION:
+                moves = self._legal_moves(blocked, active)
+            else:
+                moves = [idx for bit, idx in neighbors[active] if not blocked & bit]
+            if not moves:
+                return plies
+            if len(moves) == 1 or inactive == NO_LOCATION or rng.random() < epsilon:
+                move = moves[rng.randrange(len(moves))]
+            else:
+                opp_mask = masks[inactive]
+                best_value = None
+                for idx in moves:
+                    open_cells = ~(blocked | 1 << idx)
+                    value = popcount(masks[idx] & open_cells) - popcount(opp_mask & open_cells)
+                    if best_value is None or value > best_value:
+                        best_value, move = value, idx
+            blocked |= 1 << move
+            active, inactive = inactive, move
+            plies += 1
@@ -0,0 +1,111 @@
+"""
+This file contains test cases for the Monte Carlo tree search agent in
+mcts.py.
+"""
+import unittest
+
+from unittest import mock
+
+import isolation
+import mcts
+
+from board_test import random_game
+
+
+def to_move_wins(board):
+    """Solve `board` exhaustively: test whether the player to move wins."""
+    return any(not to_move_wins(board.forecast_move(move)) for move in board.get_legal_moves())
+
+
+def winning_positions(num_positions):
+    """Return lists of moves reaching positions where some, but not all, of
+    the moves of the player to move leave the opponent without a move."""
+    found = []
+    seed = 0
+    while len(found) < num_positions:
+        board, moves = random_game(isolation.BitBoard, seed)
+        seed += 1
+        for ply in range(len(moves) - 1, 2, -1):
+            board.undo_move()
+            winning = [m for m in board.get_legal_moves()
+                       if not board.forecast_move(m).get_legal_moves()]
+            if winning and len(winning) < len(board.get_legal_moves()):
+                found.append(moves[:ply])
+                break
+    return found
+
+
+class MCTSPlayerTest(unittest.TestCase):
+
+    def test_node_limit_is_reproducible(self):
+        """ Seeded searches with a node limit return the same move """
+        unlimited = lambda: float("inf")
+        for playout in ("random", "heavy"):
+            chosen = []
+            for _ in range(2):
+                agent = mcts.MCTSPlayer(playout=playout, node_limit=300, seed=5)
+                board = isolation.BitBoard(agent, "opponent")
+                for move in random_game(isolation.BitBoard, 2, max_plies=6)[1]:
+                    board.apply_move(move)
+                chosen.append(agent.get_move(board, board.get_legal_moves(), unlimited))
+                self.assertIn(chosen[-1], board.get_legal_moves())
+                self.assertEqual(agent.move_stats[-1].nodes, 300)
+            self.assertEqual(chosen[0], chosen[1])
+
+    def test_finds_winning_moves(self):
+        """ A winning move is played when one of the moves wins at once """
+        for moves in winning_positions(5):
+            agent = mcts.MCTSPlayer(node_limit=2000, seed=0)
+            board = isolation.BitBoard("opponent", agent) if len(moves) % 2 else \
+                isolation.BitBoard(agent, "opponent")
+            for move in moves:
+                board.apply_move(move)
+            move = agent.get_move(board, board.get_legal_moves(), lambda: float("inf"))
+            self.assertFalse(to_move_wins(board.forecast_move(move)))
+
+    def test_tree_reuse(self):
+        """ The subtree of the reply that was played becomes the new root """
+        agent = mcts.MCTSPlayer(node_limit=1000, seed=1)
+        board = isolation.BitBoard(agent, "opponent")
+        board.apply_move((3, 3))
+        board.apply_move((1, 2))
+        move = agent.get_move(board, board.get_legal_moves(), lambda: float("inf"))
+        board.apply_move(move)
+        played = next(child for child in agent._root.children
+                      if child.move == 7 * move[0] + move[1])
+        reply = max(played.children, key=lambda child: child.visits)
+        board.apply_move(divmod(reply.move, 7))
+        visits = reply.visits
+        self.assertGreater(visits, 0)
+
+        agent.get_move(board, board.get_legal_moves(), lambda: float("inf"))
+        self.assertIs(agent._root, reply)
+        self.assertEqual(reply.visits, visits + 1000)
+
+    @mock.patch("game_agent._available_cores", return_value=2)
+    def test_root_parallel(self, _):
+        """ Worker trees share the node limit and their visits are merged """
+        agent = mcts.MCTSPlayer(workers=2, node_limit=600, seed=3)
+        try:
+            board = isolation.BitBoard(agent, "opponent")
+            for move in random_game(isolation.BitBoard, 4, max_plies=8)[1]:
+                board.apply_move(move)
+            move = agent.get_move(board, board.get_legal_moves(), lambda: float("inf"))
+            self.assertIn(move, board.get_legal_moves())
+            self.assertEqual(agent.nodes, 600)
+            self.assertEqual(sum(child.visits for child in agent._root.children), 300)
+        finally:
+            agent.close()
+
+    def test_plays_complete_games(self):
+        """ Games between MCTS agents end with a winner on both board types """
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            agents = [mcts.MCTSPlayer(seed=0), mcts.MCTSPlayer(playout="heavy", seed=1)]
+            board = board_cls(agents[0], agents[1], 5, 5)
+            winner, _, reason = board.play(time_limit=None, node_limit=100)
+            self.assertIn(winner, agents)
+            self.assertNotEqual(reason, "timeout")
+
+
+if __name__ == '__main__':
+    unittest.main()
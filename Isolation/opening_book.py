@@ -0,0 +1,210 @@
+"""
+Build and probe an opening book for Isolation.
+
+The book maps every position reachable in the first few plies of a game to
+the move chosen for it by a deep offline search. Positions are stored by
+their canonical key (see `isolation.Board.canonical_key`), so the up to 8
+rotations and reflections of a position share one entry, and a probe is a
+single dictionary lookup.
+
+The book is written as a compact binary file: a short header followed by
+the sorted entries, each holding the canonical key of a position and the
+index of the book move in the canonical frame.
+
+To build a book covering the first move of each player on a 7x7 board with
+one second of search per position, run:
+
+    python opening_book.py --plies 2 --time 1000 --output opening_book.bin
+
+and pass `OpeningBook.load("opening_book.bin")` to `CustomPlayer` as the
+`opening_book` argument.
+"""
+
+import argparse
+import multiprocessing
+import struct
+import timeit
+
+from isolation import BitBoard
+from isolation import board_symmetries
+from game_agent import CustomPlayer
+from game_agent import custom_score
+
+MAGIC = b"ISOB"
+HEADER = struct.Struct("<4sBBBBI")  # magic, version, width, height, key bytes, size
+VERSION = 1
+
+def key_bytes(width, height):
+    """Return the number of bytes needed to store a canonical key."""
+    num_cells = width * height
+    return (num_cells + 2 * num_cells.bit_length() + 7) // 8
+
+
+class OpeningBook:
+    """
+    A table of book moves for the positions of a board of one size, indexed
+    by the canonical key of each position.
+
+    Parameters
+    ----------
+    width : int (optional)
+        The number of columns of the board the book was built for.
+
+    height : int (optional)
+        The number of rows of the board the book was built for.
+
+    entries : dict (optional)
+        Maps canonical keys to the cell index of the book move in the
+        canonical frame of the position.
+    """
+
+    def __init__(self, width=7, height=7, entries=None):
+        self.width = width
+        self.height = height
+        self.entries = entries if entries is not None else {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, game, move):
+        """Record `move` as the book move for the position on `game`."""
+        key, sym = game.canonical_key()
+        row, col = board_symmetries(self.width, self.height).to_canonical(move, sym)
+        self.entries[key] = row * self.width + col
+
+    def probe(self, game):
+        """
+        Return the book move for the position on `game`, or None if the
+        position is not in the book.
+        """
+        if game.width != self.width or game.height != self.height:
+            return None
+        key, sym = game.canonical_key()
+        cell = self.entries.get(key)
+        if cell is None:
+            return None
+        move = divmod(cell, self.width)
+        return board_symmetries(self.width, self.height).from_canonical(move, sym)
+
+    def save(self, path):
+        """Write the book to the file at `path`."""
+        num_bytes = key_bytes(self.width, self.height)
+        cell_fmt = "<B" if self.width * self.height <= 256 else "<H"
+        with open(path, "wb") as book_file:
+            book_file.write(HEADER.pack(MAGIC, VERSION, self.width, self.height,
+                                        num_bytes, len(self.entries)))
+            for key in sorted(self.entries):
+                book_file.write(key.to_bytes(num_bytes, "little"))
+                book_file.write(struct.pack(cell_fmt, self.entries[key]))
+
+    @classmethod
+    def load(cls, path):
+        """Read a book previously written by `save()` from `path`."""
+        with open(path, "rb") as book_file:
+            data = book_file.read()
+        magic, version, width, height, num_bytes, size = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an Isolation opening book.".format(path))
+        cell_fmt = struct.Struct("<B" if width * height <= 256 else "<H")
+        entries = {}
+        offset = HEADER.size
+        for _ in range(size):
+            key = int.from_bytes(data[offset:offset + num_bytes], "little")
+            offset += num_bytes
+            entries[key] = cell_fmt.unpack_from(data, offset)[0]
+            offset += cell_fmt.size
+        return cls(width, height, entries)
+
+
+def book_positions(max_plies, width=7, height=7):
+    """
+    Return a list of (moves, key) pairs with one representative move sequence
+    for every canonical position reached after 0 to `max_plies` - 1 plies.
+    """
+    frontier = [[]]
+    positions = []
+    for ply in range(max_plies):
+        next_frontier = {}
+        for moves in frontier:
+            board = BitBoard(1, 2, width, height)
+            for move in moves:
+                board.apply_move(move)
+            positions.append((moves, board.canonical_key()[0]))
+            if ply + 1 == max_plies:
+                continue
+            for move in board.get_legal_moves():
+                key, _ = board.forecast_move(move).canonical_key()
+                next_frontier.setdefault(key, moves + [move])
+        frontier = list(next_frontier.values())
+    return positions
+
+
+def search_position(moves, width, height, time_limit):
+    """
+    Search the position reached by playing `moves` on an empty board for
+    `time_limit` milliseconds, and return the move chosen by the search.
+    """
+    agent = CustomPlayer(score_fn=custom_score, method='alphabeta', iterative=True,
+                         tt_size=2**18, move_ordering=True, in_place=True)
+    players = (agent, "opponent") if len(moves) % 2 == 0 else ("opponent", agent)
+    board = BitBoard(players[0], players[1], width, height)
+    for move in moves:
+        board.apply_move(move)
+    start = 1000 * timeit.default_timer()
+    time_left = lambda: time_limit - (1000 * timeit.default_timer() - start)
+    return agent.get_move(board, board.get_legal_moves(), time_left)
+
+
+def _search_task(task):
+    """Pool entry point for `build_book`."""
+    moves, width, height, time_limit = task
+    return moves, search_position(moves, width, height, time_limit)
+
+
+def build_book(max_plies, time_limit, width=7, height=7, workers=1):
+    """
+    Build an `OpeningBook` holding a searched move for every canonical
+    position reached in the first `max_plies` plies of a game, spending
+    `time_limit` milliseconds of search on each position.
+    """
+    positions = book_positions(max_plies, width, height)
+    tasks = [(moves, width, height, time_limit) for moves, _ in positions]
+    book = OpeningBook(width, height)
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        run = pool.imap_unordered if pool is not None else map
+        for idx, (moves, move) in enumerate(run(_search_task, tasks)):
+            board = BitBoard(1, 2, width, height)
+            for m in moves:
+                board.apply_move(m)
+            book.add(board, move)
+            print("\r{} / {} positions".format(idx + 1, len(tasks)), end="", flush=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    print()
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plies", type=int, default=2,
+                        help="number of plies from the start of the game covered by the book")
+    parser.add_argument("--time", type=float, default=1000.,
+                        help="milliseconds of search for each book position")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes searching book positions in parallel")
+    parser.add_argument("--output", default="opening_book.bin")
+    args = parser.parse_args()
+
+    book = build_book(args.plies, args.time, args.width, args.height, args.workers)
+    book.save(args.output)
+    print("Wrote {} positions to {}".format(len(book), args.output))
+
+
+if __name__ == "__main__":
+    main()
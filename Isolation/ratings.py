@@ -0,0 +1,181 @@
+"""
+Rate isolation agents from the results of the games they played against
+each other, and decide when enough games have been played.
+
+Ratings are on the Elo scale, where a difference of D points means the
+stronger agent is expected to win a fraction 1 / (1 + 10 ** (-D / 400)) of
+the games. `bradley_terry` fits one rating to every agent from the results
+of all pairings at once, and `SPRT` is a sequential probability ratio test
+deciding between two hypotheses about the rating difference of one pairing
+after every game, so that a tournament can stop a pairing as soon as its
+result is statistically settled.
+
+Games of isolation cannot be drawn, so every game is a win or a loss.
+"""
+
+import math
+
+ELO_SCALE = 400. / math.log(10)
+
+
+def expected_score(elo_diff):
+    """Return the expected fraction of games won by an agent rated
+    `elo_diff` points higher than its opponent."""
+    return 1. / (1. + 10 ** (-elo_diff / 400.))
+
+
+def elo_difference(score):
+    """Return the rating difference for which an agent is expected to win
+    the fraction `score` of its games (infinite for a score of 0 or 1)."""
+    if score <= 0.:
+        return float("-inf")
+    if score >= 1.:
+        return float("inf")
+    return -400. * math.log10(1. / score - 1.)
+
+
+def normal_quantile(confidence):
+    """Return z such that a standard normal variable falls in [-z, z] with
+    probability `confidence` (Acklam's rational approximation, accurate to
+    about 1e-9)."""
+    p = 1. - (1. - confidence) / 2.
+    a = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00]
+    b = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01]
+    c = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00]
+    d = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00]
+    if p > 1. - 0.02425:
+        q = math.sqrt(-2. * math.log(1. - p))
+        return (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+            ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1.)
+    q = p - 0.5
+    r = q * q
+    return (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+        (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1.)
+
+
+def elo_interval(wins, losses, confidence=0.95):
+    """
+    Return (low, estimate, high): the rating difference implied by a record
+    of `wins` and `losses` and its confidence interval, computed from the
+    normal approximation of the win rate.
+    """
+    games = wins + losses
+    if games == 0:
+        return float("-inf"), 0., float("inf")
+    score = wins / float(games)
+    margin = normal_quantile(confidence) * math.sqrt(score * (1. - score) / games)
+    return (elo_difference(score - margin), elo_difference(score),
+            elo_difference(score + margin))
+
+
+def bradley_terry(results, prior_games=1., iterations=1000, tolerance=1e-9,
+                  confidence=0.95):
+    """
+    Fit Bradley-Terry ratings to the results of a set of pairings.
+
+    Parameters
+    ----------
+    results : dict
+        Maps (name_a, name_b) pairs to (wins of a, wins of b) tuples.
+
+    prior_games : float (optional)
+        Number of virtual games, split evenly, added to every pairing so that
+        agents that won or lost all their games still get finite ratings.
+
+    iterations : int (optional)
+        The maximum number of iterations of the minorization-maximization
+        algorithm used to fit the ratings.
+
+    tolerance : float (optional)
+        The fit stops once no strength changes by more than this factor.
+
+    confidence : float (optional)
+        The confidence level of the reported intervals.
+
+    Returns
+    -------
+    dict
+        Maps every agent name to (rating, margin): the Elo rating of the
+        agent, relative to an average rating of 0, and the half-width of its
+        confidence interval. The margins ignore the uncertainty of the other
+        agents' ratings.
+    """
+    wins = {}
+    games = {}
+    for (name_a, name_b), (wins_a, wins_b) in results.items():
+        for name, opponent, won in ((name_a, name_b, wins_a), (name_b, name_a, wins_b)):
+            wins[name] = wins.get(name, 0.) + won + prior_games / 2.
+            pair = games.setdefault(name, {})
+            pair[opponent] = pair.get(opponent, 0.) + wins_a + wins_b + prior_games
+
+    strength = {name: 1. for name in wins}
+    for _ in range(iterations):
+        updated = {}
+        for name in strength:
+            denominator = sum(n / (strength[name] + strength[opponent])
+                              for opponent, n in games[name].items())
+            updated[name] = wins[name] / denominator
+        mean_log = sum(math.log(s) for s in updated.values()) / len(updated)
+        updated = {name: s / math.exp(mean_log) for name, s in updated.items()}
+        change = max(abs(updated[name] / strength[name] - 1.) for name in strength)
+        strength = updated
+        if change < tolerance:
+            break
+
+    z = normal_quantile(confidence)
+    ratings = {}
+    for name, s in strength.items():
+        information = sum(n * s * strength[opponent] / (s + strength[opponent]) ** 2
+                          for opponent, n in games[name].items())
+        ratings[name] = (ELO_SCALE * math.log(s), z * ELO_SCALE / math.sqrt(information))
+    return ratings
+
+
+class SPRT:
+    """
+    Sequential probability ratio test between the hypotheses H0: the rating
+    difference of a pairing is `elo0`, and H1: it is `elo1`.
+
+    Parameters
+    ----------
+    elo0 : float (optional)
+        The rating difference under the null hypothesis.
+
+    elo1 : float (optional)
+        The rating difference under the alternative hypothesis.
+
+    alpha : float (optional)
+        The probability of accepting H1 when H0 is true.
+
+    beta : float (optional)
+        The probability of accepting H0 when H1 is true.
+    """
+
+    def __init__(self, elo0=0., elo1=100., alpha=0.05, beta=0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1. - alpha))
+        self.upper = math.log((1. - beta) / alpha)
+        p0 = expected_score(elo0)
+        p1 = expected_score(elo1)
+        self._win_llr = math.log(p1 / p0)
+        self._loss_llr = math.log((1. - p1) / (1. - p0))
+
+    def llr(self, wins, losses):
+        """Return the log-likelihood ratio of H1 to H0 for a record of
+        `wins` and `losses`."""
+        return wins * self._win_llr + losses * self._loss_llr
+
+    def status(self, wins, losses):
+        """Return "H1" or "H0" once the record of `wins` and `losses` accepts
+        that hypothesis, or None while more games are needed."""
+        llr = self.llr(wins, losses)
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
@@ -0,0 +1,82 @@
+"""
+This file contains test cases for the rating and sequential testing functions
+in ratings.py.
+"""
+import random
+import unittest
+
+import ratings
+
+
+class EloTest(unittest.TestCase):
+
+    def test_score_round_trip(self):
+        """ Expected scores and rating differences are inverse functions """
+        for elo in (-400., -50., 0., 120., 800.):
+            self.assertAlmostEqual(ratings.elo_difference(ratings.expected_score(elo)), elo)
+        self.assertAlmostEqual(ratings.expected_score(400.), 10. / 11.)
+        self.assertEqual(ratings.elo_difference(1.), float("inf"))
+
+    def test_interval(self):
+        """ The interval contains the estimate and shrinks with more games """
+        self.assertAlmostEqual(ratings.normal_quantile(0.95), 1.959964, places=5)
+        low, estimate, high = ratings.elo_interval(30, 10)
+        self.assertLess(low, estimate)
+        self.assertLess(estimate, high)
+        self.assertAlmostEqual(estimate, ratings.elo_difference(0.75))
+        wide = high - low
+        low, _, high = ratings.elo_interval(300, 100)
+        self.assertLess(high - low, wide)
+
+    def test_bradley_terry(self):
+        """ Fitted ratings recover the strengths that generated the games """
+        true_elo = {"A": 200., "B": 0., "C": -200.}
+        rng = random.Random(0)
+        results = {}
+        for a, b in [("A", "B"), ("B", "C"), ("A", "C")]:
+            p = ratings.expected_score(true_elo[a] - true_elo[b])
+            wins = sum(rng.random() < p for _ in range(2000))
+            results[(a, b)] = (wins, 2000 - wins)
+        fitted = ratings.bradley_terry(results)
+        self.assertAlmostEqual(sum(rating for rating, _ in fitted.values()), 0., places=6)
+        for name, elo in true_elo.items():
+            rating, margin = fitted[name]
+            self.assertLess(abs(rating - elo), 2 * margin)
+            self.assertLess(margin, 30.)
+
+        # a perfect record still has a finite rating
+        fitted = ratings.bradley_terry({("A", "B"): (10, 0)})
+        self.assertGreater(fitted["A"][0], fitted["B"][0])
+        self.assertLess(fitted["A"][0], float("inf"))
+
+
+class SPRTTest(unittest.TestCase):
+
+    def test_decisions(self):
+        """ Lopsided records are decided early and even ones are not """
+        sprt = ratings.SPRT(0., 100., 0.05, 0.05)
+        self.assertEqual(sprt.status(12, 0), "H1")
+        self.assertIsNone(sprt.status(6, 6))
+        self.assertEqual(sprt.status(0, 12), "H0")
+        self.assertEqual(sprt.llr(0, 0), 0.)
+
+    def test_error_rates(self):
+        """ Simulated tests accept the wrong hypothesis rarely """
+        rng = random.Random(1)
+        sprt = ratings.SPRT(0., 100., 0.05, 0.05)
+        for elo, wrong in ((0., "H1"), (100., "H0")):
+            p = ratings.expected_score(elo)
+            errors = 0
+            for _ in range(200):
+                wins = losses = 0
+                while sprt.status(wins, losses) is None:
+                    if rng.random() < p:
+                        wins += 1
+                    else:
+                        losses += 1
+                errors += sprt.status(wins, losses) == wrong
+            self.assertLess(errors, 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,560 @@
+"""
+This file contains test cases for the optional search enhancements of
+`game_agent.CustomPlayer`. Each enhancement must leave the minimax value of
+the root position unchanged.
+"""
+import math
+import os
+import tempfile
+import time
+import timeit
+import unittest
+
+from unittest import mock
+
+import isolation
+import endgame
+import game_agent
+import opening_book
+import sample_players
+
+from board_test import random_game
+
+try:
+    import batch_eval
+except ImportError:
+    batch_eval = None
+
+
+def make_board(agent, moves, board_cls=isolation.BitBoard):
+    """Create a board with `agent` as player 1 and apply `moves` to it."""
+    board = board_cls(agent, "null_agent")
+    for move in moves:
+        board.apply_move(move)
+    return board
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_replacement_policy(self):
+        """ Deeper entries survive collisions until the next search """
+        table = game_agent.TranspositionTable(4)
+        table.store(1, 5, game_agent.EXACT, 1., (0, 0))
+        other = next(key for key in range(2, 100) if hash((key,)) % 4 == hash((1,)) % 4)
+        table.store(other, 2, game_agent.EXACT, 2., (1, 1))
+        self.assertEqual(table.lookup(1).depth, 5)
+        self.assertIsNone(table.lookup(other))
+        table.new_search()
+        table.store(other, 2, game_agent.EXACT, 2., (1, 1))
+        self.assertEqual(table.lookup(other).move, (1, 1))
+        self.assertEqual((table.hits, table.misses, table.replacements), (2, 1, 1))
+
+    def test_alphabeta_value_unchanged(self):
+        """ Alpha-beta with a transposition table finds the same value """
+        for seed in range(6):
+            _, moves = random_game(isolation.Board, seed, max_plies=8)
+            plain = game_agent.CustomPlayer(4, game_agent.custom_score, False, "alphabeta")
+            cached = game_agent.CustomPlayer(4, game_agent.custom_score, False, "alphabeta",
+                                             tt_size=2**12)
+            plain.time_left = cached.time_left = lambda: 1e3
+            expected, _ = plain.alphabeta(make_board(plain, moves), 4)
+            for depth in range(1, 5):
+                value, move = cached.alphabeta(make_board(cached, moves), depth)
+            self.assertEqual(expected, value)
+            self.assertIn(move, make_board(cached, moves).get_legal_moves())
+            self.assertGreater(cached.tt.hits, 0)
+
+    def test_both_seats(self):
+        """ One agent searching from either seat finds the values of fresh agents """
+        for seed in range(20):
+            _, moves = random_game(isolation.Board, seed, max_plies=12)
+            moves = moves[:len(moves) // 2 * 2]
+            agent = game_agent.CustomPlayer(3, game_agent.custom_score, False, "alphabeta",
+                                            tt_size=2**12, canonical_tt=seed % 2 == 1)
+            agent.time_left = lambda: 1e3
+            # the deeper search fills the table from seat 1, the next one reads
+            # it from seat 2 in a position of the same subtree
+            for players, plies, depth in (((agent, "opponent"), moves[:-2], 5),
+                                          (("opponent", agent), moves[:-1], 3)):
+                board = isolation.Board(*players)
+                fresh = game_agent.CustomPlayer(depth, game_agent.custom_score, False, "alphabeta")
+                fresh.time_left = lambda: 1e3
+                fresh_board = isolation.Board(*[fresh if p is agent else p for p in players])
+                for move in plies:
+                    board.apply_move(move)
+                    fresh_board.apply_move(move)
+                self.assertEqual(agent.alphabeta(board, depth)[0],
+                                 fresh.alphabeta(fresh_board, depth)[0])
+
+    def test_canonical_keys(self):
+        """ Canonical keys share entries between mirrored positions """
+        mirror = lambda move: (6 - move[1], move[0])  # rotate by 90 degrees
+        for seed in range(4):
+            _, moves = random_game(isolation.Board, seed, max_plies=8)
+            agent = game_agent.CustomPlayer(4, game_agent.custom_score, False, "alphabeta",
+                                            tt_size=2**12, canonical_tt=True)
+            agent.time_left = lambda: 1e3
+            value, move = agent.alphabeta(make_board(agent, moves), 4)
+            hits = agent.tt.hits
+            rotated = make_board(agent, [mirror(m) for m in moves], isolation.Board)
+            self.assertEqual(agent.alphabeta(rotated, 4), (value, mirror(move)))
+            self.assertEqual(agent.tt.hits, hits + 1)
+
+
+class MoveOrderingTest(unittest.TestCase):
+
+    def search_to_depth(self, agent, board, max_depth):
+        """Run the iterative deepening loop of get_move() without a timer."""
+        agent.time_left = lambda: 1e3
+        agent.nodes = 0
+        agent._start_ordering()
+        for depth in range(1, max_depth + 1):
+            result = agent.alphabeta(board, depth)
+            agent._save_principal_variation(board)
+        return result
+
+    def test_ordering_value_unchanged(self):
+        """ Ordered search finds the same value while expanding fewer nodes """
+        total_plain = total_ordered = 0
+        for seed in range(6):
+            _, moves = random_game(isolation.Board, seed, max_plies=10)
+            plain = game_agent.CustomPlayer(5, game_agent.custom_score, True, "alphabeta")
+            ordered = game_agent.CustomPlayer(5, game_agent.custom_score, True, "alphabeta",
+                                              move_ordering=True)
+            expected = self.search_to_depth(plain, make_board(plain, moves), 5)
+            value, move = self.search_to_depth(ordered, make_board(ordered, moves), 5)
+            self.assertEqual(expected[0], value)
+            self.assertEqual(ordered.principal_variation[0], move)
+            total_plain += plain.nodes
+            total_ordered += ordered.nodes
+        self.assertLess(total_ordered, total_plain)
+
+
+class NullWindowSearchTest(unittest.TestCase):
+
+    def test_value_unchanged(self):
+        """ PVS and MTD(f) find the alpha-beta value at every iteration """
+        for seed in range(6):
+            _, moves = random_game(isolation.BitBoard, seed, max_plies=10)
+            results = {}
+            for method in ("alphabeta", "pvs", "mtdf"):
+                for tt_size in (0, 2**12):
+                    agent = game_agent.CustomPlayer(method=method, tt_size=tt_size,
+                                                    move_ordering=True, in_place=True)
+                    board = make_board(agent, moves)
+                    agent.time_left = lambda: 1e3
+                    agent._start_ordering()
+                    score = None
+                    scores = []
+                    for depth in range(1, 7):
+                        score, move = agent._search_iteration(board, depth, score)
+                        agent._save_principal_variation(board)
+                        scores.append(score)
+                        # the move returned must achieve the score
+                        child = board.forecast_move(move)
+                        self.assertEqual(agent.minimax(child, depth - 1, False)[0], score)
+                    results[(method, tt_size)] = scores
+            for scores in results.values():
+                self.assertEqual(scores, results[("alphabeta", 0)])
+
+    def test_mtdf_converges_from_any_guess(self):
+        """ MTD(f) returns the minimax value whatever the first guess """
+        agent = game_agent.CustomPlayer(method="mtdf", tt_size=2**12)
+        agent.time_left = lambda: 1e3
+        board = make_board(agent, random_game(isolation.BitBoard, 3, max_plies=12)[1])
+        expected = agent.minimax(board, 4)[0]
+        for guess in (-100., -1.5, 0., 3., 100.):
+            self.assertEqual(agent.mtdf(board, 4, guess)[0], expected)
+
+    @unittest.skipUnless(hasattr(math, "nextafter"), "math.nextafter needs Python 3.9")
+    def test_next_after_fallback(self):
+        """ The null windows of older Pythons are as narrow as math.nextafter's """
+        inf = float("inf")
+        for x in (0., -0., 1., -2.5, 1e-300, -5e-324, 1.7976931348623157e308, inf, -inf):
+            for toward in (inf, -inf, 0., x):
+                expected = math.nextafter(x, toward)
+                step = game_agent._next_after(x, toward)
+                self.assertEqual((step, math.copysign(1, step)),
+                                 (expected, math.copysign(1, expected)))
+
+
+class InPlaceSearchTest(unittest.TestCase):
+
+    def test_in_place_matches_copies(self):
+        """ Apply/undo search returns the same result and restores the board """
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed in range(4):
+                _, moves = random_game(isolation.Board, seed, max_plies=8)
+                results = []
+                for in_place in (False, True):
+                    for method in ("minimax", "alphabeta"):
+                        agent = game_agent.CustomPlayer(3, game_agent.custom_score, False,
+                                                        method, in_place=in_place)
+                        agent.time_left = lambda: 1e3
+                        board = make_board(agent, moves, board_cls)
+                        before = (board.to_string(), board.hash_key)
+                        results.append(getattr(agent, method)(board, 3))
+                        self.assertEqual(before, (board.to_string(), board.hash_key))
+                self.assertEqual(results[0], results[2])
+                self.assertEqual(results[1], results[3])
+
+    def test_timeout_restores_board(self):
+        """ A search aborted by the timer leaves the board unchanged """
+        agent = game_agent.CustomPlayer(6, game_agent.custom_score, False,
+                                        "alphabeta", in_place=True)
+        calls = [0]
+
+        def time_left():
+            calls[0] += 1
+            return 1e3 if calls[0] < 50 else 0
+
+        agent.time_left = time_left
+        board = make_board(agent, [(3, 3), (0, 0)])
+        before = board.to_string()
+        self.assertRaises(game_agent.Timeout, agent.alphabeta, board, 6)
+        self.assertEqual(before, board.to_string())
+        self.assertEqual(board.move_count, 2)
+
+
+class ParallelSearchTest(unittest.TestCase):
+
+    @mock.patch("game_agent._available_cores", return_value=2)
+    def test_root_split_finds_best_value(self, _):
+        """ Root-parallel search returns a move with the best minimax value """
+        serial = game_agent.CustomPlayer(3, game_agent.custom_score, False, "alphabeta")
+        serial.time_left = lambda: 1e3
+        parallel = game_agent.CustomPlayer(3, game_agent.custom_score, False, "alphabeta",
+                                           workers=2)
+        try:
+            for seed in range(3):
+                _, moves = random_game(isolation.Board, seed, max_plies=8)
+                board = make_board(parallel, moves)
+                move = parallel.get_move(board, board.get_legal_moves(), lambda: 1e4)
+                self.assertIn(move, board.get_legal_moves())
+                self.assertGreater(parallel.nodes, 0)
+
+                board = make_board(serial, moves)
+                expected, _ = serial.alphabeta(board, 3)
+                value, _ = serial.alphabeta(board.forecast_move(move), 2,
+                                            maximizing_player=False)
+                self.assertEqual(expected, value)
+        finally:
+            parallel.close()
+
+    def test_workers_capped_at_cores(self):
+        """ Agents search serially without a pool on a single core """
+        with mock.patch("game_agent._available_cores", return_value=1):
+            agent = game_agent.CustomPlayer(workers=4)
+            self.assertEqual((agent.workers, agent._pool), (1, None))
+        with mock.patch("game_agent._available_cores", return_value=2):
+            agent = game_agent.CustomPlayer(workers=4)
+            try:
+                self.assertEqual(agent.workers, 2)
+                self.assertIsNotNone(agent._pool)
+            finally:
+                agent.close()
+
+    def test_board_sent_without_players(self):
+        """ The position sent to the workers does not carry the agent's tables """
+        agent = game_agent.CustomPlayer(method="alphabeta", tt_size=2**12)
+        opponent = game_agent.CustomPlayer(method="alphabeta", tt_size=2**12)
+        agent.time_left = opponent.time_left = lambda: 1e3
+        board = isolation.BitBoard(opponent, agent)
+        for move in random_game(isolation.BitBoard, 1, max_plies=9)[1]:
+            board.apply_move(move)
+        data = game_agent._dump_board(board, agent)
+        agent.alphabeta(board, 4)
+        opponent.alphabeta(board.forecast_move(board.get_legal_moves()[0]), 4)
+        self.assertEqual(len(game_agent._dump_board(board, agent)), len(data))
+
+        worker_agent = game_agent.CustomPlayer()
+        loaded = game_agent._load_board(data, worker_agent)
+        self.assertIs(loaded.active_player, worker_agent)
+        self.assertEqual(loaded.inactive_player, "opponent")
+        self.assertEqual(loaded.get_legal_moves(), board.get_legal_moves())
+        self.assertEqual(loaded.hash_key, board.hash_key)
+
+    def test_root_share_keeps_method(self):
+        """ Workers search their share of the root moves with PVS and MTD(f) """
+        for seed in range(4):
+            _, moves = random_game(isolation.BitBoard, seed, max_plies=10)
+            results = {}
+            for method in ("alphabeta", "pvs", "mtdf"):
+                agent = game_agent.CustomPlayer(method=method, tt_size=2**12)
+                agent.time_left = lambda: 1e3
+                board = make_board(agent, moves)
+                share = board.get_legal_moves()[::2]
+                score = None
+                scores = []
+                for depth in range(1, 6):
+                    nodes = agent.nodes
+                    score, move = agent._search_iteration(board, depth, score, share)
+                    self.assertIn(move, share)
+                    scores.append((score, agent.nodes - nodes))
+                results[method] = scores
+            for method in ("pvs", "mtdf"):
+                self.assertEqual([s for s, _ in results[method]],
+                                 [s for s, _ in results["alphabeta"]])
+            # the later iterations search with the windows of each method
+            self.assertNotEqual(results["pvs"], results["alphabeta"])
+            self.assertNotEqual(results["mtdf"], results["alphabeta"])
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    def test_symmetric_positions_share_entries(self):
+        """ A book move added for one position is found for its mirror images """
+        book = opening_book.OpeningBook()
+        board = isolation.BitBoard("Player1", "Player2")
+        board.apply_move((1, 2))
+        book.add(board, (3, 3))
+        self.assertEqual(len(book), 1)
+        for loc, expected in [((1, 2), (3, 3)), ((2, 1), (3, 3)),
+                              ((5, 4), (3, 3)), ((4, 5), (3, 3))]:
+            mirror = isolation.Board("Player1", "Player2")
+            mirror.apply_move(loc)
+            self.assertEqual(book.probe(mirror), expected)
+
+        book.add(board, (0, 0))
+        mirror = isolation.Board("Player1", "Player2")
+        mirror.apply_move((5, 4))
+        self.assertEqual(book.probe(mirror), (6, 6))
+
+        mirror.apply_move((0, 0))
+        self.assertIsNone(book.probe(mirror))
+
+    def test_save_and_load(self):
+        """ A book survives a round trip through its file format """
+        positions = opening_book.book_positions(2)
+        self.assertEqual(len(positions), 11)
+        book = opening_book.OpeningBook()
+        for moves, _ in positions:
+            board = isolation.BitBoard("Player1", "Player2")
+            for move in moves:
+                board.apply_move(move)
+            book.add(board, board.get_legal_moves()[-1])
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            book.save(path)
+            loaded = opening_book.OpeningBook.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(book.entries, loaded.entries)
+
+        agent = game_agent.CustomPlayer(method="alphabeta", opening_book=loaded)
+        board = isolation.BitBoard(agent, "null_agent")
+        move = agent.get_move(board, board.get_legal_moves(), lambda: 1e3)
+        self.assertEqual(move, book.probe(board))
+
+
+class EndgameSolverTest(unittest.TestCase):
+
+    def partitioned_positions(self, max_blanks):
+        """Yield (seed, moves) for the first partitioned position of random
+        games that has at most `max_blanks` open cells."""
+        solver = endgame.EndgameSolver()
+        for seed in range(40):
+            _, moves = random_game(isolation.BitBoard, seed)
+            board = isolation.BitBoard("Player1", "Player2")
+            for idx, move in enumerate(moves):
+                board.apply_move(move)
+                if len(board.get_blank_spaces()) <= max_blanks and \
+                        solver.solve(board) is not None:
+                    yield seed, moves[:idx + 1]
+                    break
+
+    def test_matches_exhaustive_search(self):
+        """ Solved values agree with alpha-beta search to the end of the game """
+        positions = list(self.partitioned_positions(14))
+        self.assertGreater(len(positions), 5)
+        for seed, moves in positions:
+            agent = game_agent.CustomPlayer(score_fn=lambda game, player: game.utility(player),
+                                            iterative=False, method="alphabeta")
+            agent.time_left = lambda: 1e3
+            players = (agent, "null_agent") if len(moves) % 2 == 0 else ("null_agent", agent)
+            board = isolation.BitBoard(*players)
+            for move in moves:
+                board.apply_move(move)
+            value, move = endgame.EndgameSolver().solve(board, agent)
+            self.assertEqual(agent.alphabeta(board, len(board.get_blank_spaces()))[0], value)
+            if value == float("inf"):
+                self.assertIn(move, board.get_legal_moves())
+
+    def test_solver_reused_across_board_sizes(self):
+        """ A solver shared between board sizes agrees with fresh solvers """
+        shared = endgame.EndgameSolver()
+        for seed in range(140):
+            width, height = [(7, 7), (6, 6), (5, 5), (8, 8), (4, 4)][seed % 5]
+            board, moves = random_game(isolation.BitBoard, seed, width, height)
+            for _ in moves:
+                board.undo_move()
+                # the shared memo may solve positions beyond the node limit of a
+                # fresh solver, so only positions a fresh solver solves are compared
+                expected = endgame.EndgameSolver().solve(board)
+                if expected is not None:
+                    self.assertEqual(shared.solve(board), expected)
+
+    def test_unpartitioned_positions(self):
+        """ Positions where the players can still meet are not solved """
+        solver = endgame.EndgameSolver()
+        board = isolation.BitBoard("Player1", "Player2")
+        self.assertIsNone(solver.solve(board))
+        for move in [(3, 3), (0, 0), (1, 2)]:
+            board.apply_move(move)
+            self.assertIsNone(solver.solve(board))
+        self.assertIsNone(endgame.EndgameSolver(max_nodes=0).solve(
+            make_board("Player1", random_game(isolation.BitBoard, 37)[1][:24])))
+
+    def test_gives_up_on_expired_clock(self):
+        """ The solver returns promptly once the clock nears the threshold """
+        board = make_board("Player1", random_game(isolation.BitBoard, 13)[1][:16])
+        solver = endgame.EndgameSolver()
+        # the position takes the solver to its node limit without a clock
+        self.assertIsNone(solver.solve(board, time_left=lambda: float("inf")))
+        self.assertEqual(solver.nodes, solver.max_nodes + 1)
+
+        solver = endgame.EndgameSolver()
+        self.assertIsNone(solver.solve(board, time_left=lambda: 5., threshold=10.))
+        self.assertEqual(solver.nodes, 64)
+        # the clock is read every 64 nodes, and its 92nd reading is below 10
+        clock = iter(range(100, 0, -1))
+        self.assertIsNone(solver.solve(board, time_left=lambda: next(clock), threshold=10.))
+        self.assertEqual(solver.nodes, 64 * 92)
+
+    def test_agent_plays_solution(self):
+        """ CustomPlayer plays a proven win without searching """
+        # the first position in which the player to move still has a move
+        seed, moves = next((seed, moves) for seed, moves in self.partitioned_positions(20)
+                           if random_game(isolation.BitBoard, seed)[1][len(moves):])
+        agent = game_agent.CustomPlayer(method="alphabeta",
+                                        endgame_solver=endgame.EndgameSolver())
+        players = (agent, "null_agent") if len(moves) % 2 == 0 else ("null_agent", agent)
+        board = isolation.Board(*players)
+        for move in moves:
+            board.apply_move(move)
+        expected = endgame.EndgameSolver().solve(board)[1]
+        self.assertEqual(agent.get_move(board, board.get_legal_moves(), lambda: 1e3), expected)
+        self.assertEqual(agent.nodes, 0)
+
+
+class PonderTest(unittest.TestCase):
+
+    def test_reuses_pondered_search(self):
+        """ The search of the opponent's actual reply is reused on the next turn """
+        agent = game_agent.CustomPlayer(method="alphabeta", tt_size=2**12,
+                                        move_ordering=True, ponder=True, node_limit=2000)
+        unlimited = lambda: float("inf")
+        try:
+            board = make_board(agent, random_game(isolation.BitBoard, 2, max_plies=10)[1])
+            move = agent.get_move(board, board.get_legal_moves(), unlimited)
+            self.assertEqual((agent.ponder_depth, agent.ponder_entries), (0, 0))
+            board.apply_move(move)
+            board.apply_move(board.get_legal_moves()[0])
+
+            # without a time limit, pondering goes on until the next turn
+            time.sleep(0.3)
+            move = agent.get_move(board, board.get_legal_moves(), unlimited)
+            self.assertGreater(agent.ponder_depth, 1)
+            self.assertGreater(agent.ponder_entries, 0)
+            self.assertGreaterEqual(agent.depth_reached, agent.ponder_depth)
+            self.assertIn(move, board.get_legal_moves())
+        finally:
+            agent.close()
+        self.assertIsNone(agent._ponder_process)
+
+
+class NodeLimitTest(unittest.TestCase):
+
+    def test_limited_search_is_reproducible(self):
+        """ Node-limited moves do not depend on the clock and respect the limit """
+        unlimited = lambda: float("inf")
+        for seed in range(3):
+            moves = random_game(isolation.BitBoard, seed, max_plies=8)[1]
+            chosen = []
+            for _ in range(2):
+                agent = game_agent.CustomPlayer(method="alphabeta", tt_size=2**12,
+                                                move_ordering=True, node_limit=500)
+                board = make_board(agent, moves)
+                chosen.append(agent.get_move(board, board.get_legal_moves(), unlimited))
+                stats = agent.move_stats[-1]
+                self.assertLessEqual(stats.nodes, 500)
+                self.assertGreater(stats.depth, 0)
+                self.assertAlmostEqual(stats.branching_factor ** stats.depth, stats.nodes)
+                self.assertLessEqual(stats.cutoffs, stats.nodes)
+            self.assertEqual(chosen[0], chosen[1])
+
+    @mock.patch("game_agent._available_cores", return_value=2)
+    def test_unlimited_search_ends(self, _):
+        """ Without a clock or node limit, iterative deepening stops once the
+        whole game tree has been searched """
+        for workers in (1, 2):
+            agent = game_agent.CustomPlayer(method="alphabeta", tt_size=2**12, workers=workers)
+            try:
+                board = make_board(agent, random_game(isolation.BitBoard, 9, max_plies=30)[1])
+                move = agent.get_move(board, board.get_legal_moves(), lambda: float("inf"))
+                self.assertIn(move, board.get_legal_moves())
+                self.assertLessEqual(agent.depth_reached, len(board.get_blank_spaces()))
+            finally:
+                agent.close()
+
+    def test_play_without_clock(self):
+        """ Board.play applies the node limit to both players for one game """
+        agents = [game_agent.CustomPlayer(method="alphabeta", node_limit=10**6),
+                  game_agent.CustomPlayer(score_fn=sample_players.improved_score,
+                                          method="alphabeta")]
+        results = []
+        for _ in range(2):
+            board = isolation.BitBoard(agents[0], agents[1])
+            board.apply_move((2, 3))
+            board.apply_move((0, 5))
+            results.append(board.play(time_limit=None, node_limit=200))
+        self.assertEqual(results[0][1:], results[1][1:])
+        self.assertNotEqual(results[0][2], "timeout")
+        self.assertEqual(agents[0].node_limit, 10**6)
+        self.assertIsNone(agents[1].node_limit)
+        for agent in agents:
+            self.assertTrue(all(stats.nodes <= 200 for stats in agent.move_stats))
+
+
+@unittest.skipIf(batch_eval is None, "batch evaluation requires NumPy")
+class BatchEvaluationTest(unittest.TestCase):
+
+    def test_matches_scalar_heuristics(self):
+        """ Vectorized scores equal the scalar heuristics on every leaf """
+        heuristics = [(sample_players.open_move_score, batch_eval.OPEN_MOVE),
+                      (sample_players.improved_score, batch_eval.IMPROVED),
+                      (game_agent.custom_score, batch_eval.CUSTOM)]
+        boards = []
+        for seed in range(10):
+            board, moves = random_game(isolation.BitBoard, seed)
+            boards.append(isolation.BitBoard("Player1", "Player2"))
+            for move in moves:
+                boards.append(boards[-1].forecast_move(move))
+        evaluator = batch_eval.BatchEvaluator()
+        for score_fn, heuristic in heuristics:
+            for player in ("Player1", "Player2"):
+                batch = batch_eval.LeafBatch(7, 7)
+                for board in boards:
+                    batch.add(board, player)
+                self.assertEqual(evaluator.evaluate(batch, heuristic).tolist(),
+                                 [score_fn(board, player) for board in boards])
+
+    def test_batch_minimax(self):
+        """ Batched minimax returns the result of CustomPlayer.minimax """
+        evaluator = batch_eval.BatchEvaluator()
+        for seed in range(5):
+            _, moves = random_game(isolation.Board, seed, max_plies=6 + 4 * seed)
+            agent = game_agent.CustomPlayer(3, game_agent.custom_score, False, "minimax")
+            agent.time_left = lambda: 1e3
+            for board_cls in (isolation.Board, isolation.BitBoard):
+                board = make_board(agent, moves, board_cls)
+                before = board.to_string()
+                self.assertEqual(batch_eval.batch_minimax(board, 3, agent, evaluator),
+                                 agent.minimax(board, 3))
+                self.assertEqual(board.to_string(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
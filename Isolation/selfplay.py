@@ -0,0 +1,233 @@
+"""
+Generate large numbers of isolation games by self-play, e.g., to tune
+heuristics or to build opening books.
+
+Games are played without a clock: both players search either to a fixed
+depth, or with iterative deepening until a fixed number of nodes has been
+searched on each move, so every game is reproducible from its seed. The first
+few plies of each game are played at random so that the games differ.
+
+Finished games are appended to a compact binary file as soon as they end: a
+short header followed by one record per game holding the number of moves, the
+index of the winning player (0 for player 1, 1 for player 2) and the cell
+index of every move. Positions are not stored; `positions()` replays the
+moves of a record to recover them.
+
+With --workers, the games are split between processes that each write their
+own shard file. For example, to play 1000 games with 4 processes searching
+2000 nodes per move:
+
+    python selfplay.py --games 1000 --nodes 2000 --workers 4 --output games.bin
+
+writes games-0.bin to games-3.bin.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import struct
+import timeit
+
+from collections import namedtuple
+
+from isolation import BitBoard
+from game_agent import CustomPlayer
+from game_agent import custom_score
+
+MAGIC = b"ISOG"
+HEADER = struct.Struct("<4sBBB")  # magic, version, width, height
+VERSION = 1
+
+GameRecord = namedtuple("GameRecord", ["width", "height", "moves", "winner"])
+
+
+def _cell_format(width, height):
+    """Return the struct format character used to store cell indices and
+    move counts. A game can fill every cell, so the count of moves reaches
+    `width * height`, one more than the largest cell index."""
+    return "B" if width * height < 256 else "H"
+
+
+class GameWriter:
+    """
+    Append game records to a file, writing the file header first.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file to write.
+
+    width : int (optional)
+        The number of columns of the board the games are played on.
+
+    height : int (optional)
+        The number of rows of the board the games are played on.
+    """
+
+    def __init__(self, path, width=7, height=7):
+        self.width = width
+        self.height = height
+        self._format = "<" + _cell_format(width, height) * 2
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, width, height))
+
+    def write(self, moves, winner):
+        """Append a game with the list of (row, column) `moves` that was won
+        by player `winner` (0 or 1)."""
+        cells = [r * self.width + c for r, c in moves]
+        self._file.write(struct.pack(self._format, len(cells), winner))
+        self._file.write(struct.pack("<{}{}".format(len(cells), self._format[-1]), *cells))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_games(path):
+    """Generate the `GameRecord` of every game in the file at `path`."""
+    with open(path, "rb") as games_file:
+        data = games_file.read()
+    magic, version, width, height = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("{} is not an isolation game file.".format(path))
+    cell = _cell_format(width, height)
+    record = struct.Struct("<" + cell * 2)
+    offset = HEADER.size
+    while offset < len(data):
+        num_moves, winner = record.unpack_from(data, offset)
+        offset += record.size
+        cells = struct.unpack_from("<{}{}".format(num_moves, cell), data, offset)
+        offset += num_moves * struct.calcsize(cell)
+        yield GameRecord(width, height, [divmod(idx, width) for idx in cells], winner)
+
+
+def positions(record, board_cls=BitBoard):
+    """
+    Replay a `GameRecord` and generate a (board, move) pair for every move
+    of the game, where `board` is the position the move was played from.
+    The players of each board are the strings "Player1" and "Player2".
+    """
+    board = board_cls("Player1", "Player2", record.width, record.height)
+    for move in record.moves:
+        yield board.copy(), move
+        board.apply_move(move)
+
+
+def make_agent(depth=None, nodes=None, score_fn=custom_score):
+    """
+    Create a self-play agent that searches to a fixed `depth`, or with
+    iterative deepening until `nodes` nodes have been searched (exactly one
+    of the two must be given), evaluating positions with `score_fn`. Returns
+    the agent and the `time_left` function that it must be given on every
+    move instead of a clock.
+    """
+    agent = CustomPlayer(search_depth=depth or 1, score_fn=score_fn,
+                         iterative=nodes is not None, method='alphabeta', timeout=0.,
+                         tt_size=2**14, move_ordering=True, in_place=True, node_limit=nodes)
+    return agent, lambda: float("inf")
+
+
+def play_game(seed, depth=None, nodes=None, random_plies=2, width=7, height=7,
+              score_fns=(custom_score, custom_score)):
+    """
+    Play one self-play game and return (moves, winner), where `winner` is 0
+    if player 1 won and 1 if player 2 won. The first `random_plies` moves are
+    chosen at random using `seed`. Each player evaluates positions with its
+    own heuristic from `score_fns`.
+    """
+    rng = random.Random(seed)
+    players = [make_agent(depth, nodes, score_fn) for score_fn in score_fns]
+    board = BitBoard(players[0][0], players[1][0], width, height)
+    moves = []
+    while True:
+        legal_moves = board.get_legal_moves()
+        if not legal_moves:
+            break
+        if len(moves) < random_plies:
+            move = rng.choice(legal_moves)
+        else:
+            agent, time_left = players[len(moves) % 2]
+            move = agent.get_move(board, legal_moves, time_left)
+        board.apply_move(move)
+        moves.append(move)
+    # the player to move has no legal moves and loses
+    return moves, (len(moves) + 1) % 2
+
+
+def play_shard(path, game_ids, seed, depth=None, nodes=None, random_plies=2,
+               width=7, height=7):
+    """Play the games numbered `game_ids`, writing them to the file at
+    `path`, and return the number of moves played."""
+    num_moves = 0
+    with GameWriter(path, width, height) as writer:
+        for game_id in game_ids:
+            moves, winner = play_game(seed + game_id, depth, nodes, random_plies, width, height)
+            writer.write(moves, winner)
+            num_moves += len(moves)
+    return num_moves
+
+
+def _play_shard_task(task):
+    """Pool entry point for `main`."""
+    return play_shard(*task)
+
+
+def shard_paths(output, num_shards):
+    """Return the file names of the shards of `output`."""
+    if num_shards == 1:
+        return [output]
+    root, ext = os.path.splitext(output)
+    return ["{}-{}{}".format(root, idx, ext) for idx in range(num_shards)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100)
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("--depth", type=int, default=None,
+                       help="search every move to this fixed depth")
+    limit.add_argument("--nodes", type=int, default=None,
+                       help="search every move with iterative deepening up to this many nodes")
+    parser.add_argument("--random-plies", type=int, default=2,
+                        help="number of random moves at the start of each game")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes, each writing its own shard")
+    parser.add_argument("--output", default="games.bin")
+    args = parser.parse_args()
+    if args.depth is None and args.nodes is None:
+        args.depth = 3
+
+    paths = shard_paths(args.output, args.workers)
+    tasks = [(path, range(idx, args.games, args.workers), args.seed, args.depth, args.nodes,
+              args.random_plies, args.width, args.height)
+             for idx, path in enumerate(paths)]
+    start = timeit.default_timer()
+    if args.workers > 1:
+        pool = multiprocessing.Pool(args.workers)
+        try:
+            num_moves = sum(pool.map(_play_shard_task, tasks))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        num_moves = sum(map(_play_shard_task, tasks))
+    elapsed = timeit.default_timer() - start
+
+    print("Played {} games ({} moves) in {:.1f}s: {:.1f} games/s".format(
+        args.games, num_moves, elapsed, args.games / elapsed))
+    print("Wrote {}".format(", ".join(paths)))
+
+
+if __name__ == "__main__":
+    main()
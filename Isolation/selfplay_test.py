@@ -0,0 +1,63 @@
+"""
+This file contains test cases for the self-play game generator in
+selfplay.py.
+"""
+import os
+import tempfile
+import unittest
+
+import selfplay
+
+
+class SelfPlayTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_games_are_reproducible(self):
+        """ Games depend only on their seed and search limit """
+        for limits in ({"depth": 2}, {"nodes": 200}):
+            moves, winner = selfplay.play_game(3, **limits)
+            self.assertEqual(selfplay.play_game(3, **limits), (moves, winner))
+            self.assertNotEqual(selfplay.play_game(4, **limits)[0], moves)
+
+    def test_records_round_trip(self):
+        """ Written games are read back and replay to their recorded result """
+        games = [selfplay.play_game(seed, depth=1) for seed in range(5)]
+        with selfplay.GameWriter(self.path) as writer:
+            for moves, winner in games:
+                writer.write(moves, winner)
+        records = list(selfplay.read_games(self.path))
+        self.assertEqual([(r.moves, r.winner) for r in records], games)
+
+        for record in records:
+            board = None
+            for board, move in selfplay.positions(record):
+                self.assertIn(move, board.get_legal_moves())
+            board.apply_move(move)
+            winner = ("Player1", "Player2")[record.winner]
+            self.assertTrue(board.is_winner(winner))
+
+    def test_large_boards(self):
+        """ Boards with 256 cells or more store cell indices in two bytes """
+        moves = [(0, 0), (16, 16), (2, 1)]
+        with selfplay.GameWriter(self.path, 17, 17) as writer:
+            writer.write(moves, 1)
+        self.assertEqual(list(selfplay.read_games(self.path)),
+                         [selfplay.GameRecord(17, 17, moves, 1)])
+
+    def test_full_board(self):
+        """ A game filling all 256 cells of a 16x16 board is stored """
+        moves = [divmod(idx, 16) for idx in range(256)]
+        with selfplay.GameWriter(self.path, 16, 16) as writer:
+            writer.write(moves, 0)
+        self.assertEqual(list(selfplay.read_games(self.path)),
+                         [selfplay.GameRecord(16, 16, moves, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
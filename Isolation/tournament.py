@@ -17,21 +17,40 @@ For example, if the random moves chosen for initialization are (5, 2) and
 agentB at (1, 3) as player 2 then play to conclusion; the agents swap
 initiative in the second match with agentB at (5, 2) as player 1 and agentA at
 (1, 3) as player 2.
+
+With --sprt, the number of matches becomes an upper bound: the matches of a
+pairing alternate player order, and the pairing stops as soon as a sequential
+probability ratio test (see ratings.py) decides whether the evaluated agent is
+stronger than its opponent. Ratings for all agents are fit to the results of
+every game played and reported at the end.
+
+With --mcts, a Monte Carlo tree search agent (see mcts.py) is evaluated
+against the same opponents after the alpha-beta agents. When matches are
+played in this process (a single worker), the number of nodes (or, for the
+MCTS agent, playouts) searched per second by each evaluated agent is
+reported with its results.
 """
 
+import argparse
 import itertools
+import multiprocessing
+import os
 import random
+import timeit
 import warnings
 
 from collections import namedtuple
 
-from isolation import Board
+from isolation import BitBoard
 from sample_players import RandomPlayer
 from sample_players import null_score
 from sample_players import open_move_score
 from sample_players import improved_score
 from game_agent import CustomPlayer
 from game_agent import custom_score
+from mcts import MCTSPlayer
+from ratings import SPRT
+from ratings import bradley_terry
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
@@ -43,6 +62,10 @@ TIMEOUT_WARNING = "One or more agents lost a match this round due to " + \
                   "increase this margin to avoid timeouts during  " + \
                   "tournament play."
 
+WORKERS_WARNING = "Requested {} worker processes but only {} CPU cores are " + \
+                  "available; using {} workers so that every game keeps a " + \
+                  "full core for its time budget."
+
 DESCRIPTION = """
 This script evaluates the performance of the custom heuristic function by
 comparing the strength of an agent using iterative deepening (ID) search with
@@ -57,17 +80,23 @@ same opponents.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_match(player1, player2):
+def play_fair_games(player1, player2, node_limit=None):
     """
     Play a "fair" set of matches between two agents by playing two games
     between the players, forcing each agent to play from randomly selected
     positions. This should control for differences in outcome resulting from
     advantage due to starting position on the board.
+
+    With a `node_limit`, the games are played without a clock and the agents
+    search at most `node_limit` nodes per move instead.
+
+    Returns the number of wins, losses by timeout, and losses by illegal move
+    for each player as three (player1, player2) tuples.
     """
     num_wins = {player1: 0, player2: 0}
     num_timeouts = {player1: 0, player2: 0}
     num_invalid_moves = {player1: 0, player2: 0}
-    games = [Board(player1, player2), Board(player2, player1)]
+    games = [BitBoard(player1, player2), BitBoard(player2, player1)]
 
     # initialize both games with a random move and response
     for _ in range(2):
@@ -75,40 +104,108 @@ def play_match(player1, player2):
         games[0].apply_move(move)
         games[1].apply_move(move)
 
-    # play both games and tally the results
+    # play both games and tally the results; a game also ends with "illegal
+    # move" when the loser has no legal moves left, which is not counted as an
+    # invalid move
     for game in games:
-        winner, _, termination = game.play(time_limit=TIME_LIMIT)
-
-        if player1 == winner:
-            num_wins[player1] += 1
+        if node_limit is None:
+            winner, _, termination = game.play(time_limit=TIME_LIMIT)
+        else:
+            winner, _, termination = game.play(time_limit=None, node_limit=node_limit)
+        loser = game.get_opponent(winner)
+        num_wins[winner] += 1
 
-            if termination == "timeout":
-                num_timeouts[player2] += 1
-            else:
-                num_invalid_moves[player2] += 1
+        if termination == "timeout":
+            num_timeouts[loser] += 1
+        elif game.get_legal_moves(loser):
+            num_invalid_moves[loser] += 1
 
-        elif player2 == winner:
+    return tuple((d[player1], d[player2]) for d in (num_wins, num_timeouts, num_invalid_moves))
 
-            num_wins[player2] += 1
 
-            if termination == "timeout":
-                num_timeouts[player1] += 1
-            else:
-                num_invalid_moves[player1] += 1
+def play_match(player1, player2):
+    """
+    Play a "fair" set of matches between two agents (see `play_fair_games`)
+    and return the number of games won by each player.
+    """
+    wins, timeouts, _ = play_fair_games(player1, player2)
 
-    if sum(num_timeouts.values()) != 0:
+    if sum(timeouts) != 0:
         warnings.warn(TIMEOUT_WARNING)
 
-    return num_wins[player1], num_wins[player2]
+    return wins
+
+
+def _play_match_task(task):
+    """
+    Worker entry point for `play_round`: seed the random number generator for
+    the match so results are reproducible no matter which process plays it,
+    then play the match.
+    """
+    player1, player2, seed, node_limit = task
+    random.seed(seed)
+    return play_fair_games(player1, player2, node_limit)
+
+
+def _init_worker(counter, cpus):
+    """
+    Pool initializer that pins each worker process to its own CPU core (where
+    the platform supports it) so that concurrent games do not compete for the
+    same core and distort each other's per-move time budget.
+    """
+    with counter.get_lock():
+        worker_idx = counter.value
+        counter.value += 1
+    if hasattr(os, "sched_setaffinity") and cpus:
+        os.sched_setaffinity(0, {cpus[worker_idx % len(cpus)]})
 
 
-def play_round(agents, num_matches):
+def available_cpus():
+    """Return the list of CPU cores that this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(multiprocessing.cpu_count()))
+
+
+def make_pool(num_workers):
+    """
+    Create a process pool with at most one worker per available CPU core, or
+    return None to play matches serially when a single worker is requested.
+    """
+    cpus = available_cpus()
+    if num_workers > len(cpus):
+        warnings.warn(WORKERS_WARNING.format(num_workers, len(cpus), len(cpus)))
+        num_workers = len(cpus)
+    if num_workers <= 1:
+        return None
+    counter = multiprocessing.Value("i", 0)
+    return multiprocessing.Pool(num_workers, initializer=_init_worker,
+                                initargs=(counter, cpus))
+
+
+def play_round(agents, num_matches, pool=None, seed=None, sprt=None, batch=1,
+               results=None, node_limit=None):
     """
     Play one round (i.e., a single match between each pair of opponents)
+
+    Matches are distributed across the worker processes of `pool` when one is
+    given. Every match is seeded from `seed`, so a round played with the same
+    seed produces the same starting positions for any number of workers.
+
+    When an `SPRT` is given, the matches of each pairing are played `batch`
+    at a time, alternating player order, until the test accepts a hypothesis
+    or all the matches have been played. The number of games won by each
+    agent of every pairing is added to the `results` dict, if given, under
+    the key (name of evaluated agent, name of opponent).
+
+    With a `node_limit`, every move is limited to that many search nodes
+    instead of by the clock (see `play_fair_games`).
     """
     agent_1 = agents[-1]
     wins = 0.
     total = 0.
+    rng = random.Random(seed)
+    run = pool.imap if pool is not None else map
 
     print("\nPlaying Matches:")
     print("----------")
@@ -116,26 +213,88 @@ def play_round(agents, num_matches):
     for idx, agent_2 in enumerate(agents[:-1]):
 
         counts = {agent_1.player: 0., agent_2.player: 0.}
+        timeouts = {agent_1.player: 0, agent_2.player: 0}
+        invalid_moves = {agent_1.player: 0, agent_2.player: 0}
         names = [agent_1.name, agent_2.name]
-        print("  Match {}: {!s:^11} vs {!s:^11}".format(idx + 1, *names), end=' ')
+        print("  Match {}: {!s:^11} vs {!s:^11}".format(idx + 1, *names), end=' ', flush=True)
 
         # Each player takes a turn going first
-        for p1, p2 in itertools.permutations((agent_1.player, agent_2.player)):
-            for _ in range(num_matches):
-                score_1, score_2 = play_match(p1, p2)
+        tasks = [(p1, p2, rng.getrandbits(32), node_limit)
+                 for p1, p2 in itertools.permutations((agent_1.player, agent_2.player))
+                 for _ in range(num_matches)]
+        step = len(tasks)
+        decision = None
+        if sprt is not None:
+            # alternate the player order so that a pairing stopped early has
+            # played about as many matches with each agent going first
+            tasks = [task for pair in zip(tasks[:num_matches], tasks[num_matches:])
+                     for task in pair]
+            step = batch
+
+        for start in range(0, len(tasks), step):
+            chunk = tasks[start:start + step]
+            for (p1, p2, _, _), result in zip(chunk, run(_play_match_task, chunk)):
+                (score_1, score_2), (timeout_1, timeout_2), (invalid_1, invalid_2) = result
                 counts[p1] += score_1
                 counts[p2] += score_2
+                timeouts[p1] += timeout_1
+                timeouts[p2] += timeout_2
+                invalid_moves[p1] += invalid_1
+                invalid_moves[p2] += invalid_2
                 total += score_1 + score_2
+            if sprt is not None:
+                decision = sprt.status(counts[agent_1.player], counts[agent_2.player])
+                if decision is not None:
+                    break
 
         wins += counts[agent_1.player]
+        if results is not None:
+            key = (agent_1.name, agent_2.name)
+            won, lost = results.get(key, (0, 0))
+            results[key] = (won + int(counts[agent_1.player]), lost + int(counts[agent_2.player]))
 
         print("\tResult: {} to {}".format(int(counts[agent_1.player]),
-                                          int(counts[agent_2.player])))
+                                          int(counts[agent_2.player])), end='')
+        if sprt is not None:
+            print("\t(SPRT: {})".format(decision or "undecided"), end='')
+        if sum(timeouts.values()) or sum(invalid_moves.values()):
+            print("\t(timeouts: {} to {}, illegal moves: {} to {})".format(
+                timeouts[agent_1.player], timeouts[agent_2.player],
+                invalid_moves[agent_1.player], invalid_moves[agent_2.player]), end='')
+        print()
+
+        if sum(timeouts.values()) != 0:
+            warnings.warn(TIMEOUT_WARNING)
 
     return 100. * wins / total
 
 
 def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--matches", type=int, default=NUM_MATCHES,
+                        help="number of fair matches against each opponent per player order")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes used to play matches in parallel")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for the random starting positions of every match")
+    parser.add_argument("--sprt", action="store_true",
+                        help="stop each pairing once a sequential test settles its result")
+    parser.add_argument("--elo0", type=float, default=0.,
+                        help="rating difference of the evaluated agent under H0 of the SPRT")
+    parser.add_argument("--elo1", type=float, default=100.,
+                        help="rating difference of the evaluated agent under H1 of the SPRT")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="probability that the SPRT accepts H1 when H0 is true")
+    parser.add_argument("--beta", type=float, default=0.05,
+                        help="probability that the SPRT accepts H0 when H1 is true")
+    parser.add_argument("--mcts", action="store_true",
+                        help="also evaluate a Monte Carlo tree search agent")
+    parser.add_argument("--nodes", type=int, default=None,
+                        help="limit every move to this many search nodes instead of the clock")
+    args = parser.parse_args()
+
+    if args.seed is None:
+        args.seed = random.randrange(2**32)
 
     HEURISTICS = [("Null", null_score),
                   ("Open", open_move_score),
@@ -162,20 +321,55 @@ def main():
     # faster or slower computers.
     test_agents = [Agent(CustomPlayer(score_fn=improved_score, **CUSTOM_ARGS), "ID_Improved"),
                    Agent(CustomPlayer(score_fn=custom_score, **CUSTOM_ARGS), "Student")]
+    if args.mcts:
+        test_agents.append(Agent(MCTSPlayer(playout='heavy'), "MCTS"))
 
     print(DESCRIPTION)
-    for agentUT in test_agents:
-        print("")
-        print("*************************")
-        print("{:^25}".format("Evaluating: " + agentUT.name))
-        print("*************************")
-
-        agents = random_agents + mm_agents + ab_agents + [agentUT]
-        win_ratio = play_round(agents, NUM_MATCHES)
-
-        print("\n\nResults:")
+    print("Seed: {}".format(args.seed))
+    if args.nodes is not None:
+        print("Node limit: {} per move".format(args.nodes))
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta) if args.sprt else None
+    batch = max(1, min(args.workers, len(available_cpus())))
+    results = {}
+    pool = make_pool(args.workers)
+    total_start = timeit.default_timer()
+    try:
+        for agentUT in test_agents:
+            print("")
+            print("*************************")
+            print("{:^25}".format("Evaluating: " + agentUT.name))
+            print("*************************")
+
+            agents = random_agents + mm_agents + ab_agents + [agentUT]
+            start = timeit.default_timer()
+            win_ratio = play_round(agents, args.matches, pool, args.seed, sprt, batch, results,
+                                   args.nodes)
+            elapsed = timeit.default_timer() - start
+
+            print("\n\nResults:")
+            print("----------")
+            print("{!s:<15}{:>10.2f}%".format(agentUT.name, win_ratio))
+            print("{!s:<15}{:>10.1f}s".format("Elapsed", elapsed))
+            # only filled in when the matches are played in this process
+            stats = getattr(agentUT.player, "move_stats", [])
+            if stats:
+                print("{!s:<15}{:>10.0f}".format("Nodes/s", sum(s.nodes for s in stats) /
+                                                 max(sum(s.seconds for s in stats), 1e-9)))
+
+        played = sum(won + lost for won, lost in results.values())
+        scheduled = 4 * args.matches * len(results)
+        print("\n\nRatings:")
         print("----------")
-        print("{!s:<15}{:>10.2f}%".format(agentUT.name, win_ratio))
+        ratings = bradley_terry(results)
+        for name, (rating, margin) in sorted(ratings.items(), key=lambda item: -item[1][0]):
+            print("{!s:<15}{:>8.0f} +/- {:.0f}".format(name, rating, margin))
+        print("\n{} of {} scheduled games played ({:.0f}% saved) in {:.1f}s".format(
+            played, scheduled, 100. * (scheduled - played) / scheduled,
+            timeit.default_timer() - total_start))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+"""
+This file contains test cases for the match scheduling and result accounting
+of tournament.py.
+"""
+import contextlib
+import io
+import multiprocessing
+import random
+import time
+import unittest
+
+from unittest import mock
+
+import game_agent
+import tournament
+
+from ratings import SPRT
+from sample_players import RandomPlayer
+from sample_players import improved_score
+
+
+class IllegalPlayer:
+    """Player that always answers with a move off the board."""
+
+    def get_move(self, game, legal_moves, time_left):
+        return (-3, -3)
+
+
+class SlowPlayer:
+    """Player that returns a legal move after its time has run out."""
+
+    def get_move(self, game, legal_moves, time_left):
+        while time_left() >= 0:
+            time.sleep(0.001)
+        return legal_moves[0]
+
+
+def play_quietly(*args, **kwargs):
+    """Return the result of `tournament.play_round(*args, **kwargs)` along
+    with the text it prints."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = tournament.play_round(*args, **kwargs)
+    return result, output.getvalue()
+
+
+class FairGamesTest(unittest.TestCase):
+
+    def test_forfeits_charged_to_loser(self):
+        """ Illegal moves and timeouts count against the player that made them """
+        random.seed(0)
+        self.assertEqual(tournament.play_fair_games(RandomPlayer(), IllegalPlayer()),
+                         ((2, 0), (0, 0), (0, 2)))
+        self.assertEqual(tournament.play_fair_games(IllegalPlayer(), RandomPlayer()),
+                         ((0, 2), (0, 0), (2, 0)))
+        with mock.patch("tournament.TIME_LIMIT", 20):
+            self.assertEqual(tournament.play_fair_games(SlowPlayer(), RandomPlayer()),
+                             ((0, 2), (2, 0), (0, 0)))
+
+    def test_game_end_is_not_a_forfeit(self):
+        """ Running out of legal moves is a loss, not an illegal move """
+        random.seed(1)
+        wins, timeouts, invalid_moves = tournament.play_fair_games(RandomPlayer(), RandomPlayer())
+        self.assertEqual(sum(wins), 2)
+        self.assertEqual((timeouts, invalid_moves), ((0, 0), (0, 0)))
+
+
+class PlayRoundTest(unittest.TestCase):
+
+    def make_agents(self):
+        # agent_test.py reloads game_agent, and only instances of the current
+        # class can be pickled for the worker processes
+        evaluated = game_agent.CustomPlayer(score_fn=improved_score, method="alphabeta")
+        return [tournament.Agent(IllegalPlayer(), "Illegal"),
+                tournament.Agent(RandomPlayer(), "Random"),
+                tournament.Agent(evaluated, "ID_Improved")]
+
+    def test_seeded_round_is_reproducible(self):
+        """ A seeded, node-limited round gives the same results in any process """
+        rounds = []
+        for workers in (0, 0, 2):
+            pool = multiprocessing.Pool(workers) if workers else None
+            results = {}
+            try:
+                ratio, output = play_quietly(self.make_agents(), 2, pool, seed=7,
+                                             results=results, node_limit=300)
+            finally:
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+            rounds.append((ratio, results))
+        self.assertEqual(rounds[0], rounds[1])
+        self.assertEqual(rounds[0], rounds[2])
+
+        ratio, results = rounds[0]
+        self.assertEqual(results[("ID_Improved", "Illegal")], (8, 0))
+        self.assertEqual(sum(results[("ID_Improved", "Random")]), 8)
+        self.assertIn("illegal moves: 0 to 8", output)
+
+    def test_sprt_stops_decided_pairings(self):
+        """ A pairing stops as soon as its results accept a hypothesis """
+        sprt = SPRT(0., 100., 0.05, 0.05)
+        agents = self.make_agents()
+        results = {}
+        _, output = play_quietly(agents[:1] + agents[2:], 50, seed=3, sprt=sprt,
+                                 results=results, node_limit=300)
+        # every fair match adds two wins, and twelve accept H1
+        self.assertEqual(results[("ID_Improved", "Illegal")], (12, 0))
+        self.assertIn("(SPRT: H1)", output)
+
+        results = {}
+        _, output = play_quietly([agents[2], agents[0]], 50, seed=3, sprt=sprt,
+                                 results=results, node_limit=300)
+        # nine losses accept H0, after the fifth fair match
+        self.assertEqual(results[("Illegal", "ID_Improved")], (0, 10))
+        self.assertIn("(SPRT: H0)", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+"""
+Tune the weights of the `MobilityScore` heuristic family in game_agent.py
+on self-play games written by selfplay.py.
+
+The weights are fit Texel-style: every position of the training games is
+labeled with the result of its game for the player to move, and the weights
+are chosen to maximize the likelihood of those results under the model
+
+    P(player to move wins) = 1 / (1 + exp(-score))
+
+where `score` is the heuristic value of the position. The model is a
+logistic regression on the legal move counts of both players, so it is fit
+exactly by Newton's method for each candidate opening length (`phase`); the
+candidate with the lowest log loss on held-out games wins. Because minimax
+only compares scores, the overall scale of the fitted weights does not
+change how the agent plays.
+
+The tuned heuristic is then played against `custom_score` in games with a
+fixed node budget per move, split over worker processes, and the weights are
+written to a JSON file with a report of the fit and the match, e.g.:
+
+    python selfplay.py --games 2000 --nodes 1000 --workers 4 --output games.bin
+    python tuning.py games-*.bin --pairs 200 --workers 4 --output weights.json
+
+The weights can be loaded with `MobilityScore(**report["weights"])`.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import timeit
+
+from game_agent import MobilityScore
+from game_agent import custom_score
+from ratings import elo_interval
+from selfplay import play_game
+from selfplay import positions
+from selfplay import read_games
+
+PHASES = [0.2, 0.3, 0.4, 0.5, 0.6, 0.7]
+
+
+def load_samples(paths, skip_plies=2):
+    """
+    Return a list of samples, one for each position of the games in the
+    files at `paths`, grouped by game: a list for every game of (own moves,
+    opponent moves, fraction of cells blocked, result) tuples, where the move
+    counts and result (1 for a win, 0 for a loss) are those of the player to
+    move. The first `skip_plies` positions of every game are skipped.
+    """
+    games = []
+    for path in paths:
+        for record in read_games(path):
+            samples = []
+            num_cells = float(record.width * record.height)
+            for ply, (board, _) in enumerate(positions(record)):
+                if ply < skip_plies:
+                    continue
+                result = 1. if record.winner == ply % 2 else 0.
+                samples.append((board.count_legal_moves(),
+                                board.count_legal_moves(board.inactive_player),
+                                board.move_count / num_cells, result))
+            games.append(samples)
+    return games
+
+
+def features(sample, phase):
+    """Return the feature vector of `sample`: the move counts of both players
+    in the slot for the opening or for the rest of the game."""
+    own, opp, played, _ = sample
+    if played < phase:
+        return (0., 0., own, -opp)
+    return (own, -opp, 0., 0.)
+
+
+def log_loss(samples, weights, phase):
+    """Return the mean negative log-likelihood of the results of `samples`."""
+    total = 0.
+    for sample in samples:
+        score = sum(w * x for w, x in zip(weights, features(sample, phase)))
+        # log(1 + exp(-score)) for a win, log(1 + exp(score)) for a loss
+        margin = score if sample[3] else -score
+        total += max(-margin, 0.) + math.log1p(math.exp(-abs(margin)))
+    return total / len(samples)
+
+
+def _solve(matrix, vector):
+    """Solve the linear system `matrix` x = `vector` by Gaussian elimination
+    with partial pivoting."""
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(col + 1, n):
+            factor = rows[r][col] / rows[col][col]
+            for c in range(col, n + 1):
+                rows[r][c] -= factor * rows[col][c]
+    solution = [0.] * n
+    for r in reversed(range(n)):
+        solution[r] = (rows[r][n] - sum(rows[r][c] * solution[c] for c in range(r + 1, n))) / rows[r][r]
+    return solution
+
+
+def fit(samples, phase, l2=1e-3, iterations=25, tolerance=1e-9):
+    """
+    Fit the weights (own, opponent, opening own, opening opponent) of the
+    logistic model to `samples` for the given `phase` with Newton's method,
+    with an L2 penalty of `l2` per sample that keeps the weights finite.
+    """
+    weights = [0.] * 4
+    vectors = [(features(sample, phase), sample[3]) for sample in samples]
+    penalty = l2 * len(samples)
+    for _ in range(iterations):
+        gradient = [-penalty * w for w in weights]
+        hessian = [[penalty if i == j else 0. for j in range(4)] for i in range(4)]
+        for x, result in vectors:
+            score = sum(w * xi for w, xi in zip(weights, x))
+            p = 1. / (1. + math.exp(-score))
+            for i in range(4):
+                gradient[i] += (result - p) * x[i]
+                for j in range(i, 4):
+                    hessian[i][j] += p * (1. - p) * x[i] * x[j]
+        for i in range(4):
+            for j in range(i):
+                hessian[i][j] = hessian[j][i]
+        step = _solve(hessian, gradient)
+        weights = [w + s for w, s in zip(weights, step)]
+        if max(abs(s) for s in step) < tolerance:
+            break
+    return weights
+
+
+def fit_scale(samples, heuristic):
+    """Return the scale k minimizing the log loss of `samples` under the
+    model P(win) = 1 / (1 + exp(-k * heuristic score)), and that loss."""
+    weights = [heuristic.own_weight, heuristic.opp_weight,
+               heuristic.opening_own_weight, heuristic.opening_opp_weight]
+    best = None
+    for k in [2 ** (i / 4.) for i in range(-40, 9)]:
+        loss = log_loss(samples, [k * w for w in weights], heuristic.phase)
+        if best is None or loss < best[1]:
+            best = (k, loss)
+    return best
+
+
+def tune(games, validation_fraction=0.2, phases=PHASES):
+    """
+    Fit the heuristic to the samples of `games` (see `load_samples`) for
+    every phase in `phases`, and return the `MobilityScore` with the lowest
+    log loss on the held-out games, along with a dict describing the fit.
+    """
+    step = max(int(round(1. / validation_fraction)), 2)
+    training = [s for idx, game in enumerate(games) if idx % step for s in game]
+    validation = [s for idx, game in enumerate(games) if not idx % step for s in game]
+
+    best = None
+    for phase in phases:
+        weights = fit(training, phase)
+        loss = log_loss(validation, weights, phase)
+        if best is None or loss < best[2]:
+            best = (phase, weights, loss)
+    phase, weights, loss = best
+    heuristic = MobilityScore(weights[0], weights[1], weights[2], weights[3], phase)
+    scale, baseline_loss = fit_scale(validation, MobilityScore())
+    report = {"training_positions": len(training),
+              "validation_positions": len(validation),
+              "training_loss": log_loss(training, weights, phase),
+              "validation_loss": loss,
+              "baseline_validation_loss": baseline_loss,
+              "baseline_scale": scale}
+    return heuristic, report
+
+
+def _play_pair_task(task):
+    """Pool entry point for `compare`: play both colors of one opening and
+    return the number of games won by the candidate."""
+    seed, candidate, nodes = task
+    heuristic = MobilityScore(**candidate)
+    wins = 0
+    for score_fns, candidate_idx in (((heuristic, custom_score), 0),
+                                     ((custom_score, heuristic), 1)):
+        _, winner = play_game(seed, nodes=nodes, score_fns=score_fns)
+        wins += winner == candidate_idx
+    return wins
+
+
+def compare(heuristic, num_pairs, nodes, seed=0, workers=1):
+    """
+    Play `num_pairs` pairs of games between agents using `heuristic` and
+    `custom_score`, each pair starting from the same random opening with the
+    colors swapped, and return the (wins, losses) of `heuristic`.
+    """
+    tasks = [(seed + idx, heuristic.as_dict(), nodes) for idx in range(num_pairs)]
+    if workers > 1:
+        pool = multiprocessing.Pool(workers)
+        try:
+            wins = sum(pool.map(_play_pair_task, tasks))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        wins = sum(map(_play_pair_task, tasks))
+    return wins, 2 * num_pairs - wins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", metavar="game_file",
+                        help="game files written by selfplay.py")
+    parser.add_argument("--skip-plies", type=int, default=2,
+                        help="number of positions skipped at the start of every game")
+    parser.add_argument("--pairs", type=int, default=100,
+                        help="number of pairs of validation games against custom_score")
+    parser.add_argument("--nodes", type=int, default=1000,
+                        help="node budget per move of the validation games")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", default="weights.json")
+    args = parser.parse_args()
+    if args.seed is None:
+        args.seed = random.randrange(2**32)
+
+    start = timeit.default_timer()
+    heuristic, fit_report = tune(load_samples(args.paths, args.skip_plies))
+    print("Fit on {training_positions} positions: log loss {training_loss:.4f} "
+          "(validation {validation_loss:.4f}, custom_score {baseline_validation_loss:.4f})"
+          .format(**fit_report))
+    print("Weights: {}".format(heuristic.as_dict()))
+
+    wins, losses = compare(heuristic, args.pairs, args.nodes, args.seed, args.workers)
+    low, elo, high = elo_interval(wins, losses)
+    print("Against custom_score: {} wins, {} losses, Elo {:+.0f} [{:+.0f}, {:+.0f}]".format(
+        wins, losses, elo, low, high))
+
+    report = {"weights": heuristic.as_dict(),
+              "fit": fit_report,
+              "match": {"opponent": "custom_score", "nodes": args.nodes, "seed": args.seed,
+                        "wins": wins, "losses": losses, "elo": [low, elo, high]},
+              "seconds": timeit.default_timer() - start}
+    with open(args.output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print("Wrote {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+This file contains test cases for the parametrized heuristic family in
+game_agent.py and the weight tuning in tuning.py.
+"""
+import math
+import random
+import unittest
+
+import isolation
+import game_agent
+import sample_players
+import tuning
+
+from board_test import random_game
+
+
+class MobilityScoreTest(unittest.TestCase):
+
+    def test_family_members(self):
+        """ Weights reproduce the hand-written mobility heuristics """
+        heuristics = [(game_agent.custom_score, game_agent.MobilityScore()),
+                      (sample_players.improved_score, game_agent.MobilityScore(1., 1., 1., 1.)),
+                      (sample_players.open_move_score, game_agent.MobilityScore(1., 0., 1., 0.))]
+        for seed in range(10):
+            _, moves = random_game(isolation.BitBoard, seed)
+            board = isolation.BitBoard("Player1", "Player2")
+            for move in moves:
+                board.apply_move(move)
+                for score_fn, heuristic in heuristics:
+                    for player in ("Player1", "Player2"):
+                        self.assertEqual(heuristic(board, player), score_fn(board, player))
+
+    def test_round_trip(self):
+        """ Parameters survive a round trip through as_dict() """
+        heuristic = game_agent.MobilityScore(0.5, 1.5, 0.1, 0.9, 0.3)
+        self.assertEqual(game_agent.MobilityScore(**heuristic.as_dict()).as_dict(),
+                         heuristic.as_dict())
+
+
+class TuningTest(unittest.TestCase):
+
+    def test_fit_recovers_weights(self):
+        """ The logistic fit recovers the weights that generated the results """
+        true_weights = [0.8, 0.4, 0.1, 0.5]
+        rng = random.Random(0)
+        samples = []
+        for _ in range(4000):
+            own, opp, played = rng.randint(0, 8), rng.randint(0, 8), rng.random()
+            x = tuning.features((own, opp, played, None), 0.5)
+            p = 1. / (1. + math.exp(-sum(w * xi for w, xi in zip(true_weights, x))))
+            samples.append((own, opp, played, 1. if rng.random() < p else 0.))
+        weights = tuning.fit(samples, 0.5, l2=0.)
+        for fitted, expected in zip(weights, true_weights):
+            self.assertAlmostEqual(fitted, expected, delta=0.15)
+        self.assertLess(tuning.log_loss(samples, weights, 0.5),
+                        tuning.log_loss(samples, [0.] * 4, 0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
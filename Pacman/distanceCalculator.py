@@ -0,0 +1,157 @@
+# distanceCalculator.py
+# ---------------------
+# Licensing Information: Please do not distribute or publish solutions to this
+# project. You are free to use and extend these projects for educational
+# purposes. The Pacman AI projects were developed at UC Berkeley, primarily by
+# John DeNero (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
+
+"""
+Exact maze distances between all pairs of open cells of a layout.
+
+The distances are found with a breadth first search from every open cell and
+kept in an int16 matrix: a NumPy array when NumPy is installed, and otherwise
+an array.array in row-major order.  Computed matrices are cached in memory
+and on disk in CACHE_DIR, keyed by a hash of the walls, so each layout is
+only searched once.  CACHE_DIR belongs to the current user, and each cached
+matrix is stored after a checksum of its contents; files that do not match
+their checksum are ignored and computed again.
+
+  distances = getMazeDistances(gameState.getWalls())
+  distances.getDistance((1,1), (5,6))
+"""
+
+import hashlib
+import os
+from array import array
+from collections import deque
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or
+                         os.path.join(os.path.expanduser('~'), '.cache'), 'pacmanMazeDistances')
+UNREACHABLE = 2 ** 15 - 1 # The distance between cells with no path between them
+
+_cache = {}
+
+class MazeDistances:
+  """
+  The maze distances between every pair of open cells of a layout.
+
+    cells:  the open cells, in the order of the rows and columns of the matrix
+    index:  a dictionary from each open cell to its row of the matrix
+    matrix: the int16 distance matrix
+  """
+  def __init__(self, walls, matrix=None):
+    self.cells = [(x, y) for x in range(walls.width) for y in range(walls.height)
+                  if not walls[x][y]]
+    self.index = dict((cell, i) for i, cell in enumerate(self.cells))
+    self.size = len(self.cells)
+    if matrix == None:
+      matrix = self._search(walls)
+    if numpy != None:
+      self.matrix = numpy.frombuffer(matrix.tostring(), dtype=numpy.int16).reshape(self.size, self.size)
+      self._flat = self.matrix.ravel()
+    else:
+      self.matrix = self._flat = matrix
+
+  def _search(self, walls):
+    "Returns the distance matrix, found by a breadth first search from every cell."
+    neighbors = []
+    for x, y in self.cells:
+      adjacent = [(x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)]
+      neighbors.append([self.index[cell] for cell in adjacent if cell in self.index])
+    matrix = array('h')
+    for source in range(self.size):
+      row = [UNREACHABLE] * self.size
+      row[source] = 0
+      queue = deque([source])
+      while queue:
+        cell = queue.popleft()
+        distance = row[cell] + 1
+        for neighbor in neighbors[cell]:
+          if row[neighbor] == UNREACHABLE:
+            row[neighbor] = distance
+            queue.append(neighbor)
+      matrix.extend(row)
+    return matrix
+
+  def getDistance(self, pos1, pos2):
+    "Returns the maze distance between two open cells."
+    return int(self._flat[self.index[pos1] * self.size + self.index[pos2]])
+
+  def tostring(self):
+    "Returns the matrix as a string of int16s in native byte order."
+    return self.matrix.tostring()
+
+def layoutKey(walls):
+  "Returns a hash identifying the walls of a layout."
+  return hashlib.sha1('%d %d\n%s' % (walls.width, walls.height, walls)).hexdigest()
+
+def getMazeDistances(walls, cacheDir=CACHE_DIR):
+  """
+  Returns the MazeDistances of the layout with the given walls, loading it
+  from the in-memory or on-disk cache when it has been computed before.
+  Pass cacheDir=None to skip the disk cache.
+  """
+  key = layoutKey(walls)
+  if key in _cache:
+    return _cache[key]
+  distances = None
+  if cacheDir != None:
+    path = os.path.join(cacheDir, key + '.int16')
+    distances = _load(walls, path)
+  if distances == None:
+    distances = MazeDistances(walls)
+    if cacheDir != None:
+      _save(distances, path)
+  _cache[key] = distances
+  return distances
+
+def _load(walls, path):
+  """
+  Returns the MazeDistances stored at path, or None if there are none or
+  the file does not match its checksum.
+  """
+  if not os.path.exists(path):
+    return None
+  try:
+    cacheFile = open(path, 'rb')
+    try:
+      checksum = cacheFile.readline().strip()
+      data = cacheFile.read()
+    finally:
+      cacheFile.close()
+  except (IOError, OSError):
+    return None
+  if checksum != hashlib.sha1(data).hexdigest():
+    return None
+  matrix = array('h')
+  matrix.fromstring(data)
+  if len(matrix) != walls.count(False) ** 2:
+    return None
+  return MazeDistances(walls, matrix)
+
+def _save(distances, path):
+  """
+  Writes the checksum and matrix of distances to path, ignoring errors: the
+  cache is optional.
+  """
+  try:
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path), 0700)
+    # write to a temporary file first so a concurrent reader never sees half a matrix
+    partial = '%s.%d' % (path, os.getpid())
+    cacheFile = open(partial, 'wb')
+    try:
+      data = distances.tostring()
+      cacheFile.write(hashlib.sha1(data).hexdigest() + '\n')
+      cacheFile.write(data)
+    finally:
+      cacheFile.close()
+    os.rename(partial, path)
+  except (IOError, OSError):
+    pass
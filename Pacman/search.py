@@ -12,7 +12,9 @@ by Pacman agents (in searchAgents.py).
 """
 
 import util
+from collections import deque
 from heapq import heappush, heappop
+from itertools import count
 
 class SearchProblem:
   """
@@ -84,16 +86,21 @@ def depthFirstSearch(problem):
   print "Is the start a goal?", problem.isGoalState(problem.getStartState())
   print "Start's successors:", problem.getSuccessors(problem.getStartState())
   """
-  if not problem.getStartState():
+  start = problem.getStartState()
+  if not start:
     return []
-  stack = [(problem.getStartState(), [], [])]
+  stack = [(start, None)]
+  closed = set()
   while stack:
-    state, visited, path = stack.pop()
+    state, node = stack.pop()
+    if state in closed:
+      continue
+    closed.add(state)
     for next_state, action, _ in problem.getSuccessors(state):
-      if next_state not in visited:
+      if next_state not in closed:
         if problem.isGoalState(next_state):
-          return path + [action]
-        stack.append((next_state, visited + [next_state], path + [action]))
+          return actionsTo((action, node))
+        stack.append((next_state, (action, node)))
 
 
 def breadthFirstSearch(problem):
@@ -101,35 +108,23 @@ def breadthFirstSearch(problem):
   Search the shallowest nodes in the search tree first.
   [2nd Edition: p 73, 3rd Edition: p 82]
   """
-  if not problem.getStartState():
+  start = problem.getStartState()
+  if not start:
     return []
-  queue = [(problem.getStartState(), [])]
-  visited = []
+  queue = deque([(start, None)])
+  reached = set([start])
   while queue:
-    state, path = queue.pop(0)
-    visited.append(state)
+    state, node = queue.popleft()
     for next_state, action, _ in problem.getSuccessors(state):
-      if next_state not in visited:
+      if next_state not in reached:
         if problem.isGoalState(next_state):
-          return path + [action]
-        queue.append((next_state, path + [action]))
+          return actionsTo((action, node))
+        reached.add(next_state)
+        queue.append((next_state, (action, node)))
       
 def uniformCostSearch(problem):
   "Search the node of least total cost first. "
-  if not problem.getStartState():
-    return []
-  heap = [(0, problem.getStartState(), [])]
-  visited = []
-  while heap:
-    cost, state, path = heappop(heap)
-    visited.append(state)
-    for next_state, action, steps in problem.getSuccessors(state):
-      if next_state not in visited:
-        if problem.isGoalState(next_state):
-          return path + [action]
-        new_actions = path + [action]
-        new_cost = problem.getCostOfActions(new_actions)
-        heappush(heap, (new_cost, next_state, new_actions))
+  return aStarSearch(problem, nullHeuristic)
 
 def nullHeuristic(state, problem=None):
   """
@@ -140,20 +135,44 @@ def nullHeuristic(state, problem=None):
 
 def aStarSearch(problem, heuristic=nullHeuristic):
   "Search the node that has the lowest combined cost and heuristic first."
-  if not problem.getStartState():
+  start = problem.getStartState()
+  if not start:
     return []
-  heap = [(0, problem.getStartState(), [])]
-  visited = []
+  # Frontier entries are (f, tie, g, state, node), where g is the cost of the
+  # path to state, summed from the step costs of getSuccessors.  The counter
+  # breaks ties between equal priorities without comparing states.  Instead
+  # of decreasing the key of a state reached by a cheaper path, a new entry
+  # is pushed and the stale one is skipped when it is popped.
+  order = count()
+  heap = [(heuristic(start, problem), next(order), 0, start, None)]
+  best_cost = {start: 0}
   while heap:
-    cost, state, path = heappop(heap)
-    visited.append(state)
-    for next_state, action, steps in problem.getSuccessors(state):
-      if next_state not in visited:
-        if problem.isGoalState(next_state):
-          return path + [action]
-        new_actions = path + [action]
-        new_cost = problem.getCostOfActions(new_actions) + heuristic(next_state, problem)
-        heappush(heap, (new_cost, next_state, new_actions))
+    _, _, cost, state, node = heappop(heap)
+    if cost > best_cost[state]:
+      continue
+    if problem.isGoalState(state):
+      return actionsTo(node)
+    for next_state, action, step in problem.getSuccessors(state):
+      new_cost = cost + step
+      if next_state not in best_cost or new_cost < best_cost[next_state]:
+        best_cost[next_state] = new_cost
+        priority = new_cost + heuristic(next_state, problem)
+        heappush(heap, (priority, next(order), new_cost, next_state, (action, node)))
+
+def actionsTo(node):
+  """
+  Returns the list of actions that reaches a search node.
+
+  Search nodes are (action, parent) pairs that point back towards the start
+  state, whose node is None, so frontier entries share their common prefix
+  instead of each holding a copy of the whole path.
+  """
+  actions = []
+  while node is not None:
+    action, node = node
+    actions.append(action)
+  actions.reverse()
+  return actions
   
 # Abbreviations
 bfs = breadthFirstSearch
@@ -34,8 +34,11 @@ from game import Actions
 import util
 import math
 import time
+import itertools
 import search
 import searchAgents
+import distanceCalculator
+from collections import OrderedDict
 from heapq import heappush, heappop
 
 class GoWestAgent(Agent):
@@ -155,6 +158,7 @@ class PositionSearchProblem(search.SearchProblem):
 
     # For display purposes
     self._visited, self._visitedlist, self._expanded = {}, [], 0
+    self.heuristicInfo = {} # A dictionary for the heuristic to store information
 
   def getStartState(self):
     return self.startState
@@ -242,6 +246,17 @@ class StayWestSearchAgent(SearchAgent):
       costFn = lambda pos: 2 ** pos[0] 
       self.searchType = lambda state: PositionSearchProblem(state, costFn)
 
+def mazeDistances(problem):
+  """
+  Returns the exact maze distances between the open cells of the problem's
+  layout (a MazeDistances, see distanceCalculator.py).  They are computed
+  once per layout and kept in problem.heuristicInfo['mazeDistances'].
+  """
+  info = problem.heuristicInfo
+  if 'mazeDistances' not in info:
+    info['mazeDistances'] = distanceCalculator.getMazeDistances(problem.walls)
+  return info['mazeDistances']
+
 def manhattanHeuristic(position, problem, info={}):
   "The Manhattan distance heuristic for a PositionSearchProblem"
   xy1 = position
@@ -277,10 +292,11 @@ class CornersProblem(search.SearchProblem):
       if not startingGameState.hasFood(*corner):
         print 'Warning: no food in corner ' + str(corner)
     self._expanded = 0 # Number of search nodes expanded
+    self.heuristicInfo = {} # A dictionary for the heuristic to store information
     
   def getStartState(self):
     "Returns the start state (in your state space, not the full Pacman state space)"
-    return (self.startingPosition, set())
+    return (self.startingPosition, frozenset([self.startingPosition]) & frozenset(self.corners))
     
   def isGoalState(self, state):
     "Returns whether this search state is a goal state of the problem"
@@ -299,17 +315,19 @@ class CornersProblem(search.SearchProblem):
      cost of expanding to that successor
     """
     x,y = state[0]
-    visited_corners = state[1].copy()
+    visited_corners = state[1]
     successors = []
     for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
       # Add a successor state to the successor list if the action is legal
       dx, dy = Actions.directionToVector(action)
       nextx, nexty = int(x + dx), int(y + dy)
       if not self.walls[nextx][nexty]:
-        pos = (x,y)
-        if pos in self.corners:
-          visited_corners.add(pos)
-        successor = ((nextx, nexty), visited_corners)
+        pos = (nextx, nexty)
+        # states are hashed by the search functions, so the visited corners are a frozenset
+        if pos in self.corners and pos not in visited_corners:
+          successor = (pos, visited_corners | frozenset([pos]))
+        else:
+          successor = (pos, visited_corners)
         successors.append((successor, action, 1))
     
     self._expanded += 1
@@ -342,20 +360,21 @@ def cornersHeuristic(state, problem):
   on the shortest path from the state to a goal of the problem; i.e.
   it should be admissible (as well as consistent).
   """
-  def distance_between(a, b):
-    # return abs(a[0] - b[0])**2 + abs(a[1] - b[1])**2 ... inadmissable even though it reduces "Search nodes expanded" to 158
-    return util.manhattanDistance(a, b) # Search nodes expanded: 1505
-  corners = set(problem.corners) # These are the corner coordinates
+  # The exact cost of the cheapest tour of the unvisited corners in the maze:
+  # with at most 4! orders to try, the heuristic is perfect and cheap.
+  distance_between = mazeDistances(problem).getDistance
   pos, visited_corners = state
-  unvisited_corners = corners - visited_corners
-  sum = 0
-  prev = pos
-  while unvisited_corners:
-    distance, corner = min([(distance_between(prev, corner), corner) for corner in unvisited_corners])
-    sum += distance
-    prev = corner
-    unvisited_corners.remove(corner)
-  return sum
+  unvisited_corners = [corner for corner in problem.corners if corner not in visited_corners]
+  best = 0
+  for order in itertools.permutations(unvisited_corners):
+    sum = 0
+    prev = pos
+    for corner in order:
+      sum += distance_between(prev, corner)
+      prev = corner
+    if not best or sum < best:
+      best = sum
+  return best
 
 class AStarCornersAgent(SearchAgent):
   "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
@@ -368,12 +387,18 @@ class FoodSearchProblem:
   A search problem associated with finding the a path that collects all of the 
   food (dots) in a Pacman game.
   
-  A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
+  A search state in this problem is a tuple ( pacmanPosition, food ) where
     pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-    foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food 
+    food:           an int bitmask of the remaining food, with bit i set while
+                    the dot at foodPositions[i] is uneaten
+
+  Unlike a Grid, the bitmask is immutable, cheap to hash and shared between
+  states; getFoodList turns it back into a list of positions.
   """
   def __init__(self, startingGameState):
-    self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+    self.foodPositions = startingGameState.getFood().asList()
+    self.foodBits = dict((pos, 1 << i) for i, pos in enumerate(self.foodPositions))
+    self.start = (startingGameState.getPacmanPosition(), (1 << len(self.foodPositions)) - 1)
     self.walls = startingGameState.getWalls()
     self.startingGameState = startingGameState
     self._expanded = 0
@@ -383,7 +408,7 @@ class FoodSearchProblem:
     return self.start
   
   def isGoalState(self, state):
-    return state[1].count() == 0
+    return state[1] == 0
 
   def getSuccessors(self, state):
     "Returns successor states, the actions they require, and a cost of 1."
@@ -394,11 +419,16 @@ class FoodSearchProblem:
       dx, dy = Actions.directionToVector(direction)
       nextx, nexty = int(x + dx), int(y + dy)
       if not self.walls[nextx][nexty]:
-        nextFood = state[1].copy()
-        nextFood[nextx][nexty] = False
+        nextFood = state[1]
+        if (nextx, nexty) in self.foodBits:
+          nextFood &= ~self.foodBits[(nextx, nexty)]
         successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
     return successors
 
+  def getFoodList(self, food):
+    "Returns the positions of the dots in the food bitmask of a state."
+    return [pos for i, pos in enumerate(self.foodPositions) if food >> i & 1]
+
   def getCostOfActions(self, actions):
     """Returns the cost of a particular sequence of actions.  If those actions
     include an illegal move, return 999999"""
@@ -413,6 +443,8 @@ class FoodSearchProblem:
       cost += 1
     return cost
 
+FOOD_HEURISTIC_CACHE_SIZE = 2 ** 16 # Spanning tree weights memoized by foodHeuristic
+
 class AStarFoodSearchAgent(SearchAgent):
   "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
   def __init__(self):
@@ -431,9 +463,9 @@ def foodHeuristic(state, problem):
   your heuristic is *not* consistent, and probably not admissible!  On the other hand,
   inadmissible or inconsistent heuristics may find optimal solutions, so be careful.
   
-  The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a 
-  Grid (see game.py) of either True or False. You can call foodGrid.asList()
-  to get a list of food coordinates instead.
+  The state is a tuple ( pacmanPosition, food ) where food is an int bitmask
+  of the remaining food (see FoodSearchProblem). You can call
+  problem.getFoodList(food) to get a list of food coordinates instead.
   
   If you want access to info like walls, capsules, etc., you can query the problem.
   For example, problem.walls gives you a Grid of where the walls are.
@@ -444,18 +476,53 @@ def foodHeuristic(state, problem):
     problem.heuristicInfo['wallCount'] = problem.walls.count()
   Subsequent calls to this heuristic can access problem.heuristicInfo['wallCount']
   """
-  position, foodGrid = state
-  def distance_between(a, b):
-    return util.manhattanDistance(a, b)
-  sum = 0
-  prev = position
-  uneaten = foodGrid.asList()
-  while uneaten:
-    distance, food = min([(distance_between(prev, food), food) for food in uneaten])
-    sum += distance
-    prev = food
-    uneaten.remove(food)
-  return sum
+  # Any path eating all the food first walks to some dot and then links up the
+  # rest, so its cost is at least the maze distance to the nearest dot plus
+  # the weight of a minimum spanning tree of the food.  The estimate is
+  # consistent: eating the last dot of a branch lowers the tree by at most
+  # the distance from that dot to the closest remaining one.
+  position, food = state
+  if not food:
+    return 0
+  info = problem.heuristicInfo
+  distance_between = mazeDistances(problem).getDistance
+  if 'foodDistances' not in info:
+    info['foodDistances'] = [[distance_between(a, b) for b in problem.foodPositions]
+                             for a in problem.foodPositions]
+    info['spanningTrees'] = OrderedDict()
+  uneaten = [i for i in range(len(problem.foodPositions)) if food >> i & 1]
+  # The tree only depends on the food, so its weight is memoized by bitmask,
+  # keeping the FOOD_HEURISTIC_CACHE_SIZE most recently used weights
+  trees = info['spanningTrees']
+  if food in trees:
+    weight = trees.pop(food)
+  else:
+    weight = spanningTreeWeight(uneaten, info['foodDistances'])
+    if len(trees) >= FOOD_HEURISTIC_CACHE_SIZE:
+      trees.popitem(last=False)
+  trees[food] = weight
+  nearest = min([distance_between(position, problem.foodPositions[i]) for i in uneaten])
+  return nearest + weight
+
+def spanningTreeWeight(nodes, distances):
+  """
+  Returns the weight of a minimum spanning tree of nodes, a list of indices
+  into the distance table distances, using Prim's algorithm.
+  """
+  if not nodes:
+    return 0
+  first, rest = nodes[0], nodes[1:]
+  # best[j] is the distance from rest[j] to the closest node in the tree
+  best = [distances[first][j] for j in rest]
+  weight = 0
+  while rest:
+    i = min(range(len(rest)), key=best.__getitem__)
+    weight += best.pop(i)
+    row = distances[rest.pop(i)]
+    for j, node in enumerate(rest):
+      if row[node] < best[j]:
+        best[j] = row[node]
+  return weight
   
 class ClosestDotSearchAgent(SearchAgent):
   "Search for all food using a sequence of searches"
@@ -510,6 +577,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
     self.startState = gameState.getPacmanPosition()
     self.costFn = lambda x: 1
     self._visited, self._visitedlist, self._expanded = {}, [], 0
+    self.heuristicInfo = {}
     
   def isGoalState(self, state):
     """
@@ -543,9 +611,9 @@ class ApproximateSearchAgent(Agent):
     
 def mazeDistance(point1, point2, gameState):
   """
-  Returns the maze distance between any two points, using the search functions
-  you have already built.  The gameState can be any game state -- Pacman's position
-  in that state is ignored.
+  Returns the maze distance between any two points, looked up in the distances
+  precomputed for the layout (see distanceCalculator.py).  The gameState can be any
+  game state -- Pacman's position in that state is ignored.
   
   Example usage: mazeDistance( (2,4), (5,6), gameState)
   
@@ -556,5 +624,4 @@ def mazeDistance(point1, point2, gameState):
   walls = gameState.getWalls()
   assert not walls[x1][y1], 'point1 is a wall: ' + point1
   assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-  prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False)
-  return len(search.bfs(prob))
\ No newline at end of file
+  return distanceCalculator.getMazeDistances(walls).getDistance(point1, point2)
\ No newline at end of file
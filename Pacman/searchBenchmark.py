@@ -0,0 +1,212 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information: Please do not distribute or publish solutions to this
+# project. You are free to use and extend these projects for educational
+# purposes. The Pacman AI projects were developed at UC Berkeley, primarily by
+# John DeNero (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
+
+"""
+Times the search functions in search.py on large layouts, reporting the
+number of nodes expanded, expansions per second and peak memory use.
+
+By default every search is a PositionSearchProblem from Pacman's starting
+position to the dot when the layout has a single one (as in the mazes), or
+else to the open cell farthest away from Pacman.  Other problem types from
+searchAgents.py can be benchmarked with -p.
+
+Each search runs in a forked process, so that the peak resident set size
+reported by the resource module belongs to that search alone.  Layout names
+may contain wildcards, and searches still running after the timeout are
+stopped and reported as such.  For example:
+
+> python searchBenchmark.py
+> python searchBenchmark.py -l mediumCorners -p CornersProblem -f bfs,astar -H cornersHeuristic
+> python searchBenchmark.py -l '*Search' -p FoodSearchProblem -f astar -H foodHeuristic -t 60
+"""
+
+import fnmatch
+import os
+import resource
+import signal
+import sys
+import time
+import cPickle
+from collections import deque
+
+import layout
+import search
+import searchAgents
+from game import Actions
+from game import Directions
+from pacman import GameState
+
+def farthestCell(walls, start):
+  "Returns the open cell with the longest maze distance from start."
+  distances = {start: 0}
+  queue = deque([start])
+  cell = start
+  while queue:
+    cell = queue.popleft()
+    x, y = cell
+    for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+      dx, dy = Actions.directionToVector(direction)
+      nextCell = (int(x + dx), int(y + dy))
+      if not walls[nextCell[0]][nextCell[1]] and nextCell not in distances:
+        distances[nextCell] = distances[cell] + 1
+        queue.append(nextCell)
+  return cell
+
+def makeProblem(layoutName, problemName):
+  "Returns a new search problem of type problemName on the named layout."
+  lay = layout.getLayout(layoutName)
+  if lay == None: raise Exception("The layout " + layoutName + " cannot be found")
+  state = GameState()
+  state.initialize(lay, 0)
+  if problemName != 'PositionSearchProblem':
+    return getattr(searchAgents, problemName)(state)
+  if state.getNumFood() == 1:
+    goal = state.getFood().asList()[0]
+  else:
+    goal = farthestCell(state.getWalls(), state.getPacmanPosition())
+  return searchAgents.PositionSearchProblem(state, goal=goal, warn=False)
+
+def expandLayouts(layoutNames):
+  "Returns the layout names, replacing names with wildcards by the layouts they match."
+  expanded = []
+  for name in layoutNames:
+    if '*' in name or '?' in name:
+      files = fnmatch.filter(sorted(os.listdir('layouts')), name + '.lay')
+      expanded.extend([os.path.splitext(f)[0] for f in files])
+    else:
+      expanded.append(name)
+  return expanded
+
+class SearchTimeout(Exception):
+  pass
+
+def raiseTimeout(signum, frame):
+  raise SearchTimeout()
+
+def runSearch(layoutName, problemName, fn, heuristic, timeout=0):
+  """
+  Runs one search and returns a dictionary describing it, or None if it is
+  still running after timeout seconds (0 for no limit).  Meant to be run in
+  a child process: peakKB is the growth of the peak resident set size of
+  the process during the search, and the timeout uses SIGALRM.
+  """
+  problem = makeProblem(layoutName, problemName)
+  func = getattr(search, fn)
+  if 'heuristic' in func.func_code.co_varnames:
+    searchFunction = lambda prob: func(prob, heuristic=heuristic)
+  else:
+    searchFunction = func
+  baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  start = time.time()
+  signal.signal(signal.SIGALRM, raiseTimeout)
+  signal.alarm(timeout)
+  try:
+    actions = searchFunction(problem)
+  except SearchTimeout:
+    return None
+  signal.alarm(0)
+  seconds = time.time() - start
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  if sys.platform == 'darwin':
+    # ru_maxrss is in bytes on OS X and in kilobytes on Linux
+    baseline, peak = baseline / 1024, peak / 1024
+  return {'expanded': problem._expanded, 'seconds': seconds,
+          'cost': problem.getCostOfActions(actions), 'peakKB': peak - baseline}
+
+def runForked(*args):
+  "Calls runSearch(*args) in a forked process and returns its result."
+  readEnd, writeEnd = os.pipe()
+  pid = os.fork()
+  if pid == 0:
+    os.close(readEnd)
+    try:
+      result = runSearch(*args)
+    except Exception, e:
+      result = {'error': repr(e)}
+    os.write(writeEnd, cPickle.dumps(result, 2))
+    os._exit(0)
+  os.close(writeEnd)
+  chunks = []
+  while True:
+    chunk = os.read(readEnd, 65536)
+    if not chunk: break
+    chunks.append(chunk)
+  os.close(readEnd)
+  os.waitpid(pid, 0)
+  result = cPickle.loads(''.join(chunks))
+  if result != None and 'error' in result:
+    raise Exception('%s failed on %s: %s' % (args[2], args[0], result['error']))
+  return result
+
+def benchmark(layoutNames, problemName, fns, heuristic, repeat, timeout=0):
+  """
+  Returns a list of (layout, function, result) triples, one for every
+  search function on every layout, keeping the fastest of repeat runs.
+  The result is None for searches that timed out.
+  """
+  results = []
+  for layoutName in layoutNames:
+    for fn in fns:
+      runs = []
+      for i in range(repeat):
+        runs.append(runForked(layoutName, problemName, fn, heuristic, timeout))
+        if runs[-1] == None: break
+      if None in runs:
+        results.append((layoutName, fn, None))
+      else:
+        results.append((layoutName, fn, min(runs, key=lambda run: run['seconds'])))
+  return results
+
+def printResults(results):
+  print '%-16s %-8s %9s %9s %9s %14s %10s' % ('Layout', 'Search', 'Cost', 'Expanded',
+                                              'Seconds', 'Expansions/s', 'Peak KB')
+  for layoutName, fn, run in results:
+    if run == None:
+      print '%-16s %-8s %9s' % (layoutName, fn, 'timeout')
+      continue
+    rate = run['expanded'] / max(run['seconds'], 1e-9)
+    print '%-16s %-8s %9g %9d %9.3f %14.0f %10d' % (layoutName, fn, run['cost'], run['expanded'],
+                                                    run['seconds'], rate, run['peakKB'])
+
+def readCommand(argv):
+  "Processes the command used to run the benchmark from the command line."
+  from optparse import OptionParser
+  parser = OptionParser(__doc__)
+  parser.add_option('-l', '--layouts', dest='layouts', default='bigMaze,bigSearch',
+                    help='comma separated LAYOUTS to search', metavar='LAYOUTS')
+  parser.add_option('-p', '--problem', dest='problem', default='PositionSearchProblem',
+                    help='the search problem TYPE in searchAgents.py', metavar='TYPE')
+  parser.add_option('-f', '--functions', dest='functions', default='dfs,bfs,ucs,astar',
+                    help='comma separated search FUNCTIONS in search.py', metavar='FUNCTIONS')
+  parser.add_option('-H', '--heuristic', dest='heuristic', default=None,
+                    help='the heuristic used by A* (manhattanHeuristic for position '
+                         'searches, nullHeuristic otherwise)')
+  parser.add_option('-r', '--repeat', dest='repeat', type='int', default=3,
+                    help='number of runs of every search, the fastest of which is reported')
+  parser.add_option('-t', '--timeout', dest='timeout', type='int', default=0,
+                    help='seconds after which a search is stopped (0 for no limit)')
+  options, otherjunk = parser.parse_args(argv)
+  if len(otherjunk) != 0:
+    raise Exception('Command line input not understood: ' + str(otherjunk))
+  return options
+
+if __name__ == '__main__':
+  options = readCommand(sys.argv[1:])
+  heuristicName = options.heuristic
+  if heuristicName == None:
+    if options.problem == 'PositionSearchProblem':
+      heuristicName = 'manhattanHeuristic'
+    else:
+      heuristicName = 'nullHeuristic'
+  if heuristicName in dir(searchAgents):
+    heuristic = getattr(searchAgents, heuristicName)
+  else:
+    heuristic = getattr(search, heuristicName)
+  printResults(benchmark(expandLayouts(options.layouts.split(',')), options.problem,
+                         options.functions.split(','), heuristic, options.repeat,
+                         options.timeout))